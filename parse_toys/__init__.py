@@ -1,6 +1,20 @@
 from .grammar import *
+from .tree import *
 from .unger import *
 from .chomsky_normal_form import *
+from .deterministic import *
+from .chart import *
 from .cyk import *
+from .glr import *
+from .viterbi import *
+from .counting import *
+from .dispatch import *
+from .diagnosis import *
+from .incremental import *
+from .tokens import *
+from .codegen import *
+from .budget import *
+from .cache import *
+from .service import *
 
 __version__ = '0.0.120'
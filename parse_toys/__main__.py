@@ -0,0 +1,5 @@
+import sys
+
+from parse_toys.cli import main
+
+sys.exit(main())
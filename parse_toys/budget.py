@@ -0,0 +1,95 @@
+import time
+from typing import Optional
+
+__all__ = ['ParseBudget', 'BudgetExceeded']
+
+
+class BudgetExceeded(RuntimeError):
+
+    def __init__(self, reason: str, steps: int, memo_entries: int, elapsed: float):
+        """The error raised when a parser runs out of its budget.
+
+        :param reason: 'steps', 'memo' or 'deadline'.
+        :param steps: The number of steps done.
+        :param memo_entries: The number of memorized entries.
+        :param elapsed: The seconds since the parsing started.
+        """
+        super().__init__(f'Parsing budget exceeded ({reason}): '
+                         f'{steps} steps, {memo_entries} memo entries, {elapsed:.3f} seconds')
+        self.reason = reason
+        self.steps = steps
+        self.memo_entries = memo_entries
+        self.elapsed = elapsed
+
+
+class ParseBudget(object):
+
+    def __init__(self,
+                 max_steps: Optional[int] = None,
+                 max_memo: Optional[int] = None,
+                 timeout: Optional[float] = None,
+                 deadline: Optional[float] = None,
+                 check_interval: int = 256):
+        """Initialize the limits of a parse, the parsers check them cooperatively.
+
+        A step is a division tried by Unger's method, or a split point of a cell tried by CYK.
+        The memo entries are the cells of the CYK table and the memorized spans of the reconstruction,
+        or the memorized spans of Unger's method.
+
+        :param max_steps: The maximum number of steps.
+        :param max_memo: The maximum number of memo entries.
+        :param timeout: The maximum seconds of a parse.
+        :param deadline: The latest `time.monotonic()` at which the parse should still be running.
+        :param check_interval: The clock is only read after this number of steps.
+        """
+        self.max_steps = max_steps
+        self.max_memo = max_memo
+        self.timeout = timeout
+        self.deadline = deadline
+        self.check_interval = check_interval
+        self.steps = 0
+        self.memo_entries = 0
+        self.start_time = time.monotonic()
+        self._end_time = None
+        self._next_check = 0
+
+    def start(self) -> 'ParseBudget':
+        """Reset the counters, the parsers call this before they start."""
+        self.steps = 0
+        self.memo_entries = 0
+        self.start_time = time.monotonic()
+        self._end_time = self.deadline
+        if self.timeout is not None:
+            end_time = self.start_time + self.timeout
+            self._end_time = end_time if self._end_time is None else min(self._end_time, end_time)
+        self._next_check = 0
+        return self
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self.start_time
+
+    def _exceeded(self, reason: str) -> BudgetExceeded:
+        return BudgetExceeded(reason, self.steps, self.memo_entries, self.elapsed)
+
+    def step(self, count: int = 1):
+        """Count the steps and check the limits.
+
+        :param count: The number of new steps.
+        """
+        self.steps += count
+        if self.max_steps is not None and self.steps > self.max_steps:
+            raise self._exceeded('steps')
+        if self._end_time is not None and self.steps >= self._next_check:
+            self._next_check = self.steps + self.check_interval
+            if time.monotonic() > self._end_time:
+                raise self._exceeded('deadline')
+
+    def memo(self, entries: int):
+        """Update the number of memo entries and check the limit.
+
+        :param entries: The current number of memo entries.
+        """
+        self.memo_entries = entries
+        if self.max_memo is not None and entries > self.max_memo:
+            raise self._exceeded('memo')
@@ -0,0 +1,117 @@
+import sys
+import functools
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple, Union
+
+from parse_toys.grammar import Grammar
+
+__all__ = ['ParseCache']
+
+
+def _estimate_size(value) -> int:
+    """Estimate the bytes of a tree without recursion, the shared strings are counted repeatedly."""
+    size, stack = 0, [value]
+    while len(stack) > 0:
+        value = stack.pop()
+        size += sys.getsizeof(value)
+        if isinstance(value, (tuple, list)):
+            stack.extend(value)
+        elif hasattr(value, 'children') and isinstance(value.children, (tuple, list)):
+            stack.extend(value.children)
+    return size
+
+
+class ParseCache(object):
+
+    def __init__(self, max_entries: Optional[int] = 4096, max_bytes: Optional[int] = None):
+        """Initialize a cache of the parsed trees with LRU eviction.
+
+        The keys contain the fingerprint of the grammar,
+        so the results of a grammar are not used after it is modified.
+
+        :param max_entries: The maximum number of cached results, no limit if it is None.
+        :param max_bytes: The maximum estimated bytes of the cached sentences and trees, no limit if it is None.
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.entries: 'OrderedDict[Tuple, Tuple[Any, int]]' = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    @staticmethod
+    def key(parse_function: Callable,
+            grammar: Grammar,
+            sentence: Union[str, Sequence],
+            kwargs: Dict[str, Any]) -> Tuple:
+        name = getattr(parse_function, '__qualname__', repr(parse_function))
+        # The tokens are keyed by their terminals, so the equal sequences of any type share a result
+        if not isinstance(sentence, str):
+            sentence = tuple(sentence)
+        return name, grammar.fingerprint(), tuple(sorted(kwargs.items())), sentence
+
+    def parse(self, parse_function: Callable, grammar: Grammar, sentence: Union[str, Sequence], **kwargs):
+        """Parse the sentence, or return the cached result of the same call.
+
+        :param parse_function: The parsing method, e.g. `parse_with_cyk`.
+        :param grammar: The grammar.
+        :param sentence: The sentence to be parsed, or the tokens in a sequence or a `TokenSequence`.
+        :param kwargs: The other arguments of the parsing method, they should be hashable.
+        :return: The result of the parsing method.
+        """
+        key = self.key(parse_function, grammar, sentence, kwargs)
+        if key in self.entries:
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return self.entries[key][0]
+        self.misses += 1
+        result = parse_function(grammar, sentence, **kwargs)
+        self._put(key, result)
+        return result
+
+    def wrap(self, parse_function: Callable) -> Callable:
+        """Get a parsing method that uses the cache.
+
+        :param parse_function: The parsing method, e.g. `parse_with_unger`.
+        :return: The method with the same arguments.
+        """
+        @functools.wraps(parse_function)
+        def _parse(grammar: Grammar, sentence: Union[str, Sequence], **kwargs):
+            return self.parse(parse_function, grammar, sentence, **kwargs)
+
+        return _parse
+
+    def _put(self, key: Tuple, result):
+        size = _estimate_size(key[-1]) + _estimate_size(result)
+        if self.max_bytes is not None and size > self.max_bytes:
+            return
+        self.entries[key] = (result, size)
+        self.bytes += size
+        while (self.max_entries is not None and len(self.entries) > self.max_entries) or \
+                (self.max_bytes is not None and self.bytes > self.max_bytes):
+            _, (_, evicted_size) = self.entries.popitem(last=False)
+            self.bytes -= evicted_size
+            self.evictions += 1
+
+    def clear(self):
+        self.entries.clear()
+        self.bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Get the statistics of the cache.
+
+        :return: The hits, misses, hit rate, evictions, entries and estimated bytes.
+        """
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total > 0 else 0.0,
+            'evictions': self.evictions,
+            'entries': len(self.entries),
+            'bytes': self.bytes,
+        }
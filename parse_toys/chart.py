@@ -0,0 +1,162 @@
+from array import array
+from typing import Dict, List, Sequence, Set, Tuple, Union
+
+from parse_toys.grammar import Symbol, Grammar
+
+__all__ = ['CYKChart', 'ParseChart']
+
+
+class CYKChart(object):
+
+    def __init__(self, symbols: Sequence[Symbol], length: int = 0):
+        """Initialize a triangular recognition table.
+
+        Only the cells (i, j) with i <= j are stored. They are kept column by column in one flat array,
+        the cell (i, j) lives at `j * (j + 1) // 2 + i`, so a column can be appended or released as a whole.
+        Each cell is a bit mask over `symbols`, packed into unsigned 64-bit integers when there are
+        no more than 64 symbols.
+
+        :param symbols: The symbols that can appear in the cells.
+        :param length: The number of columns to allocate.
+        """
+        self.symbols: List[Symbol] = list(symbols)
+        self.indices: Dict[Symbol, int] = {symbol: index for index, symbol in enumerate(self.symbols)}
+        self.cells: Union[array, List[int]] = array('Q') if len(self.symbols) <= 64 else []
+        self.length = 0
+        self.extend(length)
+
+    def __len__(self):
+        return self.length
+
+    @staticmethod
+    def index(i: int, j: int) -> int:
+        return j * (j + 1) // 2 + i
+
+    def symbol_mask(self, symbol: Symbol) -> int:
+        """Get the bit of the symbol, 0 if the symbol could never appear in the table."""
+        index = self.indices.get(symbol)
+        if index is None:
+            return 0
+        return 1 << index
+
+    def get_mask(self, i: int, j: int) -> int:
+        return self.cells[j * (j + 1) // 2 + i]
+
+    def set_mask(self, i: int, j: int, mask: int):
+        self.cells[j * (j + 1) // 2 + i] = mask
+
+    def add(self, i: int, j: int, symbol: Symbol):
+        self.cells[j * (j + 1) // 2 + i] |= self.symbol_mask(symbol)
+
+    def contains(self, i: int, j: int, symbol: Symbol) -> bool:
+        return bool(self.cells[j * (j + 1) // 2 + i] & self.symbol_mask(symbol))
+
+    def get(self, i: int, j: int) -> Set[Symbol]:
+        mask = self.get_mask(i, j)
+        return {symbol for index, symbol in enumerate(self.symbols) if mask >> index & 1}
+
+    def append_column(self) -> int:
+        """Allocate the next column.
+
+        :return: The index of the new column.
+        """
+        self.cells.extend([0] * (self.length + 1))
+        self.length += 1
+        return self.length - 1
+
+    def extend(self, count: int):
+        if count > 0:
+            self.cells.extend([0] * (count * (2 * self.length + count + 1) // 2))
+            self.length += count
+
+    def truncate(self, length: int):
+        """Release the columns from `length` on.
+
+        A column of the table depends on all the columns before it, so only the trailing columns
+        can be dropped without losing information needed by the others.
+
+        :param length: The number of columns to keep.
+        """
+        if length < self.length:
+            del self.cells[length * (length + 1) // 2:]
+            self.length = length
+
+    def pop_column(self):
+        self.truncate(self.length - 1)
+
+
+class ParseChart(object):
+
+    def __init__(self, grammar: Grammar, chart: CYKChart, head_mapping: Dict[Symbol, Symbol], sentence: Sequence):
+        """The recognition table of a sentence, queried with the heads of the original grammar.
+
+        The table of CYK contains every head that derives every substring, so the queries about
+        all the substrings are answered without parsing again. The spans are half-open and non-empty.
+
+        :param grammar: The original grammar.
+        :param chart: The recognition table of the grammar in Chomsky Normal Form.
+        :param head_mapping: The mapping from the original heads to the heads in Chomsky Normal Form.
+        :param sentence: The recognized sentence.
+        """
+        self.grammar = grammar
+        self.chart = chart
+        self.head_mapping = head_mapping
+        self.sentence = sentence
+        # The bits of the original heads in the table
+        self.masks: Dict[Symbol, int] = {}
+        for head in grammar.productions.keys():
+            mask = chart.symbol_mask(head_mapping.get(head, head))
+            if mask:
+                self.masks[head] = mask
+
+    def __len__(self):
+        return len(self.chart)
+
+    def _mask(self, symbol: Union[str, Symbol]) -> int:
+        if isinstance(symbol, Symbol):
+            symbol = symbol.symbol
+        symbol = self.grammar.symbols.get(symbol)
+        return self.masks.get(symbol, 0)
+
+    def contains(self, symbol: Union[str, Symbol], start: int, stop: int) -> bool:
+        """Whether the head derives `sentence[start:stop]`."""
+        if not 0 <= start < stop <= len(self.chart):
+            return False
+        return bool(self.chart.get_mask(start, stop - 1) & self._mask(symbol))
+
+    def symbols(self, start: int, stop: int) -> Set[Symbol]:
+        """Get the heads that derive `sentence[start:stop]`.
+
+        :param start: The start of the span.
+        :param stop: The stop of the span (exclusive).
+        :return: The heads of the original grammar.
+        """
+        if not 0 <= start < stop <= len(self.chart):
+            return set()
+        cell = self.chart.get_mask(start, stop - 1)
+        return {head for head, mask in self.masks.items() if cell & mask}
+
+    def spans(self, symbol: Union[str, Symbol]) -> List[Tuple[int, int]]:
+        """Get all the spans derived by the head.
+
+        :param symbol: The head or its name.
+        :return: The (start, stop) pairs sorted by the starts and then the stops.
+        """
+        mask, n = self._mask(symbol), len(self.chart)
+        if mask == 0:
+            return []
+        cells = self.chart.cells
+        return sorted((i, j + 1) for j in range(n) for i in range(j + 1) if cells[j * (j + 1) // 2 + i] & mask)
+
+    def maximal_spans(self, symbol: Union[str, Symbol]) -> List[Tuple[int, int]]:
+        """Get the spans derived by the head that are not inside a longer one derived by the same head.
+
+        :param symbol: The head or its name.
+        :return: The (start, stop) pairs sorted by the starts.
+        """
+        maximal, furthest = [], 0
+        for start, stop in sorted(self.spans(symbol), key=lambda span: (span[0], -span[1])):
+            if stop > furthest:
+                maximal.append((start, stop))
+                furthest = stop
+        return maximal
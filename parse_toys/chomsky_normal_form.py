@@ -4,7 +4,29 @@ from collections import deque
 
 from parse_toys.grammar import Symbol, Grammar
 
-__all__ = ['eliminate_epsilon_rules', 'eliminate_unit_rules', 'to_chomsky_normal_form']
+__all__ = ['eliminate_epsilon_rules', 'eliminate_unit_rules', 'merge_equivalent_heads', 'to_chomsky_normal_form']
+
+
+def _epsilon_weights(grammar: Grammar) -> Dict[Symbol, float]:
+    """Find the largest weight of deriving ε from each nullable symbol.
+
+    :param grammar: The grammar with nullables calculated.
+    :return: The weights.
+    """
+    weights: Dict[Symbol, float] = {grammar.empty_symbol: 1.0}
+    for _ in range(len(grammar.productions) + 1):
+        has_update = False
+        for head, productions in grammar.productions.items():
+            for production, weight in productions.weighted():
+                if all(symbol in weights for symbol in production):
+                    for symbol in production:
+                        weight *= weights[symbol]
+                    if weight > weights.get(head, -1.0):
+                        weights[head] = weight
+                        has_update = True
+        if not has_update:
+            break
+    return weights
 
 
 def eliminate_epsilon_rules(grammar: Grammar,
@@ -22,6 +44,7 @@ def eliminate_epsilon_rules(grammar: Grammar,
     if init_nullable:
         grammar.init_nullable()
     head_mapping: Dict[Symbol, Symbol] = {}
+    epsilon_weights = _epsilon_weights(grammar)
     # Create new productions without epsilon
     heads = list(grammar.productions.keys())
     for head in heads:
@@ -29,26 +52,28 @@ def eliminate_epsilon_rules(grammar: Grammar,
         if any([any(map(lambda x: x.nullable, production)) for production in productions]):
             new_head = grammar.create_aux(head)
             new_head.nullable = False
-            for production in productions:
+            for production, weight in productions.weighted():
                 if any([symbol.nullable for symbol in production]):
-                    new_productions = [[]]
+                    new_productions, new_weights = [[]], [weight]
                     for symbol in production:
                         if symbol.nullable:
                             dup_productions = [copy.copy(prod) for prod in new_productions]
                             for prod in dup_productions:
                                 prod.append(symbol)
+                            # The symbol derives ε in the productions that do not contain it
+                            new_weights = [w * epsilon_weights.get(symbol, 1.0) for w in new_weights] + new_weights
                             new_productions.extend(dup_productions)
                         else:
                             for prod in new_productions:
                                 prod.append(symbol)
-                    for new_production in new_productions:
+                    for new_production, new_weight in zip(new_productions, new_weights):
                         if len(new_production) == 0:
                             continue
                         if len(new_production) == 1 and new_production[0] == grammar.empty_symbol:
                             continue
-                        grammar.add_production(new_head, new_production)
+                        grammar.add_production(new_head, new_production, new_weight)
                 else:
-                    grammar.add_production(new_head, production)
+                    grammar.add_production(new_head, production, weight)
             head_mapping[head] = new_head
     # Replace symbols with new ones
     heads = list(grammar.productions.keys())
@@ -63,13 +88,13 @@ def eliminate_epsilon_rules(grammar: Grammar,
         grammar.remove(head)
         if head in head_mapping:
             continue
-        for production in productions:
+        for production, weight in productions.weighted():
             if any([head_mapping.get(symbol, symbol) != head and symbol in heads
                     and head_mapping.get(symbol, symbol) not in grammar.productions
                     for symbol in production]):
                 # The production will be left out if some of the symbols can only derive ε.
                 continue
-            grammar.add_production(head, [head_mapping.get(symbol, symbol) for symbol in production])
+            grammar.add_production(head, [head_mapping.get(symbol, symbol) for symbol in production], weight)
         if head not in grammar.productions:
             # This symbol can only derive ε.
             for symbol in grammar.composes.get(head, ()):
@@ -82,7 +107,7 @@ def eliminate_epsilon_rules(grammar: Grammar,
         old_start = grammar.start
         grammar.start = head_mapping[grammar.start]
         if old_start.nullable:
-            grammar.add_production(grammar.start, [grammar.empty_symbol])
+            grammar.add_production(grammar.start, [grammar.empty_symbol], epsilon_weights.get(old_start, 1.0))
             grammar.start.nullable = True
     results = grammar
     if return_mapping:
@@ -107,23 +132,23 @@ def eliminate_unit_rules(grammar: Grammar):
         productions = grammar.productions[head]
         has_update = False
         new_productions = []
-        for production in productions:
+        for production, weight in productions.weighted():
             if len(production) == 1 and production[0] != head and grammar.is_non_terminal(production[0]):
                 sub_productions = grammar.productions[production[0]]
                 has_sub_loop = False
-                for sub_production in sub_productions:
+                for sub_production, sub_weight in sub_productions.weighted():
                     if len(sub_production) == 1 and sub_production[0] == production[0]:
                         has_sub_loop = True
-                    new_productions.append(sub_production)
-                    has_update |= grammar.add_production(head, sub_production)
+                    new_productions.append((sub_production, weight * sub_weight))
+                    has_update |= grammar.add_production(head, sub_production, weight * sub_weight)
                 if not has_sub_loop:
                     # If A -> B and there is no B -> B, then A -> B must be removed in this production.
                     has_update = True
             else:
-                new_productions.append(production)
+                new_productions.append((production, weight))
         grammar.clean(head)
-        for production in new_productions:
-            grammar.add_production(head, production)
+        for production, weight in new_productions:
+            grammar.add_production(head, production, weight)
         if has_update:
             for symbol in grammar.composes.get(head, ()):
                 if symbol in grammar.productions and symbol not in in_queue:
@@ -132,17 +157,77 @@ def eliminate_unit_rules(grammar: Grammar):
     return grammar
 
 
+def merge_equivalent_heads(grammar: Grammar, return_mapping: bool = False):
+    """Merge the heads that have the same productions if the equivalent heads are renamed to the same symbol.
+
+    The heads are first assumed to be equivalent, then the classes are split by the productions
+    until every head in a class has the same productions in terms of the classes.
+
+    :param grammar: The old grammar.
+    :param return_mapping: Whether to return the mapping from the merged heads to the kept ones.
+    :return: The new grammar.
+    """
+    grammar = grammar.clone()
+    heads = list(grammar.productions.keys())
+    classes: Dict[Symbol, int] = {head: 0 for head in heads}
+    count = 1
+    while True:
+        signatures: Dict[Tuple, int] = {}
+        new_classes: Dict[Symbol, int] = {}
+        for head in heads:
+            productions = frozenset(
+                (tuple(classes[symbol] if symbol in classes else symbol.symbol for symbol in production), weight)
+                for production, weight in grammar.productions[head].weighted())
+            new_classes[head] = signatures.setdefault((classes[head], productions), len(signatures))
+        classes = new_classes
+        if len(signatures) == count:
+            break
+        count = len(signatures)
+    # The start symbol and the heads that appear first are kept
+    kept: Dict[int, Symbol] = {}
+    if grammar.start in classes:
+        kept[classes[grammar.start]] = grammar.start
+    for head in heads:
+        kept.setdefault(classes[head], head)
+    head_mapping = {head: kept[classes[head]] for head in heads if kept[classes[head]] != head}
+    if len(head_mapping) > 0:
+        for head in heads:
+            productions = grammar.productions[head]
+            if head in head_mapping:
+                grammar.remove(head)
+                continue
+            grammar.clean(head)
+            for production, weight in productions.weighted():
+                grammar.add_production(head, [head_mapping.get(symbol, symbol) for symbol in production], weight)
+        grammar._rebuild_composes()
+    results = grammar
+    if return_mapping:
+        results = (grammar, head_mapping)
+    return results
+
+
 def to_chomsky_normal_form(grammar: Grammar,
                            return_mapping: bool = False,
-                           remove_unreachable: bool = True):
+                           remove_unreachable: bool = True,
+                           remove_unproductive: bool = True,
+                           merge_equivalent: bool = True):
     """Transform the grammar into Chomsky Normal Form.
     The grammar will have no ε-rules (except the start) or unit-rules.
 
     :param grammar: The old grammar.
     :param return_mapping: Whether to return the mapping of heads.
     :param remove_unreachable: Whether to remove unreachable productions.
+    :param remove_unproductive: Whether to remove the heads that can not derive any terminal string first.
+    :param merge_equivalent: Whether to merge the heads that derive the same strings in the same ways.
     :return: The new grammar.
     """
+    if remove_unproductive:
+        grammar = grammar.clone()
+        grammar.remove_unproductive()
+        if grammar.is_non_terminal(grammar.start) and len(grammar.productions[grammar.start]) == 0:
+            # The language is empty, the other heads can not be reached
+            grammar.remove_unreachable()
+            return (grammar, {}) if return_mapping else grammar
     grammar = eliminate_epsilon_rules(grammar, return_mapping=return_mapping)
     if return_mapping:
         grammar, head_mapping = grammar
@@ -156,7 +241,7 @@ def to_chomsky_normal_form(grammar: Grammar,
     duals: Dict[Tuple[Symbol, Symbol], Symbol] = {}
     for head in heads:
         productions = grammar.productions[head]
-        if len(productions) == 1:
+        if len(productions) == 1 and productions.weights[0] == 1.0:
             production = productions[0]
             if len(production) == 1:
                 if grammar.is_terminal(production[0]):
@@ -187,15 +272,24 @@ def to_chomsky_normal_form(grammar: Grammar,
     for head in heads:
         productions = grammar.productions[head]
         grammar.clean(head)
-        for production in productions:
+        for production, weight in productions.weighted():
             if len(production) == 1:
-                grammar.add_production(head, production)
+                grammar.add_production(head, production, weight)
             else:
                 last = _get_or_create_single(production[0])
                 for i in range(1, len(production) - 1):
                     current = _get_or_create_single(production[i])
                     last = _get_or_create_dual(last, current)
-                grammar.add_production(head, [last, _get_or_create_single(production[-1])])
+                grammar.add_production(head, [last, _get_or_create_single(production[-1])], weight)
+    if merge_equivalent:
+        grammar, merged = merge_equivalent_heads(grammar, return_mapping=True)
+        if return_mapping:
+            # The original heads that are not renamed could be merged as well
+            for head, new_head in list(head_mapping.items()):
+                head_mapping[head] = merged.get(new_head, new_head)
+            for head, new_head in merged.items():
+                if not head.auxiliary:
+                    head_mapping.setdefault(head, new_head)
     results = grammar
     if return_mapping:
         results = (grammar, head_mapping)
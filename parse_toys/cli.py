@@ -0,0 +1,186 @@
+import os
+import sys
+import json
+import mmap
+import time
+import argparse
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Iterator, List, Optional, Sequence
+
+from parse_toys.grammar import Grammar
+from parse_toys.unger import parse_with_unger
+from parse_toys.cyk import parse_with_cyk
+from parse_toys.viterbi import parse_with_viterbi
+from parse_toys.codegen import compile_cyk, compile_unger
+
+__all__ = ['main']
+
+ENGINES = ['cyk', 'unger', 'viterbi', 'compiled-cyk', 'compiled-unger']
+
+# The parser in a worker process
+_PARSER: List[Callable[[str], Any]] = []
+
+
+def _create_parser(text: str, engine: str, cache_dir: Optional[str]) -> Callable[[str], Any]:
+    grammar = Grammar()
+    grammar.parse(text)
+    if engine == 'cyk':
+        return lambda sentence: parse_with_cyk(grammar, sentence)
+    if engine == 'unger':
+        return lambda sentence: parse_with_unger(grammar, sentence)
+    if engine == 'viterbi':
+        return lambda sentence: parse_with_viterbi(grammar, sentence)
+    if engine == 'compiled-cyk':
+        return compile_cyk(grammar, cache_dir=cache_dir)
+    return compile_unger(grammar, cache_dir=cache_dir)
+
+
+def _init_worker(text: str, engine: str, cache_dir: Optional[str]):
+    _PARSER[:] = [_create_parser(text, engine, cache_dir)]
+
+
+def _parse_chunk(sentences: List[str]) -> list:
+    parser = _PARSER[0]
+    return [parser(sentence) for sentence in sentences]
+
+
+def _read_lines(path: str, use_mmap: bool) -> Iterator[bytes]:
+    """Read the lines one by one without loading the whole file."""
+    if path == '-':
+        yield from sys.stdin.buffer
+        return
+    with open(path, 'rb') as reader:
+        if use_mmap and os.fstat(reader.fileno()).st_size > 0:
+            with mmap.mmap(reader.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                yield from iter(mapped.readline, b'')
+        else:
+            yield from reader
+
+
+def _read_chunks(lines: Iterator[bytes], chunk_size: int) -> Iterator[List[str]]:
+    chunk = []
+    for line in lines:
+        chunk.append(line.decode('utf8').rstrip('\r\n'))
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
+    if len(chunk) > 0:
+        yield chunk
+
+
+def _parse_chunks(chunks: Iterator[List[str]], text: str, engine: str, workers: int, cache_dir: Optional[str]):
+    """Parse the chunks in order, at most two chunks per worker are read ahead."""
+    if workers <= 1:
+        parser = _create_parser(text, engine, cache_dir)
+        for chunk in chunks:
+            yield chunk, [parser(sentence) for sentence in chunk]
+        return
+    if engine.startswith('compiled-'):
+        # Generate the modules once, the workers only load them from the cache
+        _create_parser(text, engine, cache_dir)
+    with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(text, engine, cache_dir)) as executor:
+        pending = deque()
+        for chunk in chunks:
+            pending.append((chunk, executor.submit(_parse_chunk, chunk)))
+            if len(pending) >= workers * 2:
+                chunk, future = pending.popleft()
+                yield chunk, future.result()
+        while len(pending) > 0:
+            chunk, future = pending.popleft()
+            yield chunk, future.result()
+
+
+def _parse_command(args):
+    with open(args.grammar, 'r', encoding='utf8') as reader:
+        text = reader.read()
+    writer = sys.stdout if args.output == '-' else open(args.output, 'w', encoding='utf8')
+    start_time = time.perf_counter()
+    total, accepted, total_bytes = 0, 0, 0
+    try:
+        chunks = _read_chunks(_read_lines(args.input, args.mmap), args.chunk_size)
+        for chunk, trees in _parse_chunks(chunks, text, args.engine, args.workers, args.cache_dir):
+            lines = []
+            for sentence, tree in zip(chunk, trees):
+                total += 1
+                total_bytes += len(sentence.encode('utf8')) + 1
+                if tree is not None:
+                    accepted += 1
+                if args.format == 'flags':
+                    lines.append('accept' if tree is not None else 'reject')
+                else:
+                    lines.append(json.dumps({'line': total, 'accepted': tree is not None, 'tree': tree},
+                                            ensure_ascii=False))
+            writer.write('\n'.join(lines) + '\n')
+    finally:
+        if writer is not sys.stdout:
+            writer.close()
+    if not args.quiet:
+        seconds = max(time.perf_counter() - start_time, 1e-9)
+        sys.stderr.write(f'lines: {total}, accepted: {accepted}, rejected: {total - accepted}, '
+                         f'seconds: {seconds:.3f}, lines/s: {total / seconds:.1f}, '
+                         f'MB/s: {total_bytes / seconds / 1e6:.3f}\n')
+    return 0
+
+
+def _serve_command(args):
+    from parse_toys.service import serve
+
+    grammars = {}
+    for path in args.grammar:
+        with open(path, 'r', encoding='utf8') as reader:
+            grammars[os.path.splitext(os.path.basename(path))[0]] = reader.read()
+    try:
+        serve(grammars,
+              method=args.engine,
+              host=args.host,
+              port=args.port,
+              path=args.socket,
+              workers=args.workers,
+              batch_size=args.batch_size,
+              max_queue=args.max_queue,
+              timeout=args.timeout,
+              cache_dir=args.cache_dir)
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """The entry of `python -m parse_toys` and `parse-toys`.
+
+    :param argv: The arguments, `sys.argv[1:]` is used if it is None.
+    :return: The exit code.
+    """
+    parser = argparse.ArgumentParser(prog='parse-toys', description='Parsing toys')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    parse_parser = commands.add_parser('parse', help='Parse every line of a file')
+    parse_parser.add_argument('grammar', help='The path of the grammar')
+    parse_parser.add_argument('input', help='The path of the sentences, one per line, `-` for stdin')
+    parse_parser.add_argument('-o', '--output', default='-', help='The path of the results, `-` for stdout')
+    parse_parser.add_argument('-e', '--engine', choices=ENGINES, default='cyk', help='The parsing method')
+    parse_parser.add_argument('-w', '--workers', type=int, default=1, help='The number of processes')
+    parse_parser.add_argument('-f', '--format', choices=['json', 'flags'], default='json',
+                              help='JSON lines with the trees, or accept/reject only')
+    parse_parser.add_argument('--chunk-size', type=int, default=256, help='The number of lines sent to a worker')
+    parse_parser.add_argument('--mmap', action='store_true', help='Read the input through memory mapping')
+    parse_parser.add_argument('--cache-dir', default=None, help='The directory of the generated modules')
+    parse_parser.add_argument('-q', '--quiet', action='store_true', help='Do not report the statistics')
+    parse_parser.set_defaults(function=_parse_command)
+
+    serve_parser = commands.add_parser('serve', help='Run the local parsing service')
+    serve_parser.add_argument('grammar', nargs='+', help='The paths of the grammars, named by their file names')
+    serve_parser.add_argument('-e', '--engine', choices=['cyk', 'unger'], default='cyk', help='The parsing method')
+    serve_parser.add_argument('--host', default='127.0.0.1', help='The loopback address')
+    serve_parser.add_argument('--port', type=int, default=8765, help='The TCP port')
+    serve_parser.add_argument('--socket', default=None, help='The path of the Unix socket')
+    serve_parser.add_argument('-w', '--workers', type=int, default=1, help='The number of processes')
+    serve_parser.add_argument('--batch-size', type=int, default=32, help='The maximum size of a batch')
+    serve_parser.add_argument('--max-queue', type=int, default=1024, help='The maximum number of waiting requests')
+    serve_parser.add_argument('--timeout', type=float, default=10.0, help='The seconds before a request fails')
+    serve_parser.add_argument('--cache-dir', default=None, help='The directory of the generated modules')
+    serve_parser.set_defaults(function=_serve_command)
+
+    args = parser.parse_args(argv)
+    return args.function(args)
@@ -0,0 +1,280 @@
+import os
+import hashlib
+import importlib.util
+from typing import Dict, List, Optional, Tuple
+
+from parse_toys.grammar import Epsilon, Grammar
+from parse_toys.chomsky_normal_form import to_chomsky_normal_form
+from parse_toys.chart import CYKChart
+from parse_toys.cyk import _compile_rules, _reconstruct
+from parse_toys.budget import ParseBudget
+
+__all__ = ['compile_cyk', 'compile_unger', 'CompiledCYK', 'CompiledUnger']
+
+# Change this when the generated code changes, so that the old files in the cache are not loaded
+GENERATOR_VERSION = 3
+
+
+def _default_cache_dir() -> str:
+    return os.environ.get('PARSE_TOYS_CACHE', os.path.join(os.path.expanduser('~'), '.cache', 'parse_toys'))
+
+
+def _load_module(kind: str, signature: str, generate, cache_dir: Optional[str]):
+    """Load a generated module from the cache, generate it if it does not exist.
+
+    :param kind: The kind of the parser.
+    :param signature: The text that identifies the generated code.
+    :param generate: The function that returns the source code.
+    :param cache_dir: The directory of the cached modules, the default one is used if it is None.
+    :return: The module.
+    """
+    if cache_dir is None:
+        cache_dir = _default_cache_dir()
+    digest = hashlib.sha256(f'{kind}\n{GENERATOR_VERSION}\n{signature}'.encode('utf8')).hexdigest()[:32]
+    name = f'{kind}_{digest}'
+    path = os.path.join(cache_dir, f'{name}.py')
+    if not os.path.exists(path):
+        os.makedirs(cache_dir, exist_ok=True)
+        temp_path = f'{path}.{os.getpid()}.tmp'
+        with open(temp_path, 'w', encoding='utf8') as writer:
+            writer.write(generate())
+        os.replace(temp_path, path)
+    spec = importlib.util.spec_from_file_location(f'parse_toys_generated_{name}', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _generate_cyk(terminal_masks: Dict[str, int], binary_rules: List[Tuple[int, int, int]]) -> str:
+    # Group the rules by the left symbol, then merge the heads that share the same right symbol
+    groups: Dict[int, Dict[int, int]] = {}
+    for head_mask, left_mask, right_mask in binary_rules:
+        rights = groups.setdefault(left_mask, {})
+        rights[right_mask] = rights.get(right_mask, 0) | head_mask
+    lines = [
+        '# Generated by parse_toys.codegen, do not edit.',
+        f'TERMINALS = {terminal_masks!r}',
+        '',
+        '',
+        'def recognize(sentence, chart, budget=None):',
+        '    cells = chart.cells',
+        '    terminal = TERMINALS.get',
+        '    for j in range(len(sentence)):',
+        '        chart.append_column()',
+        '        base = j * (j + 1) // 2',
+        '        cells[base + j] = terminal(sentence[j], 0)',
+        '        if budget is not None:',
+        '            budget.memo(len(cells))',
+        '        for i in range(j - 1, -1, -1):',
+        '            if budget is not None:',
+        '                budget.step(j - i)',
+        '            m = 0',
+        '            for k in range(i, j):',
+        '                l = cells[k * (k + 1) // 2 + i]',
+        '                if not l:',
+        '                    continue',
+        '                r = cells[base + k + 1]',
+        '                if not r:',
+        '                    continue',
+    ]
+    for left_mask, rights in groups.items():
+        lines.append(f'                if l & {left_mask}:')
+        for right_mask, head_mask in rights.items():
+            lines.append(f'                    if r & {right_mask}:')
+            lines.append(f'                        m |= {head_mask}')
+    lines += [
+        '            cells[base + i] = m',
+        '    return chart',
+        '',
+    ]
+    return '\n'.join(lines)
+
+
+class CompiledCYK(object):
+
+    def __init__(self, grammar: Grammar, cache_dir: Optional[str] = None):
+        """Generate the recognition code specialized for a grammar.
+
+        :param grammar: The grammar, later changes to it do not affect the compiled parser.
+        :param cache_dir: The directory of the generated modules.
+        """
+        self.grammar = grammar.clone()
+        self.grammar.remove_useless()
+        self.grammar.init_nullable()
+        self.grammar.init_last()
+        self.grammar.init_follow()
+        self.cnf_grammar, self.head_mapping = to_chomsky_normal_form(
+            self.grammar,
+            return_mapping=True,
+            remove_unreachable=False,
+            remove_unproductive=False)
+        self.symbols = list(self.cnf_grammar.productions.keys())
+        terminal_masks, binary_rules = _compile_rules(self.cnf_grammar, CYKChart(self.symbols))
+        signature = '\n'.join([' '.join(map(repr, self.symbols)), str(self.cnf_grammar)])
+        self.module = _load_module('cyk', signature, lambda: _generate_cyk(terminal_masks, binary_rules), cache_dir)
+
+    def recognize(self, sentence: str, budget: Optional[ParseBudget] = None) -> CYKChart:
+        return self.module.recognize(sentence, CYKChart(self.symbols), budget)
+
+    def __call__(self, sentence: str, budget: Optional[ParseBudget] = None):
+        """Parse the sentence.
+
+        :param sentence: The sentence to be parsed.
+        :param budget: The limits of the parse, checked for every cell of the table.
+        :return: The parsed tree in the format of `parse_with_cyk`, None if the sentence can not be derived.
+        """
+        if budget is not None:
+            budget.start()
+        root = _reconstruct(self.grammar, self.head_mapping, self.recognize(sentence, budget), sentence, budget)
+        if root is None:
+            return None
+        return root.to_cyk_tuple()
+
+
+def _generate_unger(grammar: Grammar) -> str:
+    heads = list(grammar.productions.keys())
+    indices = {head: index for index, head in enumerate(heads)}
+    boundaries = grammar.boundary_characters()
+    lines = ['# Generated by parse_toys.codegen, do not edit.']
+    for head in heads:
+        firsts, lasts, follows = boundaries[head]
+        lines.append(f'F{indices[head]}, L{indices[head]}, W{indices[head]} = '
+                     f'frozenset({sorted(firsts)!r}), frozenset({sorted(lasts)!r}), frozenset({sorted(follows)!r})')
+    lines += [
+        '',
+        '',
+        'def parse(sentence, budget=None):',
+        '    history = {}',
+        '    match = sentence.startswith',
+    ]
+    for head in heads:
+        index = indices[head]
+        lines += [
+            '',
+            f'    def p{index}(start, stop):',
+            f'        # {head}',
+            f'        key = ({index}, start, stop)',
+            '        if budget is not None:',
+            '            budget.step()',
+            '        if key in history:',
+            '            return history[key]',
+            '        history[key] = None',
+            '        if budget is not None:',
+            '            budget.memo(len(history))',
+            f'        if start < stop and (sentence[start] not in F{index} or sentence[stop - 1] not in L{index}):',
+            '            return None',
+            f'        if sentence[stop:stop + 1] not in W{index}:',
+            '            return None',
+        ]
+        for production in grammar.productions[head]:
+            # The minimal and maximal lengths of every part of the division
+            bounds = []
+            for symbol in production:
+                if isinstance(symbol, Epsilon):
+                    bounds.append((0, 0))
+                elif grammar.is_terminal(symbol):
+                    bounds.append((len(str(symbol)), len(str(symbol))))
+                else:
+                    low = symbol.min_length
+                    if not symbol.nullable:
+                        low = max(low, 1)
+                    bounds.append((low, None))
+            if any(low >= 1e100 for low, _ in bounds):
+                continue
+            label = ' '.join(map(str, production))
+            lines.append(f'        # {label}')
+            indent = ' ' * 8
+            for i, symbol in enumerate(production):
+                low, high = bounds[i]
+                left = 'start' if i == 0 else f'b{i - 1}'
+                rest = sum(bound[0] for bound in bounds[i + 1:])
+                last = i + 1 == len(production)
+                right = 'stop' if last else f'b{i}'
+                if not last:
+                    if high is not None:
+                        lines.append(f'{indent}b{i} = {left} + {high}')
+                        lines.append(f'{indent}if b{i} <= stop - {rest}:')
+                    else:
+                        lines.append(f'{indent}for b{i} in range({left} + {low}, stop - {rest} + 1):')
+                    indent += ' ' * 4
+                elif high is not None:
+                    lines.append(f'{indent}if stop - {left} == {high}:')
+                    indent += ' ' * 4
+                else:
+                    lines.append(f'{indent}if stop - {left} >= {low}:')
+                    indent += ' ' * 4
+                if isinstance(symbol, Epsilon):
+                    lines.append(f'{indent}r{i} = {str(symbol)!r}')
+                elif grammar.is_terminal(symbol):
+                    lines.append(f'{indent}r{i} = {str(symbol)!r} if match({str(symbol)!r}, {left}) else None')
+                else:
+                    lines.append(f'{indent}r{i} = p{indices[symbol]}({left}, {right})')
+                lines.append(f'{indent}if r{i} is not None:')
+                indent += ' ' * 4
+            results = ', '.join([repr(label)] + [f'r{i}' for i in range(len(production))])
+            lines.append(f'{indent}history[key] = ({results})')
+            lines.append(f'{indent}return history[key]')
+        lines.append('        return None')
+    if grammar.start in indices:
+        lines += ['', f'    return p{indices[grammar.start]}(0, len(sentence))', '']
+    else:
+        lines += ['', f'    return {str(grammar.start)!r} if sentence == {str(grammar.start)!r} else None', '']
+    return '\n'.join(lines)
+
+
+class CompiledUnger(object):
+
+    def __init__(self, grammar: Grammar, cache_dir: Optional[str] = None):
+        """Generate the Unger parser specialized for a grammar.
+
+        Every production becomes nested loops over its divisions,
+        with the length bounds of the symbols written as constants.
+
+        :param grammar: The grammar, later changes to it do not affect the compiled parser.
+        :param cache_dir: The directory of the generated modules.
+        """
+        self.grammar = grammar.clone()
+        self.grammar.remove_useless()
+        self.grammar.init_nullable()
+        self.grammar.init_min_length()
+        self.grammar.init_last()
+        self.grammar.init_follow()
+        signature = '\n'.join([
+            ' '.join(map(repr, self.grammar.productions.keys())),
+            str(self.grammar),
+            ' '.join(f'{symbol!r}:{symbol.nullable}:{symbol.min_length}' for symbol in self.grammar.symbols.values()),
+        ])
+        self.module = _load_module('unger', signature, lambda: _generate_unger(self.grammar), cache_dir)
+
+    def __call__(self, sentence: str, budget: Optional[ParseBudget] = None):
+        """Parse the sentence.
+
+        :param sentence: The sentence to be parsed.
+        :param budget: The limits of the parse, a step is a span tried for a head.
+        :return: The parsed tree in the format of `parse_with_unger`, None if the sentence can not be derived.
+        """
+        if budget is not None:
+            budget.start()
+        return self.module.parse(sentence, budget)
+
+
+def compile_cyk(grammar: Grammar, cache_dir: Optional[str] = None) -> CompiledCYK:
+    """Generate a CYK parser specialized for the grammar.
+
+    :param grammar: The grammar.
+    :param cache_dir: The directory of the generated modules,
+        `$PARSE_TOYS_CACHE` or `~/.cache/parse_toys` is used by default.
+    :return: A callable that gives the same results as `parse_with_cyk`.
+    """
+    return CompiledCYK(grammar, cache_dir=cache_dir)
+
+
+def compile_unger(grammar: Grammar, cache_dir: Optional[str] = None) -> CompiledUnger:
+    """Generate an Unger parser specialized for the grammar.
+
+    :param grammar: The grammar.
+    :param cache_dir: The directory of the generated modules,
+        `$PARSE_TOYS_CACHE` or `~/.cache/parse_toys` is used by default.
+    :return: A callable that gives the same results as `parse_with_unger`.
+    """
+    return CompiledUnger(grammar, cache_dir=cache_dir)
@@ -0,0 +1,94 @@
+import math
+from typing import Dict, Optional, Sequence, Tuple, Union
+
+from parse_toys.grammar import Symbol, Grammar
+from parse_toys.cyk import _prepare, _recognize
+from parse_toys.tokens import _as_sentence
+
+__all__ = ['count_parses']
+
+# Marks the spans whose counts are being calculated
+_IN_PROGRESS = object()
+
+
+def count_parses(grammar: Grammar,
+                 sentence: Union[str, Sequence],
+                 cap: Optional[int] = None,
+                 remove_useless: bool = True) -> Union[int, float]:
+    """Count the parsed trees of the sentence in the original grammar without enumerating them.
+
+    The CYK table of the grammar in Chomsky Normal Form tells whether a symbol derives a span,
+    then the numbers of trees are summed over the productions and the divisions of the spans
+    that can be derived. The time is polynomial, the numbers are arbitrary-precision integers.
+
+    :param grammar: The grammar.
+    :param sentence: The sentence, or the tokens in a sequence or a `TokenSequence`.
+    :param cap: The finite counts larger than this are replaced by it, so the result is `cap` if there are
+        at least `cap` trees but finitely many. The infinite counts of the cycles are kept as `math.inf`.
+    :param remove_useless: Whether to count with the grammar that has no unproductive or unreachable heads,
+        the result is the same.
+    :return: The number of trees, `math.inf` if a cycle (like A -> A) can be used infinitely in a derivation,
+        whether `cap` is set or not.
+    """
+    sentence = _as_sentence(sentence)
+    grammar, cnf_grammar, head_mapping = _prepare(grammar, remove_useless)
+    chart = _recognize(cnf_grammar, sentence)
+    history: Dict[Tuple, object] = {}
+
+    def _cap(count):
+        if cap is not None and count != math.inf and count > cap:
+            return cap
+        return count
+
+    def _derives(symbol: Symbol, start: int, stop: int) -> bool:
+        if start == stop:
+            return symbol.nullable is True
+        if grammar.is_terminal(symbol):
+            return symbol.symbol == sentence[start:stop]
+        return chart.contains(start, stop - 1, head_mapping.get(symbol, symbol))
+
+    def _count_production(production: Sequence[Symbol], index: int, start: int, stop: int):
+        if index == len(production):
+            return 1 if start == stop else 0
+        key = (production, index, start, stop)
+        if key in history:
+            return history[key]
+        symbol, total = production[index], 0
+        for mid in range(start, stop + 1):
+            if not _derives(symbol, start, mid):
+                continue
+            # The rest is counted first, so the symbol is only counted if both parts are positive
+            rest = _count_production(production, index + 1, mid, stop)
+            if rest == 0:
+                continue
+            first = _count_symbol(symbol, start, mid)
+            if first == math.inf or rest == math.inf:
+                total = math.inf
+            elif total != math.inf:
+                total = _cap(total + first * rest)
+        history[key] = total
+        return total
+
+    def _count_symbol(symbol: Symbol, start: int, stop: int):
+        if grammar.is_terminal(symbol):
+            return 1
+        key = (symbol, start, stop)
+        if key in history:
+            if history[key] is _IN_PROGRESS:
+                # The span derives itself through a cycle whose other parts can all be derived
+                return math.inf
+            return history[key]
+        history[key] = _IN_PROGRESS
+        total = 0
+        for production in grammar.productions[symbol]:
+            count = _count_production(production, 0, start, stop)
+            if count == math.inf:
+                total = math.inf
+                break
+            total = _cap(total + count)
+        history[key] = total
+        return total
+
+    if not _derives(grammar.start, 0, len(sentence)):
+        return 0
+    return _count_symbol(grammar.start, 0, len(sentence))
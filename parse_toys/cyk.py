@@ -1,49 +1,372 @@
-from typing import Dict, Optional, Tuple, Union, Sequence
+import atexit
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing.shared_memory import SharedMemory
+from typing import Dict, List, Optional, Tuple, Sequence, Union
 
 from parse_toys.grammar import Symbol, Epsilon, Grammar
 from parse_toys.chomsky_normal_form import to_chomsky_normal_form
+from parse_toys.chart import CYKChart, ParseChart
+from parse_toys.deterministic import get_deterministic_parser
+from parse_toys.tree import ParseNode
+from parse_toys.budget import ParseBudget
+from parse_toys.tokens import _as_sentence
 
-__all__ = ['parse_with_cyk']
+__all__ = ['parse_with_cyk', 'parse_batch_with_cyk', 'recognize_with_cyk', 'PARALLEL_THRESHOLD']
 
+# The shortest sentence recognized by the processes by default. With a warm pool of 2 workers on one core,
+# the expression grammar of the README took 26ms instead of 58ms for n = 128, and 0.47s instead of 1.38s
+# for n = 321, the tiles need less indexing than the sequential columns. Shorter sentences have few tiles to share.
+PARALLEL_THRESHOLD = 128
 
-def parse_with_cyk(grammar: Grammar, sentence: str):
-    grammar.init_nullable()
-    cnf_grammar, head_mapping = to_chomsky_normal_form(
-        grammar,
-        return_mapping=True,
-        remove_unreachable=False)
+
+def _compile_rules(cnf_grammar: Grammar, chart: CYKChart):
+    """Collect the rules of a grammar in Chomsky Normal Form as bit masks of the chart.
+
+    :param cnf_grammar: The grammar in Chomsky Normal Form.
+    :param chart: The chart whose symbols define the bits.
+    :return: The heads deriving each terminal, and the (head, left, right) masks of the binary rules.
+    """
+    terminal_masks: Dict[str, int] = {}
+    binary_rules: List[Tuple[int, int, int]] = []
+    for head, productions in cnf_grammar.productions.items():
+        head_mask = chart.symbol_mask(head)
+        for production in productions:
+            if len(production) == 1:
+                if cnf_grammar.is_terminal(production[0]) and not isinstance(production[0], Epsilon):
+                    key = production[0].symbol
+                    terminal_masks[key] = terminal_masks.get(key, 0) | head_mask
+            elif len(production) == 2:
+                binary_rules.append((head_mask, chart.symbol_mask(production[0]), chart.symbol_mask(production[1])))
+    return terminal_masks, binary_rules
+
+
+def _combine(binary_rules: List[Tuple[int, int, int]], left: int, right: int) -> int:
+    mask = 0
+    for head_mask, left_mask, right_mask in binary_rules:
+        if left & left_mask and right & right_mask:
+            mask |= head_mask
+    return mask
+
+
+def _boundary_masks(cnf_grammar: Grammar, chart: CYKChart) -> Tuple[Dict[str, int], Dict[str, int]]:
+    """Collect the heads that can begin or end with each token, a terminal of CYK always matches one token.
+
+    :param cnf_grammar: The grammar in Chomsky Normal Form.
+    :param chart: The chart whose symbols define the bits.
+    :return: The masks of the heads beginning with the tokens, and the masks of the heads ending with them.
+    """
+    cnf_grammar.init_last()
+    cnf_grammar.init_follow()
+    first_masks: Dict[str, int] = {}
+    last_masks: Dict[str, int] = {}
+    for head, (firsts, lasts, _) in cnf_grammar.boundary_characters(whole_terminals=True).items():
+        for char in firsts:
+            first_masks[char] = first_masks.get(char, 0) | chart.symbol_mask(head)
+        for char in lasts:
+            last_masks[char] = last_masks.get(char, 0) | chart.symbol_mask(head)
+    return first_masks, last_masks
+
+
+def _allowed_rules(binary_rules: List[Tuple[int, int, int]],
+                   cache: Dict[int, List[Tuple[int, int, int]]],
+                   allowed: int) -> List[Tuple[int, int, int]]:
+    """Get the rules whose heads are allowed by the boundaries of a span, the lists are cached by the masks."""
+    rules = cache.get(allowed)
+    if rules is None:
+        rules = cache[allowed] = [rule for rule in binary_rules if rule[0] & allowed]
+    return rules
+
+
+def _column_filler(cnf_grammar: Grammar, chart: CYKChart, budget: Optional[ParseBudget] = None):
+    """Create the function that fills a column of the recognition table.
+
+    :param cnf_grammar: The grammar in Chomsky Normal Form.
+    :param chart: The table to be filled.
+    :param budget: The limits checked for every cell.
+    :return: The function that takes the sentence and j, and fills the cells (i, j) from the bottom up.
+        The column only depends on `sentence[:j + 1]` and the columns before it.
+    """
+    terminal_masks, binary_rules = _compile_rules(cnf_grammar, chart)
+    first_masks, last_masks = _boundary_masks(cnf_grammar, chart)
+    # The rules whose heads are allowed by the boundaries of a span
+    allowed_rules: Dict[int, List[Tuple[int, int, int]]] = {}
+
+    def _fill(sentence: Sequence[str], j: int):
+        if budget is not None:
+            budget.memo(len(chart.cells))
+        chart.set_mask(j, j, terminal_masks.get(sentence[j], 0))
+        last_mask = last_masks.get(sentence[j], 0)
+        for i in range(j - 1, -1, -1):
+            allowed = first_masks.get(sentence[i], 0) & last_mask
+            if allowed == 0:
+                continue
+            if budget is not None:
+                budget.step(j - i)
+            rules = _allowed_rules(binary_rules, allowed_rules, allowed)
+            mask = 0
+            for k in range(i, j):
+                left, right = chart.get_mask(i, k), chart.get_mask(k + 1, j)
+                if left and right:
+                    mask |= _combine(rules, left, right)
+            chart.set_mask(i, j, mask)
+
+    return _fill
+
+
+def _recognize(cnf_grammar: Grammar, sentence: str, budget: Optional[ParseBudget] = None) -> CYKChart:
+    """Fill the recognition table of a grammar in Chomsky Normal Form.
+
+    The columns are filled from left to right, and the cells in a column from the bottom up,
+    so a column only depends on the ones before it.
+
+    :param cnf_grammar: The grammar in Chomsky Normal Form.
+    :param sentence: The sentence to be recognized.
+    :param budget: The limits of the recognition.
+    :return: The table, the cell (i, j) contains the heads that derive `sentence[i:j + 1]`.
+    """
+    chart = CYKChart(list(cnf_grammar.productions.keys()))
+    fill = _column_filler(cnf_grammar, chart, budget)
+    for j in range(len(sentence)):
+        chart.append_column()
+        fill(sentence, j)
+    return chart
+
+
+def _recognize_trie(cnf_grammar: Grammar, sentences: Sequence[str], visit, budget: Optional[ParseBudget] = None):
+    """Fill the recognition tables of the sentences along a trie of them.
+
+    The sentences sharing a prefix share the columns of the prefix, the columns of a branch
+    are released when the traversal goes back, so every node of the trie is filled once.
+
+    :param cnf_grammar: The grammar in Chomsky Normal Form.
+    :param sentences: The sentences.
+    :param visit: The function called with the sentence, its indices in `sentences` and the table
+        when the table contains exactly the columns of the sentence.
+    :param budget: The limits of the whole batch.
+    """
+    # Each node of the trie is a pair of the children and the indices of the sentences ending at it
+    root = ({}, [])
+    for index, sentence in enumerate(sentences):
+        node = root
+        for char in sentence:
+            node = node[0].setdefault(char, ({}, []))
+        node[1].append(index)
+    chart = CYKChart(list(cnf_grammar.productions.keys()))
+    fill = _column_filler(cnf_grammar, chart, budget)
+    prefix: List[str] = []
+    if len(root[1]) > 0:
+        visit(sentences[root[1][0]], root[1], chart)
+    stack = [iter(root[0].items())]
+    while len(stack) > 0:
+        for char, (children, indices) in stack[-1]:
+            prefix.append(char)
+            fill(prefix, chart.append_column())
+            if len(indices) > 0:
+                visit(sentences[indices[0]], indices, chart)
+            stack.append(iter(children.items()))
+            break
+        else:
+            stack.pop()
+            if len(prefix) > 0:
+                prefix.pop()
+                chart.pop_column()
+
+
+# The process pools of the parallel recognition by their numbers of workers, with the binary rules
+# that their processes hold. They are reused by the parses of the same grammar.
+_executors: Dict[int, Tuple[List[Tuple[int, int, int]], ProcessPoolExecutor]] = {}
+
+# The binary rules of the grammar in a worker process, and their subsets allowed by the boundaries
+_worker_rules: List[Tuple[int, int, int]] = []
+_worker_allowed_rules: Dict[int, List[Tuple[int, int, int]]] = {}
+
+
+def _init_worker(binary_rules: List[Tuple[int, int, int]]):
+    global _worker_rules, _worker_allowed_rules
+    _worker_rules, _worker_allowed_rules = binary_rules, {}
+
+
+def _get_executor(workers: int, binary_rules: List[Tuple[int, int, int]]) -> ProcessPoolExecutor:
+    """Get the pool whose processes hold the rules, the pool of the same size with other rules is replaced."""
+    if workers in _executors and _executors[workers][0] != binary_rules:
+        _executors.pop(workers)[1].shutdown(wait=True)
+    if workers not in _executors:
+        executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(binary_rules,))
+        _executors[workers] = (binary_rules, executor)
+    return _executors[workers][1]
+
+
+@atexit.register
+def _shutdown_executors():
+    while len(_executors) > 0:
+        _executors.popitem()[1][1].shutdown(wait=True)
+
+
+def _fill_tile(buffer: memoryview,
+               cell_size: int,
+               binary_rules: List[Tuple[int, int, int]],
+               allowed_rules: Dict[int, List[Tuple[int, int, int]]],
+               firsts: List[int],
+               lasts: List[int],
+               rows: Tuple[int, int],
+               columns: Tuple[int, int]):
+    """Fill the cells (i, j) with i in `range(*rows)`, j in `range(*columns)` and i < j of a chart in a buffer.
+
+    The cells (i, k) and (k + 1, j) outside the tile are in the tiles closer to the diagonal, they are decoded
+    once before filling. The cells in the tile are filled with j ascending and i descending, so the ones
+    they depend on are filled before them. Only the cells that are not empty are written back,
+    the buffer is filled with zeros.
+
+    :param buffer: The cells of the chart in the layout of `CYKChart`, each one in `cell_size` bytes.
+    :param cell_size: The number of bytes of a cell.
+    :param binary_rules: The (head, left, right) masks of the binary rules.
+    :param allowed_rules: The cache of the rules allowed by the boundaries.
+    :param firsts: The heads that can begin with the tokens at the rows.
+    :param lasts: The heads that can end with the tokens at the columns.
+    :param rows: The range of i.
+    :param columns: The range of j, it does not begin before the rows.
+    """
+    (r0, r1), (c0, c1) = rows, columns
+
+    def _read(i: int, j: int) -> int:
+        offset = (j * (j + 1) // 2 + i) * cell_size
+        return int.from_bytes(buffer[offset:offset + cell_size], 'little')
+
+    # row_cells[i - r0][k - i] is the cell (i, k), column_cells[j - c0][k - r0] is the cell (k, j)
+    row_cells = [[_read(i, k) if k < c0 or k == i else 0 for k in range(i, c1)] for i in range(r0, r1)]
+    column_cells = [[_read(k, j) if k >= r1 or k == j else 0 for k in range(r0, j + 1)] for j in range(c0, c1)]
+    for j in range(c0, c1):
+        column, last = column_cells[j - c0], lasts[j - c0]
+        for i in range(min(r1, j) - 1, r0 - 1, -1):
+            allowed = firsts[i - r0] & last
+            if allowed == 0:
+                continue
+            rules = _allowed_rules(binary_rules, allowed_rules, allowed)
+            row, mask = row_cells[i - r0], 0
+            for k in range(i, j):
+                left, right = row[k - i], column[k + 1 - r0]
+                if left and right:
+                    mask |= _combine(rules, left, right)
+            row[j - i] = column[i - r0] = mask
+    for i in range(r0, r1):
+        row = row_cells[i - r0]
+        for j in range(max(i + 1, c0), c1):
+            if row[j - i]:
+                offset = (j * (j + 1) // 2 + i) * cell_size
+                buffer[offset:offset + cell_size] = row[j - i].to_bytes(cell_size, 'little')
+
+
+def _fill_shared_tile(name: str, cell_size: int, firsts: List[int], lasts: List[int],
+                      rows: Tuple[int, int], columns: Tuple[int, int]):
+    """Fill a tile of a chart in shared memory in a worker process, the memory is closed afterwards."""
+    memory = SharedMemory(name=name)
+    try:
+        _fill_tile(memory.buf, cell_size, _worker_rules, _worker_allowed_rules, firsts, lasts, rows, columns)
+    finally:
+        memory.close()
+
+
+def _recognize_parallel(cnf_grammar: Grammar,
+                        sentence: str,
+                        workers: int,
+                        block_size: int = 64,
+                        budget: Optional[ParseBudget] = None) -> CYKChart:
+    """Fill the recognition table with a pool of processes.
+
+    The table is divided into square tiles of `block_size` rows and columns. A cell only depends on
+    the cells to its left in the same row and the ones below it in the same column, so the tiles
+    on the same diagonal of tiles only depend on the diagonals closer to the main one.
+    The tiles of a diagonal are filled concurrently in a table placed in shared memory,
+    each of them with the same pruning by the boundaries as the sequential recognition.
+
+    :param cnf_grammar: The grammar in Chomsky Normal Form.
+    :param sentence: The sentence to be recognized.
+    :param workers: The number of processes, they receive the rules once when the pool is created.
+    :param block_size: The number of rows and columns of a tile.
+        The diagonals with only one tile are filled by the calling process.
+    :param budget: The limits checked before every diagonal of tiles.
+    :return: The same table as the sequential recognition.
+    """
     n = len(sentence)
-    # Create the recognition table
-    rec = [[set() for _ in range(n)] for _ in range(n)]
-    for i in range(n):
-        for head, productions in cnf_grammar.productions.items():
-            for production in productions:
-                if len(production) == 1 and production[0].symbol == sentence[i]:
-                    rec[i][i].add(head)
-                    break
-    for sub_len in range(1, n):
-        for i in range(n - sub_len):
-            j = i + sub_len
-            for head, productions in cnf_grammar.productions.items():
-                for production in productions:
-                    if len(production) == 2:
-                        for k in range(i, j):
-                            if production[0] in rec[i][k] and production[1] in rec[k + 1][j]:
-                                rec[i][j].add(head)
-                                break
-                    if head in rec[i][j]:
-                        break
-    # Undoing the effect of CNF transformation
-    history: Dict[Tuple, Optional[Union[Tuple, str]]] = {}
+    chart = CYKChart(list(cnf_grammar.productions.keys()))
+    terminal_masks, binary_rules = _compile_rules(cnf_grammar, chart)
+    first_masks, last_masks = _boundary_masks(cnf_grammar, chart)
+    firsts = [first_masks.get(sentence[i], 0) for i in range(n)]
+    lasts = [last_masks.get(sentence[j], 0) for j in range(n)]
+    allowed_rules: Dict[int, List[Tuple[int, int, int]]] = {}
+    cell_size = max(1, (len(chart.symbols) + 63) // 64) * 8
+    memory = SharedMemory(create=True, size=max(1, n * (n + 1) // 2 * cell_size))
+    try:
+        buffer = memory.buf
+        for i in range(n):
+            offset = CYKChart.index(i, i) * cell_size
+            buffer[offset:offset + cell_size] = terminal_masks.get(sentence[i], 0).to_bytes(cell_size, 'little')
+        executor = _get_executor(workers, binary_rules)
+        blocks = [(first, min(first + block_size, n)) for first in range(0, n, block_size)]
+        for diagonal in range(len(blocks)):
+            tiles = [(blocks[p], blocks[p + diagonal]) for p in range(len(blocks) - diagonal)]
+            if budget is not None:
+                budget.memo(n * (n + 1) // 2)
+                budget.step(sum((r1 - r0) * (c1 - c0) * max(1, c0 - r0) for (r0, r1), (c0, c1) in tiles))
+            if len(tiles) == 1:
+                (r0, r1), (c0, c1) = tiles[0]
+                _fill_tile(buffer, cell_size, binary_rules, allowed_rules,
+                           firsts[r0:r1], lasts[c0:c1], (r0, r1), (c0, c1))
+                continue
+            try:
+                futures = [executor.submit(_fill_shared_tile, memory.name, cell_size,
+                                           firsts[r0:r1], lasts[c0:c1], (r0, r1), (c0, c1))
+                           for (r0, r1), (c0, c1) in tiles]
+                for future in futures:
+                    future.result()
+            except BrokenProcessPool:
+                # A new pool is created by the next parse
+                _executors.pop(workers, None)
+                raise
+        chart.extend(n)
+        for index in range(len(chart.cells)):
+            offset = index * cell_size
+            chart.cells[index] = int.from_bytes(buffer[offset:offset + cell_size], 'little')
+        del buffer
+    finally:
+        memory.close()
+        memory.unlink()
+    return chart
+
+
+def _reconstruct(grammar: Grammar,
+                 head_mapping: Dict[Symbol, Symbol],
+                 rec: CYKChart,
+                 sentence: str,
+                 budget: Optional[ParseBudget] = None,
+                 source: Optional[Grammar] = None):
+    """Undo the effect of CNF transformation.
+
+    :param grammar: The original grammar with nullables calculated.
+    :param head_mapping: The mapping from the original heads to the heads in Chomsky Normal Form.
+    :param rec: The recognition table.
+    :param sentence: The sentence.
+    :param budget: The limits of the reconstruction, the cells of the table are counted as memo entries.
+    :param source: The grammar whose alternatives are indexed by the nodes if `grammar` is its reduced copy.
+    :return: The root of the parsed tree, None if the sentence can not be derived.
+    """
+    history: Dict[Tuple, Optional[ParseNode]] = {}
+    boundaries = grammar.boundary_characters(whole_terminals=True)
 
     def _recognisable(symbol: Symbol, start: int, stop: int):
         if start > stop:
-            return symbol.nullable is True
+            if symbol.nullable is not True:
+                return False
+            return symbol not in boundaries or sentence[stop + 1:stop + 2] in boundaries[symbol][2]
         if grammar.is_terminal(symbol):
             return symbol.symbol == sentence[start:stop + 1]
+        firsts, lasts, follows = boundaries[symbol]
+        if sentence[start] not in firsts or sentence[stop] not in lasts or sentence[stop + 1:stop + 2] not in follows:
+            return False
         if symbol in head_mapping:
             symbol = head_mapping[symbol]
-        return symbol in rec[start][stop]
+        return rec.contains(start, stop, symbol)
 
     def _parse_production(production: Sequence[Symbol], start: int, stop: int):
         if len(production) == 0:
@@ -72,19 +395,156 @@ def parse_with_cyk(grammar: Grammar, sentence: str):
         if key in history:
             return history[key]
         history[key] = None
+        if budget is not None:
+            budget.step()
+            budget.memo(len(rec.cells) + len(history))
         if grammar.is_terminal(symbol):
             if _recognisable(symbol, start, stop):
-                history[key] = str(symbol)
+                history[key] = ParseNode(symbol, start, stop + 1)
         else:
             if _recognisable(symbol, start, stop):
-                for production in grammar.productions[symbol]:
+                for index, production in enumerate(grammar.productions[symbol]):
                     result = _parse_production(production, start, stop)
                     if result is not None:
-                        if len(production) == 1 and grammar.is_terminal(production[0]):
-                            history[key] = result
-                        else:
-                            history[key] = (f'{" ".join(map(str, production))}', result)
+                        if source is not None:
+                            index = source.productions[symbol].indices[production]
+                        history[key] = ParseNode(symbol, start, max(start, stop + 1), index, production, result)
                         break
         return history[key]
 
     return _parse_symbol(grammar.start, 0, len(sentence) - 1)
+
+
+def _prepare(grammar: Grammar, remove_useless: bool):
+    """Get the grammar used for reconstruction, its Chomsky Normal Form and the mapping of heads.
+    The results are cached until the grammar is modified, the grammar in Chomsky Normal Form is frozen.
+    """
+    def _create():
+        source = grammar.reduced() if remove_useless else grammar
+        source.init_nullable()
+        source.init_last()
+        source.init_follow()
+        cnf_grammar, head_mapping = to_chomsky_normal_form(
+            source,
+            return_mapping=True,
+            remove_unreachable=False,
+            remove_unproductive=False)
+        return source, cnf_grammar.freeze(), head_mapping
+
+    return grammar.cached('cyk' if remove_useless else 'cyk_unreduced', _create)
+
+
+def parse_with_cyk(grammar: Grammar,
+                   sentence: Union[str, Sequence],
+                   workers: int = 1,
+                   parallel_threshold: int = PARALLEL_THRESHOLD,
+                   deterministic: bool = True,
+                   return_node: bool = False,
+                   remove_useless: bool = True,
+                   budget: Optional[ParseBudget] = None):
+    """Parse the sentence with CYK.
+
+    :param grammar: The grammar.
+    :param sentence: The sentence to be parsed, or the tokens in a sequence or a `TokenSequence`.
+    :param workers: The number of processes used for filling the recognition table.
+    :param parallel_threshold: Sentences shorter than this are always recognized in the current process,
+        the first parse with a number of workers also starts the pool.
+    :param deterministic: Whether to parse in linear time if the grammar is LL(1) or LALR(1). The tree is unique then,
+        so `remove_useless` makes no difference, and the budget counts the steps of the linear-time parser.
+    :param return_node: Whether to return the `ParseNode` instead of tuples.
+    :param remove_useless: Whether to parse with the grammar that has no unproductive or unreachable heads.
+    :param budget: The limits of the parse, `BudgetExceeded` is raised if any of them is exceeded.
+    :return: The parsed tree, None if the sentence can not be derived.
+    """
+    if budget is not None:
+        budget.start()
+    sentence = _as_sentence(sentence)
+    if deterministic:
+        parser = get_deterministic_parser(grammar)
+        if parser is not None:
+            return parser.parse(sentence, tree_format='node' if return_node else 'cyk', budget=budget)
+    source = grammar
+    grammar, cnf_grammar, head_mapping = _prepare(source, remove_useless)
+    if workers > 1 and len(sentence) >= parallel_threshold:
+        rec = _recognize_parallel(cnf_grammar, sentence, workers, budget=budget)
+    else:
+        rec = _recognize(cnf_grammar, sentence, budget)
+    root = _reconstruct(grammar, head_mapping, rec, sentence, budget, source)
+    if root is None or return_node:
+        return root
+    return root.to_cyk_tuple()
+
+
+def recognize_with_cyk(grammar: Grammar,
+                       sentence: Union[str, Sequence],
+                       remove_useless: bool = True,
+                       budget: Optional[ParseBudget] = None) -> ParseChart:
+    """Fill the recognition table once and keep it for the queries about all the substrings.
+
+    :param grammar: The grammar.
+    :param sentence: The sentence, or the tokens in a sequence or a `TokenSequence`.
+    :param remove_useless: Whether to recognize with the grammar that has no unproductive or unreachable heads,
+        the unreachable heads can only be queried if it is False.
+    :param budget: The limits of the recognition.
+    :return: The table queried with the heads of the original grammar.
+    """
+    if budget is not None:
+        budget.start()
+    sentence = _as_sentence(sentence)
+    grammar, cnf_grammar, head_mapping = _prepare(grammar, remove_useless)
+    return ParseChart(grammar, _recognize(cnf_grammar, sentence, budget), head_mapping, sentence)
+
+
+def parse_batch_with_cyk(grammar: Grammar,
+                         sentences: Sequence[Union[str, Sequence]],
+                         recognize_only: bool = False,
+                         deterministic: bool = True,
+                         return_node: bool = False,
+                         remove_useless: bool = True,
+                         budget: Optional[ParseBudget] = None) -> list:
+    """Parse the sentences with CYK, the columns of the common prefixes are only filled once.
+
+    :param grammar: The grammar.
+    :param sentences: The sentences to be parsed, or the sequences of tokens.
+    :param recognize_only: Whether to return whether the sentences can be derived instead of the trees.
+    :param deterministic: Whether to parse in linear time if the grammar is LL(1) or LALR(1). The tree is unique then,
+        so `remove_useless` makes no difference, and the budget counts the steps of the linear-time parser.
+    :param return_node: Whether to return the `ParseNode` instead of tuples.
+    :param remove_useless: Whether to parse with the grammar that has no unproductive or unreachable heads.
+    :param budget: The limits of the whole batch.
+    :return: The results of the sentences in the same order as `parse_with_cyk`.
+    """
+    if budget is not None:
+        budget.start()
+    sentences = [_as_sentence(sentence) for sentence in sentences]
+    results: list = [None] * len(sentences)
+    if deterministic:
+        parser = get_deterministic_parser(grammar)
+        if parser is not None:
+            for index, sentence in enumerate(sentences):
+                results[index] = parser.parse(sentence, tree_format='node' if return_node else 'cyk', budget=budget)
+                if recognize_only:
+                    results[index] = results[index] is not None
+            return results
+    source = grammar
+    grammar, cnf_grammar, head_mapping = _prepare(source, remove_useless)
+
+    def _visit(sentence: str, indices: List[int], chart: CYKChart):
+        if recognize_only:
+            if len(sentence) == 0:
+                result = grammar.start.nullable is True
+            else:
+                result = chart.contains(0, len(sentence) - 1, cnf_grammar.start)
+            for index in indices:
+                results[index] = result
+            return
+        root = _reconstruct(grammar, head_mapping, chart, sentence, budget, source)
+        if root is None or return_node:
+            result = root
+        else:
+            result = root.to_cyk_tuple()
+        for index in indices:
+            results[index] = result
+
+    _recognize_trie(cnf_grammar, sentences, _visit, budget)
+    return results
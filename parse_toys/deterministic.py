@@ -0,0 +1,343 @@
+from collections import deque
+from typing import Dict, List, Optional, Set, Tuple
+
+from parse_toys.grammar import Symbol, Epsilon, Grammar
+from parse_toys.tree import ParseNode
+from parse_toys.budget import ParseBudget
+
+__all__ = ['DeterministicParser', 'LL1Parser', 'LALR1Parser', 'classify_grammar', 'get_deterministic_parser']
+
+
+def _is_simple(grammar: Grammar) -> bool:
+    """Whether the terminals are single characters and ε only appears alone in a production."""
+    for productions in grammar.productions.values():
+        for production in productions:
+            for symbol in production:
+                if isinstance(symbol, Epsilon):
+                    if len(production) > 1:
+                        return False
+                elif grammar.is_terminal(symbol) and len(symbol.symbol) != 1:
+                    return False
+    return True
+
+
+class DeterministicParser(object):
+
+    kind = ''
+
+    def __init__(self, grammar: Grammar):
+        self.grammar = grammar
+
+    def parse_node(self, sentence: str, budget: Optional[ParseBudget] = None) -> Optional[ParseNode]:
+        """Parse the sentence in linear time.
+
+        :param sentence: The sentence.
+        :param budget: The limits of the parse, a step is a prediction, a shift or a reduction,
+            the memo entries are the symbols on the stack. It should be started by the caller.
+        :return: The root of the tree, None if the sentence can not be derived.
+        """
+        raise NotImplementedError
+
+    def parse(self, sentence: str, tree_format: str = 'unger', budget: Optional[ParseBudget] = None):
+        """Parse the sentence in linear time.
+
+        :param sentence: The sentence.
+        :param tree_format: 'cyk' or 'unger' for the tuples returned by the corresponding engine,
+            'node' for the `ParseNode`.
+        :param budget: The limits of the parse, see `parse_node`.
+        :return: The tree, None if the sentence can not be derived.
+        """
+        root = self.parse_node(sentence, budget)
+        if root is None or tree_format == 'node':
+            return root
+        if tree_format == 'cyk':
+            return root.to_cyk_tuple()
+        return root.to_unger_tuple()
+
+
+class LL1Parser(DeterministicParser):
+
+    kind = 'LL(1)'
+
+    def __init__(self, grammar: Grammar, table: Dict[Symbol, Dict[str, int]]):
+        super().__init__(grammar)
+        self.table = table
+
+    @staticmethod
+    def build(grammar: Grammar) -> Optional['LL1Parser']:
+        """Build the prediction table.
+
+        :param grammar: The grammar with FIRST and FOLLOW sets calculated.
+        :return: The parser, None if the grammar is not LL(1).
+        """
+        table: Dict[Symbol, Dict[str, int]] = {}
+        for head, productions in grammar.productions.items():
+            row = table[head] = {}
+            for index, production in enumerate(productions):
+                predict, nullable = set(), True
+                for symbol in production:
+                    predict |= symbol.first
+                    if symbol.nullable is not True:
+                        nullable = False
+                        break
+                if nullable:
+                    predict |= head.follow
+                for terminal in predict:
+                    if terminal in row:
+                        return None
+                    row[terminal] = index
+        return LL1Parser(grammar, table)
+
+    def parse_node(self, sentence: str, budget: Optional[ParseBudget] = None) -> Optional[ParseNode]:
+        grammar, table = self.grammar, self.table
+        # The stack contains the symbols to be derived, and the heads (with None) to be closed
+        root: List[ParseNode] = []
+        stack = [(grammar.start, root)]
+        position = 0
+        while len(stack) > 0:
+            if budget is not None:
+                budget.step()
+                budget.memo(len(stack))
+            symbol, siblings = stack.pop()
+            if siblings is None:
+                symbol.stop = position
+                symbol.children = tuple(symbol.children)
+            elif isinstance(symbol, Epsilon):
+                siblings.append(ParseNode(symbol, position, position))
+            elif grammar.is_terminal(symbol):
+                if sentence[position:position + 1] != symbol.symbol:
+                    return None
+                siblings.append(ParseNode(symbol, position, position + 1))
+                position += 1
+            else:
+                index = table[symbol].get(sentence[position:position + 1])
+                if index is None:
+                    return None
+                production = grammar.productions[symbol][index]
+                node = ParseNode(symbol, position, position, index, production, [])
+                siblings.append(node)
+                stack.append((node, None))
+                for child in reversed(production):
+                    stack.append((child, node.children))
+        if position != len(sentence):
+            return None
+        return root[0]
+
+
+class LALR1Parser(DeterministicParser):
+
+    kind = 'LALR(1)'
+
+    def __init__(self,
+                 grammar: Grammar,
+                 rules: List[Tuple[Symbol, Tuple[Symbol, ...], Tuple[Symbol, ...], int]],
+                 actions: List[Dict[str, Tuple[str, int]]],
+                 gotos: List[Dict[Symbol, int]]):
+        super().__init__(grammar)
+        self.rules = rules
+        self.actions = actions
+        self.gotos = gotos
+
+    @staticmethod
+    def _automaton(grammar: Grammar, rules, allow_conflicts: bool):
+        """Build the LALR(1) automaton by propagating the lookaheads of the LR(0) kernels.
+
+        :param grammar: The grammar with FIRST sets calculated.
+        :param rules: The (head, body, production, index) of the augmented grammar, rule 0 is the augmented start.
+        :param allow_conflicts: Whether to keep all the conflicting actions.
+        :return: The actions and the gotos, None if there is a conflict that is not allowed.
+        """
+        rules_of: Dict[Symbol, List[int]] = {}
+        for index, (head, _, _, _) in enumerate(rules):
+            rules_of.setdefault(head, []).append(index)
+
+        def _closure_0(items):
+            closure, queue = set(items), deque(items)
+            while len(queue) > 0:
+                rule, dot = queue.popleft()
+                body = rules[rule][1]
+                if dot < len(body) and body[dot] in rules_of:
+                    for sub_rule in rules_of[body[dot]]:
+                        if (sub_rule, 0) not in closure:
+                            closure.add((sub_rule, 0))
+                            queue.append((sub_rule, 0))
+            return closure
+
+        def _first(sequence, lookahead):
+            firsts = set()
+            for symbol in sequence:
+                firsts |= symbol.first
+                if symbol.nullable is not True:
+                    return firsts
+            firsts.add(lookahead)
+            return firsts
+
+        def _closure_1(items):
+            closure, queue = set(items), deque(items)
+            while len(queue) > 0:
+                rule, dot, lookahead = queue.popleft()
+                body = rules[rule][1]
+                if dot < len(body) and body[dot] in rules_of:
+                    for terminal in _first(body[dot + 1:], lookahead):
+                        for sub_rule in rules_of[body[dot]]:
+                            item = (sub_rule, 0, terminal)
+                            if item not in closure:
+                                closure.add(item)
+                                queue.append(item)
+            return closure
+
+        # The LR(0) states, identified by their kernels
+        kernels: List[frozenset] = [frozenset([(0, 0)])]
+        state_of = {kernels[0]: 0}
+        transitions: List[Dict[Symbol, int]] = []
+        index = 0
+        while index < len(kernels):
+            moves: Dict[Symbol, Set[Tuple[int, int]]] = {}
+            for rule, dot in _closure_0(kernels[index]):
+                body = rules[rule][1]
+                if dot < len(body):
+                    moves.setdefault(body[dot], set()).add((rule, dot + 1))
+            transitions.append({})
+            for symbol, kernel in moves.items():
+                kernel = frozenset(kernel)
+                if kernel not in state_of:
+                    state_of[kernel] = len(kernels)
+                    kernels.append(kernel)
+                transitions[index][symbol] = state_of[kernel]
+            index += 1
+        # Find the spontaneous and propagated lookaheads, None marks the propagation
+        lookaheads: Dict[Tuple[int, Tuple[int, int]], Set[str]] = {
+            (state, item): set() for state, kernel in enumerate(kernels) for item in kernel}
+        lookaheads[(0, (0, 0))].add('')
+        propagations: Dict[Tuple[int, Tuple[int, int]], List[Tuple[int, Tuple[int, int]]]] = {}
+        for state, kernel in enumerate(kernels):
+            for item in kernel:
+                for rule, dot, lookahead in _closure_1([item + (None,)]):
+                    body = rules[rule][1]
+                    if dot == len(body):
+                        continue
+                    target = (transitions[state][body[dot]], (rule, dot + 1))
+                    if lookahead is None:
+                        propagations.setdefault((state, item), []).append(target)
+                    else:
+                        lookaheads[target].add(lookahead)
+        queue = deque(lookaheads.keys())
+        in_queue = set(queue)
+        while len(queue) > 0:
+            source = queue.popleft()
+            in_queue.remove(source)
+            for target in propagations.get(source, ()):
+                if not lookaheads[source] <= lookaheads[target]:
+                    lookaheads[target] |= lookaheads[source]
+                    if target not in in_queue:
+                        queue.append(target)
+                        in_queue.add(target)
+        # Fill the tables
+        actions: List[Dict[str, List[Tuple[str, int]]]] = []
+        gotos: List[Dict[Symbol, int]] = []
+        for state, kernel in enumerate(kernels):
+            row: Dict[str, List[Tuple[str, int]]] = {}
+            items = [item + (lookahead,) for item in kernel for lookahead in lookaheads[(state, item)]]
+            for rule, dot, lookahead in _closure_1(items):
+                body = rules[rule][1]
+                if dot == len(body):
+                    action = ('a', 0) if rule == 0 else ('r', rule)
+                    if action not in row.setdefault(lookahead, []):
+                        row[lookahead].append(action)
+            gotos.append({})
+            for symbol, target in transitions[state].items():
+                if symbol in rules_of:
+                    gotos[state][symbol] = target
+                else:
+                    row.setdefault(symbol.symbol, []).append(('s', target))
+            if not allow_conflicts and any(len(candidates) > 1 for candidates in row.values()):
+                return None
+            actions.append(row)
+        return actions, gotos
+
+    @staticmethod
+    def augment(grammar: Grammar):
+        """Get the rules of the augmented grammar, ε is removed from the bodies."""
+        rules = [(Symbol("S' "), (grammar.start,), (grammar.start,), 0)]
+        for head, productions in grammar.productions.items():
+            for index, production in enumerate(productions):
+                body = tuple(symbol for symbol in production if not isinstance(symbol, Epsilon))
+                rules.append((head, body, production, index))
+        return rules
+
+    @staticmethod
+    def build(grammar: Grammar) -> Optional['LALR1Parser']:
+        """Build the LALR(1) tables.
+
+        :param grammar: The grammar with FIRST sets calculated.
+        :return: The parser, None if the grammar is not LALR(1).
+        """
+        rules = LALR1Parser.augment(grammar)
+        automaton = LALR1Parser._automaton(grammar, rules, allow_conflicts=False)
+        if automaton is None:
+            return None
+        actions, gotos = automaton
+        actions = [{terminal: candidates[0] for terminal, candidates in row.items()} for row in actions]
+        return LALR1Parser(grammar, rules, actions, gotos)
+
+    def parse_node(self, sentence: str, budget: Optional[ParseBudget] = None) -> Optional[ParseNode]:
+        states, nodes = [0], []
+        position = 0
+        while True:
+            if budget is not None:
+                budget.step()
+                budget.memo(len(states))
+            action = self.actions[states[-1]].get(sentence[position:position + 1])
+            if action is None:
+                return None
+            kind, target = action
+            if kind == 's':
+                states.append(target)
+                nodes.append(ParseNode(self.grammar.symbols[sentence[position]], position, position + 1))
+                position += 1
+            elif kind == 'r':
+                head, body, production, index = self.rules[target]
+                if len(body) < len(production):
+                    children = (ParseNode(self.grammar.empty_symbol, position, position),)
+                else:
+                    children = tuple(nodes[len(nodes) - len(body):])
+                    del nodes[len(nodes) - len(body):]
+                    del states[len(states) - len(body):]
+                start = children[0].start if len(children) > 0 else position
+                nodes.append(ParseNode(head, start, position, index, production, children))
+                states.append(self.gotos[states[-1]][head])
+            else:
+                return nodes[0]
+
+
+def get_deterministic_parser(grammar: Grammar) -> Optional[DeterministicParser]:
+    """Build a linear-time parser if the grammar is LL(1) or LALR(1).
+    The result is cached until the grammar is modified, the FIRST and FOLLOW sets are calculated
+    on a copy, so the symbols of the grammar are not modified.
+
+    :param grammar: The grammar.
+    :return: The parser, None if the grammar is not deterministic.
+    """
+    def _build():
+        if grammar.start is None or grammar.is_terminal(grammar.start) or not _is_simple(grammar):
+            return None
+        source = grammar.clone()
+        source.init_follow()
+        parser = LL1Parser.build(source)
+        if parser is None:
+            parser = LALR1Parser.build(source)
+        return parser
+
+    return grammar.cached('deterministic', _build)
+
+
+def classify_grammar(grammar: Grammar) -> Optional[str]:
+    """Detect whether the grammar is deterministic.
+
+    :param grammar: The grammar.
+    :return: 'LL(1)', 'LALR(1)' or None.
+    """
+    parser = get_deterministic_parser(grammar)
+    if parser is None:
+        return None
+    return parser.kind
@@ -0,0 +1,119 @@
+from typing import Dict, FrozenSet, List, Optional, Sequence, Tuple, Union
+
+from parse_toys.grammar import Grammar
+from parse_toys.budget import ParseBudget
+from parse_toys.tokens import _as_sentence
+from parse_toys.glr import _StackNode, _prepare, _reduce, _run
+
+__all__ = ['ParseDiagnosis', 'diagnose']
+
+
+class ParseDiagnosis(object):
+
+    def __init__(self,
+                 accepted: bool,
+                 prefix_length: int,
+                 found: Optional[str],
+                 expected: FrozenSet[str],
+                 tree=None):
+        """The result of `diagnose`.
+
+        :param accepted: Whether the sentence is derived from the start symbol.
+        :param prefix_length: The length of the longest prefix that can be extended to a sentence.
+        :param found: The terminal at the earliest error, '' for the end of the sentence, None if it is accepted.
+        :param expected: The terminals that could follow the prefix instead, '' if the sentence could end there.
+        :param tree: The parsed tree if the sentence is accepted.
+        """
+        self.accepted = accepted
+        self.prefix_length = prefix_length
+        self.found = found
+        self.expected = expected
+        self.tree = tree
+
+    @property
+    def error_offset(self) -> Optional[int]:
+        """The earliest offset that can not be parsed, None if the sentence is accepted."""
+        return None if self.accepted else self.prefix_length
+
+    def __str__(self):
+        if self.accepted:
+            return 'Accepted'
+        found = 'the end' if self.found == '' else repr(self.found)
+        expected = ', '.join('the end' if terminal == '' else repr(terminal) for terminal in sorted(self.expected))
+        return f'Unexpected {found} at {self.prefix_length}, expected: {expected}'
+
+    def __repr__(self):
+        return (f'ParseDiagnosis(accepted={self.accepted}, prefix_length={self.prefix_length}, '
+                f'found={self.found!r}, expected={sorted(self.expected)!r})')
+
+
+def _reductions(grammar: Grammar, remove_useless: bool) -> Tuple[List[List[int]], int]:
+    """Get the rules reduced at each state for any lookahead, and the length of the longest terminal.
+    The results are cached until the grammar is modified.
+    """
+    def _create():
+        source, _, actions, _ = _prepare(grammar, remove_useless)
+        reductions = [sorted({rule for candidates in row.values() for kind, rule in candidates if kind == 'r'})
+                      for row in actions]
+        max_terminal_length = max((len(symbol.symbol) for productions in source.productions.values()
+                                   for production in productions for symbol in production
+                                   if symbol not in source.productions), default=0)
+        return reductions, max_terminal_length
+
+    return grammar.cached('diagnosis' if remove_useless else 'diagnosis_unreduced', _create)
+
+
+def _expected(prepared,
+              reductions: List[List[int]],
+              level: Dict[int, _StackNode],
+              position: int,
+              budget: Optional[ParseBudget]) -> FrozenSet[str]:
+    """Find the terminals that can be shifted or accepted after the reductions of the level.
+
+    Every stack built by the reductions of the LR(0) items is a viable prefix of the same input,
+    whatever the lookaheads of the reductions are. So the level is reduced once with the reductions
+    of all the lookaheads, and the expected terminals are the ones shifted or accepted by its nodes.
+    """
+    _, rules, actions, gotos = prepared
+    _reduce(level, None, position, rules, actions, gotos, budget, reductions)
+    expected = set()
+    for node in level.values():
+        for terminal, candidates in actions[node.state].items():
+            for kind, _ in candidates:
+                # Only the start node has the state 0
+                if kind == 's' or (kind == 'a' and any(below.state == 0 for below in node.edges.keys())):
+                    expected.add(terminal)
+    return frozenset(expected)
+
+
+def diagnose(grammar: Grammar,
+             sentence: Union[str, Sequence],
+             return_node: bool = False,
+             remove_useless: bool = True,
+             budget: Optional[ParseBudget] = None) -> ParseDiagnosis:
+    """Parse the sentence and find the earliest error if it is rejected.
+
+    The stacks of the generalized LR parser only contain the prefixes of the sentential forms,
+    so they all fail at the first terminal that can not follow the longest valid prefix.
+    The expected terminals are found by one more pass of reductions at that level only,
+    and the error is reported with about the cost of one parse.
+
+    :param grammar: The grammar.
+    :param sentence: The sentence to be parsed, or the tokens in a sequence or a `TokenSequence`.
+        A terminal matches one character of a string, so the sentences of a grammar with longer terminals
+        should be given in tokens, `ValueError` is raised for a string.
+    :param return_node: Whether the tree of an accepted sentence is a `ParseNode` instead of tuples.
+    :param remove_useless: Whether to parse with the grammar that has no unproductive or unreachable heads,
+        otherwise a prefix that only leads to the unproductive heads is counted as valid.
+    :param budget: The limits of the parse, see `parse_with_glr`.
+    :return: The diagnosis.
+    """
+    sentence = _as_sentence(sentence)
+    reductions, max_terminal_length = _reductions(grammar, remove_useless)
+    if isinstance(sentence, str) and max_terminal_length > 1:
+        raise ValueError('The sentences of the grammar with terminals longer than one character should be tokens')
+    prepared, position, level, root = _run(grammar, sentence, remove_useless, budget)
+    if root is not None:
+        return ParseDiagnosis(True, len(sentence), None, frozenset(), root if return_node else root.to_unger_tuple())
+    found = sentence[position:position + 1]
+    return ParseDiagnosis(False, position, found, _expected(prepared, reductions, level, position, budget))
@@ -0,0 +1,249 @@
+import math
+import time
+from typing import Dict, Iterable, List, Optional, Sequence, Union
+
+from parse_toys.grammar import Epsilon, Grammar
+from parse_toys.deterministic import get_deterministic_parser
+from parse_toys.unger import parse_with_unger
+from parse_toys.cyk import parse_with_cyk
+from parse_toys.glr import parse_with_glr, _prepare as _prepare_glr
+from parse_toys.chomsky_normal_form import to_chomsky_normal_form
+from parse_toys.budget import ParseBudget
+from parse_toys.tokens import _as_sentence
+
+__all__ = ['GrammarStatistics', 'analyze_grammar', 'CostModel', 'parse']
+
+METHODS = ['deterministic', 'unger', 'cyk', 'glr']
+
+# The methods that match a terminal with exactly one character of a string
+CHARACTER_METHODS = {'deterministic', 'cyk', 'glr'}
+
+# The seconds of a unit of work of each method, `CostModel.calibrate` measures them on the current machine
+DEFAULT_WEIGHTS = {
+    'deterministic': 4e-6,
+    'unger': 1e-6,
+    'cyk': 2.5e-7,
+    'cyk_setup': 7e-5,
+    'glr': 1e-5,
+}
+
+
+class GrammarStatistics(object):
+
+    def __init__(self, grammar: Grammar):
+        """Collect the statistics of the reduced grammar that decide the costs of the parsing methods.
+
+        :param grammar: The grammar.
+        """
+        source = grammar.reduced()
+        source.init_nullable()
+        productions = [production for alternatives in source.productions.values() for production in alternatives]
+        self.heads = len(source.productions)
+        self.productions = len(productions)
+        # The numbers of productions with each number of heads in them, the terminals only match fixed positions
+        self.splits: Dict[int, int] = {}
+        self.binary_rules = 0
+        self.max_length = 0
+        for production in productions:
+            symbols = [symbol for symbol in production if not isinstance(symbol, Epsilon)]
+            heads = sum(1 for symbol in symbols if symbol in source.productions)
+            self.splits[heads] = self.splits.get(heads, 0) + 1
+            self.max_length = max(self.max_length, len(symbols))
+            # Every subset of the nullable symbols may be dropped by the elimination of ε-rules
+            nullables = sum(1 for symbol in symbols if symbol.nullable is True)
+            self.binary_rules += max(0, len(symbols) - 1) * 2 ** min(nullables, 10)
+        # The methods in `CHARACTER_METHODS` can not parse the strings of a grammar with longer terminals
+        self.max_terminal_length = max((len(symbol.symbol) for production in productions for symbol in production
+                                        if symbol not in source.productions), default=0)
+        self.nullable_ratio = sum(1 for head in source.productions.keys() if head.nullable is True) / max(1, self.heads)
+        parser = get_deterministic_parser(grammar)
+        self.deterministic: Optional[str] = None if parser is None else parser.kind
+        # The pairs of LALR(1) states and terminals with more than one action
+        _, _, actions, _ = _prepare_glr(grammar, remove_useless=True)
+        self.conflicts = sum(1 for row in actions for candidates in row.values() if len(candidates) > 1)
+
+    def __repr__(self):
+        return (f'GrammarStatistics(heads={self.heads}, productions={self.productions}, '
+                f'max_length={self.max_length}, max_terminal_length={self.max_terminal_length}, '
+                f'nullable_ratio={self.nullable_ratio:.2f}, '
+                f'binary_rules={self.binary_rules}, deterministic={self.deterministic!r}, '
+                f'conflicts={self.conflicts})')
+
+
+def analyze_grammar(grammar: Grammar) -> GrammarStatistics:
+    """Get the statistics of the grammar, the result is cached until the grammar is modified.
+
+    :param grammar: The grammar.
+    :return: The statistics.
+    """
+    return grammar.cached('statistics', lambda: GrammarStatistics(grammar))
+
+
+class CostModel(object):
+
+    def __init__(self, weights: Optional[Dict[str, float]] = None):
+        """Initialize the model that estimates the seconds of the parsing methods.
+
+        The work of a method is estimated in units from the statistics of the grammar and the length
+        of the input, and a unit of each method costs a calibrated number of seconds:
+
+        * deterministic: n
+        * unger: Σ (n + 1)^(k + 1) / (k + 1)! over the productions with k heads, increased by the nullable heads
+        * cyk: the binary rules times n^3 / 6, and the conversion of the grammar if it is not cached
+        * glr: n times the conflicts, and n^3 / 6 times the conflicts for the ambiguous forks
+
+        :param weights: The seconds of a unit of the methods, the missing ones are taken from `DEFAULT_WEIGHTS`.
+        """
+        self.weights = dict(DEFAULT_WEIGHTS)
+        if weights is not None:
+            self.weights.update(weights)
+
+    @staticmethod
+    def units(statistics: GrammarStatistics, length: int) -> Dict[str, float]:
+        """Estimate the units of work of the methods, the cached preparations are not included.
+
+        :param statistics: The statistics of the grammar.
+        :param length: The length of the input.
+        :return: The units of the methods, and the units of 'cyk_setup'.
+        """
+        n = length
+        unger = sum(count * (n + 1) ** (k + 1) / math.factorial(k + 1) for k, count in statistics.splits.items())
+        units = {
+            'unger': unger * (1.0 + statistics.nullable_ratio) + 1.0,
+            'cyk': statistics.binary_rules * n ** 3 / 6.0 + statistics.heads * n ** 2 + 1.0,
+            'cyk_setup': float(statistics.binary_rules + statistics.productions),
+            'glr': n * (1.0 + statistics.conflicts) + statistics.conflicts * n ** 3 / 6.0 + 1.0,
+        }
+        if statistics.deterministic is not None:
+            units['deterministic'] = n + 1.0
+        return units
+
+    @staticmethod
+    def available(statistics: GrammarStatistics, tokens: bool = False) -> List[str]:
+        """Get the methods that can parse the inputs of the grammar.
+
+        :param statistics: The statistics of the grammar.
+        :param tokens: Whether the input is a sequence of tokens instead of a string. Only Unger's method
+            matches a terminal with a substring, so it is the only one for the strings of a grammar
+            that has terminals longer than one character.
+        :return: The names of the methods.
+        """
+        methods = [method for method in METHODS if method != 'deterministic' or statistics.deterministic]
+        if not tokens and statistics.max_terminal_length > 1:
+            methods = [method for method in methods if method not in CHARACTER_METHODS]
+        return methods
+
+    def estimate(self, grammar: Grammar, length: int, tokens: bool = False) -> Dict[str, float]:
+        """Estimate the seconds of the methods available for the grammar.
+
+        :param grammar: The grammar.
+        :param length: The length of the input.
+        :param tokens: Whether the input is a sequence of tokens instead of a string.
+        :return: The seconds of the methods.
+        """
+        statistics = analyze_grammar(grammar)
+        units = self.units(statistics, length)
+        seconds = {method: units[method] * self.weights[method] for method in self.available(statistics, tokens)}
+        if 'cyk' in seconds and not grammar.is_cached('cyk'):
+            seconds['cyk'] += units['cyk_setup'] * self.weights['cyk_setup']
+        return seconds
+
+    def choose(self, grammar: Grammar, length: int, tokens: bool = False) -> str:
+        """Choose the method with the least estimated seconds.
+
+        :param grammar: The grammar.
+        :param length: The length of the input.
+        :param tokens: Whether the input is a sequence of tokens instead of a string.
+        :return: The name of the method.
+        """
+        seconds = self.estimate(grammar, length, tokens)
+        return min(seconds.keys(), key=lambda method: seconds[method])
+
+    def calibrate(self,
+                  grammar: Grammar,
+                  sentences: Iterable[Union[str, Sequence]],
+                  methods: Optional[Sequence[str]] = None,
+                  repeat: int = 1) -> 'CostModel':
+        """Measure the seconds of a unit of the methods by parsing the sentences.
+
+        The weight of a method is fitted by least squares through the origin, the preparations are
+        measured separately, so the timings of the methods do not include them.
+
+        :param grammar: The grammar of the benchmark.
+        :param sentences: The sentences of the benchmark, they should have different lengths.
+        :param methods: The methods to be measured, all the ones available for the sentences by default.
+        :param repeat: The number of times a sentence is parsed, the fastest one is used.
+        :return: The model itself.
+        """
+        sentences = [_as_sentence(sentence) for sentence in sentences]
+        statistics = analyze_grammar(grammar)
+        if methods is None:
+            tokens = all(not isinstance(sentence, str) for sentence in sentences)
+            methods = self.available(statistics, tokens)
+        start_time = time.perf_counter()
+        to_chomsky_normal_form(grammar.reduced().clone(), remove_unreachable=False, remove_unproductive=False)
+        seconds = time.perf_counter() - start_time
+        self.weights['cyk_setup'] = seconds / max(1.0, self.units(statistics, 0)['cyk_setup'])
+        for method in methods:
+            parse(grammar, sentences[0], method=method)
+            numerator, denominator = 0.0, 0.0
+            for sentence in sentences:
+                seconds = math.inf
+                for _ in range(repeat):
+                    start_time = time.perf_counter()
+                    parse(grammar, sentence, method=method, tree_format='node')
+                    seconds = min(seconds, time.perf_counter() - start_time)
+                units = self.units(statistics, len(sentence))[method]
+                numerator += seconds * units
+                denominator += units * units
+            if denominator > 0.0:
+                self.weights[method] = numerator / denominator
+        return self
+
+
+DEFAULT_COST_MODEL = CostModel()
+
+
+def parse(grammar: Grammar,
+          sentence: Union[str, Sequence],
+          method: str = 'auto',
+          tree_format: str = 'unger',
+          cost_model: Optional[CostModel] = None,
+          budget: Optional[ParseBudget] = None):
+    """Parse the sentence with the method that is estimated to be the fastest.
+
+    :param grammar: The grammar.
+    :param sentence: The sentence to be parsed, or the tokens in a sequence or a `TokenSequence`.
+    :param method: 'auto', or one of 'deterministic', 'unger', 'cyk' and 'glr'. Only 'unger' parses a string
+        of a grammar that has terminals longer than one character, 'auto' never chooses the others for it.
+    :param tree_format: 'cyk' or 'unger' for the tuples returned by the corresponding engine,
+        'node' for the `ParseNode`.
+    :param cost_model: The model used by 'auto', `DEFAULT_COST_MODEL` if it is None.
+    :param budget: The limits of the parse.
+    :return: The parsed tree, None if the sentence can not be derived.
+    """
+    if tree_format not in {'unger', 'cyk', 'node'}:
+        raise ValueError(f'Unknown tree format: {tree_format}')
+    sentence = _as_sentence(sentence)
+    if method == 'auto':
+        method = (cost_model or DEFAULT_COST_MODEL).choose(grammar, len(sentence), not isinstance(sentence, str))
+    if method == 'deterministic':
+        parser = get_deterministic_parser(grammar)
+        if parser is None:
+            raise ValueError('The grammar is neither LL(1) nor LALR(1)')
+        if budget is not None:
+            budget.start()
+        root = parser.parse_node(sentence, budget)
+    elif method == 'unger':
+        root = parse_with_unger(grammar, sentence, deterministic=False, return_node=True, budget=budget)
+    elif method == 'cyk':
+        root = parse_with_cyk(grammar, sentence, deterministic=False, return_node=True, budget=budget)
+    elif method == 'glr':
+        root = parse_with_glr(grammar, sentence, return_node=True, budget=budget)
+    else:
+        raise ValueError(f'Unknown method: {method}')
+    if root is None or tree_format == 'node':
+        return root
+    if tree_format == 'cyk':
+        return root.to_cyk_tuple()
+    return root.to_unger_tuple()
@@ -0,0 +1,199 @@
+from collections import deque
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+from parse_toys.grammar import Epsilon, Grammar
+from parse_toys.deterministic import LALR1Parser
+from parse_toys.tree import ParseNode
+from parse_toys.budget import ParseBudget
+from parse_toys.tokens import _as_sentence
+
+__all__ = ['parse_with_glr']
+
+
+class _StackNode(object):
+
+    __slots__ = ('state', 'edges')
+
+    def __init__(self, state: int):
+        """A node of the graph-structured stack.
+
+        :param state: The LALR(1) state.
+        """
+        self.state = state
+        # The nodes below this one, and the trees of the symbols between them
+        self.edges: Dict['_StackNode', ParseNode] = {}
+
+
+def _prepare(grammar: Grammar, remove_useless: bool):
+    """Get the grammar and its LALR(1) tables with all the conflicting actions kept.
+    The results are cached until the grammar is modified.
+    """
+    def _create():
+        source = grammar.reduced() if remove_useless else grammar
+        source.init_follow()
+        # The nodes are indexed by the alternatives of the original grammar
+        rules = [(head, body, production, index if i == 0 else grammar.productions[head].indices[production])
+                 for i, (head, body, production, index) in enumerate(LALR1Parser.augment(source))]
+        actions, gotos = LALR1Parser._automaton(source, rules, allow_conflicts=True)
+        return source, rules, actions, gotos
+
+    return grammar.cached('glr' if remove_useless else 'glr_unreduced', _create)
+
+
+def _paths(node: _StackNode,
+           length: int,
+           edge: Optional[Tuple[_StackNode, _StackNode]]) -> Iterator[Tuple[_StackNode, Tuple[ParseNode, ...]]]:
+    """Find the paths of the length going down from the node.
+
+    :param node: The top of the paths.
+    :param length: The number of edges.
+    :param edge: Only the paths passing this edge are returned if it is not None.
+    :return: The bottoms of the paths, and the trees along the paths from left to right.
+    """
+    stack = [(node, length, (), edge is None)]
+    while len(stack) > 0:
+        current, remaining, values, passed = stack.pop()
+        if remaining == 0:
+            if passed:
+                yield current, values
+            continue
+        for below, value in current.edges.items():
+            stack.append((below, remaining - 1, (value,) + values,
+                          passed or (current is edge[0] and below is edge[1])))
+
+
+def _build(rules: List[Tuple], rule: int, values: Tuple[ParseNode, ...], position: int) -> ParseNode:
+    """Create the tree of a reduction that ends at the position."""
+    head, _, production, index = rules[rule]
+    start = values[0].start if len(values) > 0 else position
+    children: List[ParseNode] = []
+    values = iter(values)
+    for symbol in production:
+        if isinstance(symbol, Epsilon):
+            at = children[-1].stop if len(children) > 0 else start
+            children.append(ParseNode(symbol, at, at))
+        else:
+            children.append(next(values))
+    return ParseNode(head, start, position, index, production, tuple(children))
+
+
+def _reduce(level: Dict[int, _StackNode],
+            lookahead: Optional[str],
+            position: int,
+            rules: List[Tuple],
+            actions: List[Dict],
+            gotos: List[Dict],
+            budget: Optional[ParseBudget],
+            reductions: Optional[List[List[int]]] = None) -> int:
+    """Apply the reductions of the lookahead to the nodes of the current level,
+    until no new node or edge is added. Only the nodes of the level are modified.
+
+    :param reductions: The rules reduced at each state for any lookahead, they are applied instead of
+        the reductions of the lookahead if it is None.
+    :return: The number of new nodes.
+    """
+    def _rules(state: int) -> List[int]:
+        if lookahead is None:
+            return reductions[state]
+        return [rule for kind, rule in actions[state].get(lookahead, ()) if kind == 'r']
+
+    count = 0
+    queue = deque()
+    for node in level.values():
+        for rule in _rules(node.state):
+            queue.append((node, rule, None))
+    while len(queue) > 0:
+        node, rule, edge = queue.popleft()
+        head, body = rules[rule][:2]
+        for below, values in list(_paths(node, len(body), edge)):
+            if budget is not None:
+                budget.step()
+            state = gotos[below.state][head]
+            target = level.get(state)
+            if target is None:
+                target = level[state] = _StackNode(state)
+                target.edges[below] = _build(rules, rule, values, position)
+                count += 1
+                for sub_rule in _rules(state):
+                    queue.append((target, sub_rule, None))
+            elif below not in target.edges:
+                target.edges[below] = _build(rules, rule, values, position)
+                # The paths through the new edge may start from any node of the current level
+                for top in list(level.values()):
+                    for sub_rule in _rules(top.state):
+                        if len(rules[sub_rule][1]) > 0:
+                            queue.append((top, sub_rule, (target, below)))
+    return count
+
+
+def _run(grammar: Grammar,
+         sentence: Union[str, Sequence],
+         remove_useless: bool,
+         budget: Optional[ParseBudget]):
+    """Run the stacks until the end of the sentence or until all of them fail.
+
+    :return: The prepared grammar and tables, the position where the stacks stopped, the nodes
+        of the last level, and the root if the whole sentence is derived.
+    """
+    if budget is not None:
+        budget.start()
+    prepared = _prepare(grammar, remove_useless)
+    grammar, rules, actions, gotos = prepared
+    bottom = _StackNode(0)
+    frontier: Dict[int, _StackNode] = {0: bottom}
+    if len(grammar.productions.get(grammar.start, ())) == 0:
+        return prepared, 0, {}, None
+    node_count = 1
+    for position in range(len(sentence) + 1):
+        lookahead = sentence[position:position + 1]
+        node_count += _reduce(frontier, lookahead, position, rules, actions, gotos, budget)
+        if budget is not None:
+            budget.memo(node_count)
+        if position == len(sentence):
+            break
+        next_frontier: Dict[int, _StackNode] = {}
+        for node in frontier.values():
+            for kind, state in actions[node.state].get(lookahead, ()):
+                if kind == 's':
+                    if budget is not None:
+                        budget.step()
+                    if state not in next_frontier:
+                        next_frontier[state] = _StackNode(state)
+                        node_count += 1
+                    next_frontier[state].edges[node] = ParseNode(grammar.symbols[lookahead], position, position + 1)
+        if len(next_frontier) == 0:
+            return prepared, position, frontier, None
+        frontier = next_frontier
+        if budget is not None:
+            budget.memo(node_count)
+
+    for node in frontier.values():
+        if ('a', 0) in actions[node.state].get('', ()) and bottom in node.edges:
+            return prepared, len(sentence), frontier, node.edges[bottom]
+    return prepared, len(sentence), frontier, None
+
+
+def parse_with_glr(grammar: Grammar,
+                   sentence: Union[str, Sequence],
+                   return_node: bool = False,
+                   remove_useless: bool = True,
+                   budget: Optional[ParseBudget] = None):
+    """Parse the sentence with the generalized LR method.
+
+    The LALR(1) tables are built once. The stacks only fork at the conflicting actions,
+    and the forks share their common parts in a graph-structured stack, so a grammar with
+    few conflicts is parsed in nearly linear time. A terminal matches a character or a token,
+    so the sentences of a grammar with longer terminals should be given in tokens.
+
+    :param grammar: The grammar.
+    :param sentence: The sentence to be parsed, or the tokens in a sequence or a `TokenSequence`.
+    :param return_node: Whether to return the `ParseNode` instead of tuples.
+    :param remove_useless: Whether to parse with the grammar that has no unproductive or unreachable heads.
+    :param budget: The limits of the parse, a step is a shift or a reduction along a path,
+        the memo entries are the nodes of the stack.
+    :return: The parsed tree in the format of `parse_with_unger`, None if the sentence can not be derived.
+    """
+    root = _run(grammar, _as_sentence(sentence), remove_useless, budget)[-1]
+    if root is None or return_node:
+        return root
+    return root.to_unger_tuple()
@@ -1,7 +1,63 @@
-from typing import Optional, Sequence, Dict, Union, Set
+import re
+import hashlib
+import threading
+from types import MappingProxyType
+from typing import Any, Callable, Optional, Sequence, Dict, List, Union, Set, Tuple, Iterable, Iterator, TextIO
 from collections import OrderedDict, deque
 
-__all__ = ['Symbol', 'Epsilon', 'Productions', 'Grammar']
+__all__ = ['Symbol', 'Epsilon', 'Productions', 'Grammar', 'FrozenGrammar']
+
+# The weight of a production is written as the last token of the alternative, e.g. `S -> A B [0.3] | c [0.7]`.
+# It has a decimal point or an exponent, so the tokens like `[1]` are still read as terminals.
+WEIGHT_PATTERN = re.compile(r'^\[([0-9]+\.[0-9]*|\.[0-9]+|[0-9]+(?=[eE]))([eE][+-]?[0-9]+)?\]$')
+EMPTY_TOKENS = {'ε', 'ϵ', ''}
+
+
+def _split_alternatives(head: str, tokens: List[str]) -> List[Tuple[str, List[str], float]]:
+    alternatives, production = [], []
+    tokens = tokens + ['|']
+    for token in tokens:
+        if token == '|':
+            if len(production) == 0:
+                raise RuntimeError(f'Production should not be empty for symbol: {head}')
+            weight = 1.0
+            if len(production) > 1 and production[-1][0] == '[' and WEIGHT_PATTERN.match(production[-1]):
+                weight = float(production.pop()[1:-1])
+            alternatives.append((head, production, weight))
+            production = []
+        else:
+            production.append(token)
+    return alternatives
+
+
+def _read_rules(lines: Iterable[str]) -> Iterator[Tuple[str, List[str], float]]:
+    """Read the productions in the format of `Grammar.parse`, only the tokens of the current head are kept.
+
+    :param lines: The lines of the text.
+    :return: The (head, production, weight) of each alternative.
+    """
+    head, tokens = None, []
+    for line in lines:
+        for token in line.replace('\n', ' ').replace('\r', ' ').split(' '):
+            if token == '->':
+                # The last token is the head of the next rule
+                if head is None:
+                    if len(tokens) != 1:
+                        raise RuntimeError(f'Head should only contain one symbol, but found: {" ".join(tokens)}')
+                elif len(tokens) == 0:
+                    raise RuntimeError(f'Production should not be empty for symbol: {head}')
+                else:
+                    next_head = tokens.pop()
+                    yield from _split_alternatives(head, tokens)
+                    tokens = [next_head]
+                head, tokens = tokens[0], []
+            elif len(token) > 0:
+                tokens.append(token)
+    if head is None:
+        if len(tokens) > 0:
+            raise RuntimeError(f'Head should only contain one symbol, but found: {" ".join(tokens)}')
+        return
+    yield from _split_alternatives(head, tokens)
 
 
 class Symbol(object):
@@ -62,8 +118,22 @@ class ProductionIterator(object):
 class Productions(object):
 
     def __init__(self,
-                 productions: Sequence[Sequence[Symbol]]):
+                 productions: Sequence[Sequence[Symbol]],
+                 weights: Optional[Sequence[float]] = None):
+        """Initialize the alternatives of a head.
+
+        :param productions: The productions.
+        :param weights: The weights (or probabilities) of the productions, 1.0 by default.
+        """
         self.productions = [tuple(production) for production in productions]
+        if weights is None:
+            self.weights = [1.0] * len(self.productions)
+        else:
+            self.weights = list(weights)
+        # The positions of the productions, so the existence is checked in constant time
+        self.indices: Dict[Tuple[Symbol, ...], int] = {}
+        for index, production in enumerate(self.productions):
+            self.indices.setdefault(production, index)
 
     def __iter__(self):
         return ProductionIterator(self)
@@ -75,25 +145,55 @@ class Productions(object):
         return self.productions[index]
 
     def __str__(self):
-        return ' | '.join(map(lambda x: ' '.join(map(str, x)), self.productions))
+        return ' | '.join(map(self.format, range(len(self.productions))))
+
+    def format(self, index: int) -> str:
+        text = ' '.join(map(str, self.productions[index]))
+        if self.weights[index] != 1.0:
+            weight = f'{self.weights[index]:g}'
+            if WEIGHT_PATTERN.match(f'[{weight}]') is None:
+                weight = f'{self.weights[index]:.1f}'
+            text += f' [{weight}]'
+        return text
 
-    def add(self, production: Sequence[Symbol]) -> bool:
+    def weighted(self):
+        return zip(self.productions, self.weights)
+
+    def add(self, production: Sequence[Symbol], weight: float = 1.0) -> bool:
         """Add a new production to the current set.
+        If the production already exists, it keeps the larger weight.
 
         :param production: The new production to be added.
+        :param weight: The weight of the production.
         :return: True if the new production does not exist in the old set.
         """
         production = tuple(production)
-        if not self.exist(production):
-            self.productions.append(tuple(production))
+        index = self.indices.setdefault(production, len(self.productions))
+        if index == len(self.productions):
+            self.productions.append(production)
+            self.weights.append(weight)
             return True
+        self.weights[index] = max(self.weights[index], weight)
         return False
 
-    def exist(self, production: Sequence[Symbol]):
+    def remove(self, production: Sequence[Symbol]) -> bool:
+        """Remove a production from the current set.
+
+        :param production: The production to be removed.
+        :return: True if the production existed.
+        """
         production = tuple(production)
-        if production in self:
-            return True
-        return False
+        index = self.indices.pop(production, None)
+        if index is None:
+            return False
+        del self.productions[index]
+        del self.weights[index]
+        for i in range(index, len(self.productions)):
+            self.indices[self.productions[i]] = i
+        return True
+
+    def exist(self, production: Sequence[Symbol]):
+        return tuple(production) in self.indices
 
 
 class Grammar(object):
@@ -104,17 +204,26 @@ class Grammar(object):
         self.symbols: Dict[str, Symbol] = {'': self.empty_symbol}
         self.composes: Dict[Symbol, Set[Symbol]] = {}
         self.productions: Dict[Symbol, Productions] = OrderedDict()
+        # Increased whenever the productions are modified, the cached analyses are dropped then
+        self.version = 0
+        self._cache_version = None
+        self._cache: Dict[str, Any] = {}
 
     def __str__(self):
-        longest = max(len(str(head)) for head in self.productions.keys())
+        longest = max((len(str(head)) for head in self.productions.keys()), default=0)
         text = ''
-        heads = [self.start] + [head for head in self.productions.keys() if head != self.start]
+        heads = [self.start] if self.start in self.productions else []
+        heads += [head for head in self.productions.keys() if head != self.start]
         for head in heads:
             productions = self.productions[head]
             head = str(head)
-            text += ' ' * (longest - len(head)) + head + ' -> ' + ' '.join(map(str, productions[0])) + '\n'
+            if len(productions) == 0:
+                # The head can not derive anything
+                text += ' ' * (longest - len(head)) + head + ' ->\n'
+                continue
+            text += ' ' * (longest - len(head)) + head + ' -> ' + productions.format(0) + '\n'
             for i in range(1, len(productions)):
-                text += ' ' * (longest + len(' -')) + '| ' + ' '.join(map(str, productions[i])) + '\n'
+                text += ' ' * (longest + len(' -')) + '| ' + productions.format(i) + '\n'
         return text
 
     def reset(self):
@@ -122,10 +231,48 @@ class Grammar(object):
         self.symbols = {'': self.empty_symbol}
         self.composes = {}
         self.productions = OrderedDict()
+        self.version += 1
+
+    def cached(self, key: str, create: Callable[[], Any]):
+        """Get an analysis of the grammar, it is calculated again after the grammar is modified.
+
+        :param key: The name of the analysis.
+        :param create: The function that calculates the analysis.
+        :return: The analysis.
+        """
+        version = (self.version, None if self.start is None else self.start.symbol)
+        if self._cache_version != version:
+            self._cache_version = version
+            self._cache = {}
+        if key not in self._cache:
+            self._cache[key] = create()
+        return self._cache[key]
+
+    def is_cached(self, key: str) -> bool:
+        """Whether the analysis has been calculated since the grammar was last modified."""
+        version = (self.version, None if self.start is None else self.start.symbol)
+        return self._cache_version == version and key in self._cache
+
+    def fingerprint(self) -> str:
+        """Get the digest of the start symbol and the weighted productions.
+        It is calculated again after the grammar is modified.
+
+        :return: The hex digest.
+        """
+        def _create():
+            digest = hashlib.sha256()
+            digest.update(('' if self.start is None else self.start.symbol).encode('utf8'))
+            for head, productions in self.productions.items():
+                digest.update(b'\x1e' + head.symbol.encode('utf8'))
+                for production, weight in productions.weighted():
+                    text = '\x1f'.join(symbol.symbol for symbol in production)
+                    digest.update(f'\x1d{text}\x1d{weight!r}'.encode('utf8'))
+            return digest.hexdigest()
+
+        return self.cached('fingerprint', _create)
 
     def clone(self):
         grammar = Grammar()
-        grammar.empty_symbol = self.empty_symbol
         for name, symbol in self.symbols.items():
             if name == self.empty_symbol.symbol:
                 grammar.symbols[name] = grammar.empty_symbol
@@ -137,10 +284,18 @@ class Grammar(object):
         for symbol, composes in self.composes.items():
             grammar.composes[symbol] = set(grammar.symbols[sym.symbol] for sym in composes)
         for symbol, productions in self.productions.items():
-            grammar.productions[symbol] = Productions([
-                [grammar.symbols[sym.symbol] for sym in production] for production in productions])
+            grammar.productions[grammar.symbols[symbol.symbol]] = Productions([
+                [grammar.symbols[sym.symbol] for sym in production] for production in productions],
+                productions.weights)
         return grammar
 
+    def freeze(self) -> 'FrozenGrammar':
+        """Get an immutable copy with all the analyses calculated, it can be shared by threads.
+
+        :return: The frozen grammar.
+        """
+        return FrozenGrammar(self)
+
     def create_aux(self, symbol: Union[str, Symbol]):
         if isinstance(symbol, str):
             name = symbol
@@ -159,59 +314,131 @@ class Grammar(object):
             self.symbols[symbol] = Symbol(symbol)
         return self.symbols[symbol]
 
-    def add_production(self, head: Symbol, production: Sequence[Symbol]) -> bool:
+    def add_production(self, head: Symbol, production: Sequence[Symbol], weight: float = 1.0) -> bool:
         """Add a new production to the grammar.
 
         :param head: The head to be derived.
         :param production: The new production.
+        :param weight: The weight (or probability) of the production.
         :return: True if the production does not exist in the grammar.
         """
+        self.version += 1
         for symbol in production:
             if symbol not in self.composes:
                 self.composes[symbol] = set()
             self.composes[symbol].add(head)
         if head in self.productions:
-            return self.productions[head].add(production)
-        self.productions[head] = Productions([production])
+            return self.productions[head].add(production, weight)
+        self.productions[head] = Productions([production], [weight])
+        return True
+
+    def remove_production(self, head: Symbol, production: Sequence[Symbol]) -> bool:
+        """Remove a production from the grammar.
+        The head is kept without productions if the last one is removed.
+
+        :param head: The head.
+        :param production: The production to be removed.
+        :return: True if the production existed.
+        """
+        if head not in self.productions or not self.productions[head].remove(production):
+            return False
+        self.version += 1
+        for symbol in set(production):
+            if not any(symbol in remaining for remaining in self.productions[head]):
+                self.composes.get(symbol, set()).discard(head)
         return True
 
     def clean(self, head: Symbol):
+        self.version += 1
         self.productions[head] = Productions([])
 
     def remove(self, head: Symbol):
+        self.version += 1
         del self.productions[head]
 
     def parse(self, text: str):
         self.reset()
-        tokens = [token for token in text.replace('\n', ' ').replace('\r', ' ').split(' ') if len(token) > 0]
-        split_indices = []
-        for i, token in enumerate(tokens):
-            if token == '->':
-                split_indices.append(i - 1)
-        split_indices.append(len(tokens))
-        if split_indices[0] != 0:
-            raise RuntimeError(f'Head should only contain one symbol, but found: '
-                               f'{" ".join(tokens[:split_indices[0] + 1])}')
-        for i in range(len(split_indices) - 1):
-            start, stop = split_indices[i], split_indices[i + 1]
-            head = self.get_or_create_symbol(tokens[start])
-            if self.start is None:
-                self.start = head
-            start += 2
+        self.extend(_read_rules(text.split('\n')))
+
+    def extend(self, rules: Iterable[Tuple]) -> int:
+        """Add the productions in bulk, the duplicated ones are merged like `add_production`.
+
+        :param rules: The (head, production) or (head, production, weight) tuples.
+            The symbols can be names, `ε` or `ϵ` is the empty symbol.
+            The first head becomes the start symbol if there is none.
+        :return: The number of new productions.
+        """
+        count, symbols, composes = 0, self.symbols, self.composes
+        # The alternatives of the heads by their names, so the symbols are not hashed for the lookup
+        alternatives: Dict[str, Productions] = {}
+        for rule in rules:
+            head, body = rule[0], rule[1]
+            if isinstance(head, Symbol):
+                head = head.symbol
+            productions = alternatives.get(head)
+            if productions is None:
+                head = self._get_symbol(head)
+                if head not in self.productions:
+                    self.productions[head] = Productions([])
+                productions = alternatives[head.symbol] = self.productions[head]
+            else:
+                head = symbols[head]
             production = []
-            for j in range(start, stop):
-                if tokens[j] == '|':
-                    if len(production) == 0:
-                        raise RuntimeError(f'Production should not be empty for symbol: {head}')
-                    self.add_production(head, production)
-                    production = []
-                elif tokens[j] in {'ε', 'ϵ'}:
-                    production.append(self.empty_symbol)
-                else:
-                    production.append(self.get_or_create_symbol(tokens[j]))
+            for symbol in body:
+                if isinstance(symbol, Symbol):
+                    symbol = symbol.symbol
+                production.append(symbols[symbol] if symbol in symbols else self._get_symbol(symbol))
             if len(production) == 0:
                 raise RuntimeError(f'Production should not be empty for symbol: {head}')
-            self.add_production(head, production)
+            if self.start is None:
+                self.start = head
+            if productions.add(production, rule[2] if len(rule) > 2 else 1.0):
+                count += 1
+                for symbol in production:
+                    heads = composes.get(symbol)
+                    if heads is None:
+                        composes[symbol] = {head}
+                    else:
+                        heads.add(head)
+        self.version += 1
+        return count
+
+    def _get_symbol(self, symbol: Union[str, Symbol]) -> Symbol:
+        if isinstance(symbol, Symbol):
+            symbol = symbol.symbol
+        if symbol in EMPTY_TOKENS:
+            return self.empty_symbol
+        return self.get_or_create_symbol(symbol)
+
+    @staticmethod
+    def from_rules(rules: Iterable[Tuple], start: Optional[str] = None) -> 'Grammar':
+        """Build a grammar from the rules in one pass.
+
+        :param rules: The (head, production) or (head, production, weight) tuples, see `extend`.
+        :param start: The name of the start symbol, the first head is used if it is None.
+        :return: The grammar.
+        """
+        grammar = Grammar()
+        if start is not None:
+            grammar.start = grammar.get_or_create_symbol(start)
+        grammar.extend(rules)
+        return grammar
+
+    @staticmethod
+    def load(source: Union[str, TextIO], encoding: str = 'utf8') -> 'Grammar':
+        """Read a grammar in the format of `parse` line by line, the whole text is never kept in memory.
+
+        :param source: The path of the file, or an opened text file.
+        :param encoding: The encoding of the file.
+        :return: The grammar.
+        """
+        grammar = Grammar()
+        if hasattr(source, 'read'):
+            grammar.extend(_read_rules(source))
+        else:
+            with open(source, 'r', encoding=encoding) as reader:
+                grammar.extend(_read_rules(reader))
+        return grammar
 
     def is_terminal(self, symbol: Union[str, Symbol]):
         if isinstance(symbol, str):
@@ -267,10 +494,157 @@ class Grammar(object):
             if min_length < getattr(symbol, attr_name):
                 setattr(symbol, attr_name, min_length)
                 for head in self.composes.get(symbol, ()):
-                    if head not in in_queue:
+                    if head not in in_queue and self.is_non_terminal(head):
                         queue.append(head)
                         in_queue.add(head)
 
+    def _init_boundary(self, attr_name: str, reverse: bool):
+        self.init_nullable()
+        queue, in_queue = deque(), set()
+        for symbol in self.symbols.values():
+            if self.is_terminal(symbol):
+                setattr(symbol, attr_name, set() if isinstance(symbol, Epsilon) else {symbol.symbol})
+            else:
+                queue.append(symbol)
+                in_queue.add(symbol)
+                setattr(symbol, attr_name, set())
+        while len(queue) > 0:
+            symbol = queue.popleft()
+            in_queue.remove(symbol)
+            boundary = set(getattr(symbol, attr_name))
+            for production in self.productions[symbol]:
+                for child in (reversed(production) if reverse else production):
+                    boundary |= getattr(child, attr_name)
+                    if child.nullable is not True:
+                        break
+            if len(boundary) > len(getattr(symbol, attr_name)):
+                setattr(symbol, attr_name, boundary)
+                for head in self.composes.get(symbol, ()):
+                    if head not in in_queue and self.is_non_terminal(head):
+                        queue.append(head)
+                        in_queue.add(head)
+
+    def init_first(self):
+        """Calculate the terminals that can begin the derivations of each symbol."""
+        self._init_boundary('first', reverse=False)
+
+    def init_last(self):
+        """Calculate the terminals that can end the derivations of each symbol."""
+        self._init_boundary('last', reverse=True)
+
+    def init_follow(self):
+        """Calculate the terminals that can follow each symbol in the derivations of the start symbol.
+        The end of the sentence is represented by an empty string.
+        The FIRST sets are calculated as well.
+        """
+        self.init_first()
+        attr_name = 'follow'
+        for symbol in self.symbols.values():
+            setattr(symbol, attr_name, set())
+        if self.start is not None:
+            getattr(self.start, attr_name).add('')
+        has_update = True
+        while has_update:
+            has_update = False
+            for head, productions in self.productions.items():
+                for production in productions:
+                    follow = set(getattr(head, attr_name))
+                    for symbol in reversed(production):
+                        current = getattr(symbol, attr_name)
+                        if not follow <= current:
+                            current |= follow
+                            has_update = True
+                        if symbol.nullable is True:
+                            follow = follow | symbol.first
+                        else:
+                            follow = set(symbol.first)
+
+    def boundary_characters(self, whole_terminals: bool = False) -> Dict[Symbol, Tuple[Set[str], Set[str], Set[str]]]:
+        """Get the characters that can begin, end and follow the derivations of each head.
+        The FIRST, LAST and FOLLOW sets should be calculated.
+
+        :param whole_terminals: Whether to get the terminals instead of their characters,
+            it is used when a terminal matches a whole token.
+        :return: The characters of the heads.
+        """
+        if whole_terminals:
+            return {head: (set(head.first), set(head.last), set(head.follow)) for head in self.productions.keys()}
+        return {
+            head: ({terminal[0] for terminal in head.first},
+                   {terminal[-1] for terminal in head.last},
+                   {terminal[:1] for terminal in head.follow})
+            for head in self.productions.keys()
+        }
+
+    def _rebuild_composes(self):
+        self.composes = {}
+        for head, productions in self.productions.items():
+            for production in productions:
+                for symbol in production:
+                    self.composes.setdefault(symbol, set()).add(head)
+
+    def remove_unproductive(self):
+        """Remove the heads that can not derive any terminal string and the productions that contain them.
+        The start symbol is kept without productions if it is unproductive.
+        """
+        # The number of distinct heads in each production that are not known to be productive
+        pending: Dict[Tuple[Symbol, int], int] = {}
+        occurrences: Dict[Symbol, List[Tuple[Symbol, int]]] = {}
+        queue = deque()
+        for head, productions in self.productions.items():
+            for index, production in enumerate(productions):
+                heads = set(symbol for symbol in production if self.is_non_terminal(symbol))
+                pending[(head, index)] = len(heads)
+                for symbol in heads:
+                    occurrences.setdefault(symbol, []).append((head, index))
+                if len(heads) == 0:
+                    queue.append(head)
+        productive = set()
+        while len(queue) > 0:
+            head = queue.popleft()
+            if head in productive:
+                continue
+            productive.add(head)
+            for key in occurrences.get(head, ()):
+                pending[key] -= 1
+                if pending[key] == 0:
+                    queue.append(key[0])
+        if all(count == 0 for count in pending.values()):
+            return
+        self.version += 1
+        for head in list(self.productions.keys()):
+            productions = self.productions[head]
+            if head not in productive:
+                if head == self.start:
+                    self.productions[head] = Productions([])
+                else:
+                    del self.productions[head]
+                continue
+            kept = [index for index in range(len(productions)) if pending[(head, index)] == 0]
+            if len(kept) < len(productions):
+                self.productions[head] = Productions([productions[index] for index in kept],
+                                                     [productions.weights[index] for index in kept])
+        self._rebuild_composes()
+
+    def remove_useless(self):
+        """Remove the unproductive heads, then the unreachable ones."""
+        self.remove_unproductive()
+        if self.start is not None:
+            self.remove_unreachable()
+
+    def reduced(self) -> 'Grammar':
+        """Get a copy of the grammar without useless symbols.
+        The result is cached until the grammar is modified.
+
+        :return: The reduced grammar.
+        """
+        def _create():
+            grammar = self.clone()
+            grammar.remove_useless()
+            return grammar
+
+        return self.cached('reduced', _create)
+
     def remove_unreachable(self):
         queue, in_queue = deque(), set()
         queue.append(self.start)
@@ -286,3 +660,86 @@ class Grammar(object):
         for head in heads:
             if head not in in_queue:
                 self.remove(head)
+        self._rebuild_composes()
+
+
+class FrozenGrammar(Grammar):
+
+    def __init__(self, grammar: Grammar):
+        """Initialize an immutable copy of the grammar.
+
+        The nullables, minimal lengths, FIRST, LAST and FOLLOW sets are calculated here, and the `init_*` methods
+        do nothing afterwards. The methods that modify the grammar raise `RuntimeError`. The parsers
+        only read the grammar, the results of `cached` are calculated once under a lock.
+
+        :param grammar: The grammar.
+        """
+        super().__init__()
+        source = grammar.clone()
+        source.init_nullable()
+        source.init_min_length()
+        source.init_last()
+        source.init_follow()
+        self.start = source.start
+        self.empty_symbol = source.empty_symbol
+        self.symbols = MappingProxyType(source.symbols)
+        self.composes = MappingProxyType(source.composes)
+        self.productions = MappingProxyType(source.productions)
+        self.version = grammar.version
+        self._lock = threading.RLock()
+        self._frozen = True
+
+    def __setattr__(self, key, value):
+        if getattr(self, '_frozen', False):
+            raise RuntimeError('The grammar is frozen')
+        super().__setattr__(key, value)
+
+    def _modify(self, *args, **kwargs):
+        raise RuntimeError('The grammar is frozen')
+
+    reset = add_production = remove_production = clean = remove = parse = extend = create_aux = _modify
+    remove_unproductive = remove_useless = remove_unreachable = _rebuild_composes = _modify
+
+    def get_or_create_symbol(self, symbol: str):
+        if symbol not in self.symbols:
+            self._modify()
+        return self.symbols[symbol]
+
+    def cached(self, key: str, create: Callable[[], Any]):
+        if key in self._cache:
+            return self._cache[key]
+        with self._lock:
+            if key not in self._cache:
+                self._cache[key] = create()
+            return self._cache[key]
+
+    def is_cached(self, key: str) -> bool:
+        return key in self._cache
+
+    def freeze(self) -> 'FrozenGrammar':
+        return self
+
+    def reduced(self) -> 'FrozenGrammar':
+        def _create():
+            grammar = self.clone()
+            grammar.remove_useless()
+            grammar = FrozenGrammar(grammar)
+            grammar._cache['reduced'] = grammar
+            return grammar
+
+        return self.cached('reduced', _create)
+
+    def init_nullable(self):
+        pass
+
+    def init_min_length(self):
+        pass
+
+    def init_first(self):
+        pass
+
+    def init_last(self):
+        pass
+
+    def init_follow(self):
+        pass
@@ -0,0 +1,365 @@
+from collections import Counter, deque
+from itertools import product as cartesian_product
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+from parse_toys.grammar import Symbol, Epsilon, Grammar
+from parse_toys.cyk import _recognize, _reconstruct
+
+__all__ = ['IncrementalCNF']
+
+
+class IncrementalCNF(object):
+
+    def __init__(self, grammar: Grammar):
+        """Maintain the Chomsky Normal Form of a grammar while its productions are added or removed.
+
+        Every head of the grammar keeps its name in Chomsky Normal Form and derives the same non-empty strings,
+        so `head_mapping` is the identity. The start symbol gets an ε-production if it is nullable.
+        The `T_*` heads for terminals and the `N_*` heads for binarization are shared and reference counted,
+        they are removed when no production uses them. The weights are only kept in the source grammar.
+
+        :param grammar: The source grammar, it should be modified through this object afterwards.
+        """
+        self.grammar = grammar
+        self.cnf_grammar = Grammar()
+        self.rebuild()
+
+    def rebuild(self):
+        """Build the Chomsky Normal Form from scratch."""
+        self.cnf_grammar.reset()
+        self._nullable: Set[Symbol] = set()
+        # The ε-expansions of each production of the source grammar, as (unit target, body) pairs
+        self._expansions: Dict[Tuple[Symbol, Tuple[Symbol, ...]], List[Tuple[Optional[Symbol], tuple]]] = {}
+        # The non-unit bodies produced by each head itself, and the targets of its unit productions
+        self._own: Dict[Symbol, Counter] = {}
+        self._units: Dict[Symbol, Counter] = {}
+        # closure[A] is the set of heads reachable from A by unit productions, reverse_closure is its inverse
+        self._closure: Dict[Symbol, Set[Symbol]] = {}
+        self._reverse_closure: Dict[Symbol, Set[Symbol]] = {}
+        # The number of heads in the closure that provide each body of a head in Chomsky Normal Form
+        self._provided: Dict[Symbol, Counter] = {}
+        self._singles: Dict[Symbol, Symbol] = {}
+        self._duals: Dict[Tuple[Symbol, Symbol], Symbol] = {}
+        self._references: Counter = Counter()
+        self._bodies: Dict[Symbol, Tuple[Symbol, ...]] = {}
+        self.grammar.init_nullable()
+        for head in self.grammar.productions.keys():
+            self._ensure_head(head)
+            if head.nullable is True:
+                self._nullable.add(head)
+        for head, productions in self.grammar.productions.items():
+            for production in productions:
+                self._expand(head, production)
+        self._update_start()
+
+    @property
+    def head_mapping(self) -> Dict[Symbol, Symbol]:
+        return {head: self.cnf_grammar.symbols[head.symbol] for head in self.grammar.productions.keys()}
+
+    def add_production(self, head: Symbol, production: Sequence[Symbol], weight: float = 1.0) -> bool:
+        """Add a production to the source grammar and update the affected heads in Chomsky Normal Form.
+
+        :param head: The head.
+        :param production: The new production.
+        :param weight: The weight of the production in the source grammar.
+        :return: True if the production does not exist in the grammar.
+        """
+        production = tuple(production)
+        new_head = self.grammar.is_terminal(head)
+        if not self.grammar.add_production(head, production, weight):
+            return False
+        if any(self._is_auxiliary(symbol) for symbol in (head,) + production):
+            # The name is used by an auxiliary head
+            self.rebuild()
+            return True
+        self._ensure_head(head)
+        changed = set()
+        if new_head:
+            # The symbol was used as a terminal
+            changed.add(head)
+        if head not in self._nullable and all(self._is_nullable(symbol) for symbol in production):
+            changed |= self._propagate_nullable(head)
+        self._expand(head, production)
+        self._update_productions_of(changed, skip=(head, production))
+        self._update_start()
+        return True
+
+    def remove_production(self, head: Symbol, production: Sequence[Symbol]) -> bool:
+        """Remove a production from the source grammar and update the affected heads in Chomsky Normal Form.
+
+        :param head: The head.
+        :param production: The production to be removed.
+        :return: True if the production existed.
+        """
+        production = tuple(production)
+        if not self.grammar.remove_production(head, production):
+            return False
+        self._unexpand(head, production)
+        changed = set()
+        if head in self._nullable and all(self._is_nullable(symbol) for symbol in production):
+            changed = self._revise_nullable(head)
+        self._update_productions_of(changed)
+        self._update_start()
+        return True
+
+    def parse(self, sentence: str, return_node: bool = False):
+        """Parse the sentence with CYK over the maintained Chomsky Normal Form.
+
+        :param sentence: The sentence to be parsed.
+        :param return_node: Whether to return the `ParseNode` instead of tuples.
+        :return: The parsed tree in the format of `parse_with_cyk`, None if the sentence can not be derived.
+        """
+        self.grammar.init_nullable()
+        self.grammar.init_last()
+        self.grammar.init_follow()
+        rec = _recognize(self.cnf_grammar, sentence)
+        root = _reconstruct(self.grammar, self.head_mapping, rec, sentence)
+        if root is None or return_node:
+            return root
+        return root.to_cyk_tuple()
+
+    def _cnf_symbol(self, symbol: Symbol) -> Symbol:
+        if isinstance(symbol, Epsilon):
+            return self.cnf_grammar.empty_symbol
+        return self.cnf_grammar.get_or_create_symbol(symbol.symbol)
+
+    def _is_auxiliary(self, symbol: Symbol) -> bool:
+        cnf_symbol = self.cnf_grammar.symbols.get(symbol.symbol)
+        return cnf_symbol is not None and cnf_symbol.auxiliary
+
+    def _is_nullable(self, symbol: Symbol) -> bool:
+        return isinstance(symbol, Epsilon) or symbol in self._nullable
+
+    def _ensure_head(self, head: Symbol):
+        if head in self._own:
+            return
+        self._own[head] = Counter()
+        self._units[head] = Counter()
+        self._closure[head] = {head}
+        self._reverse_closure.setdefault(head, set()).add(head)
+        self._provided[head] = Counter()
+        cnf_head = self._cnf_symbol(head)
+        if cnf_head not in self.cnf_grammar.productions:
+            self.cnf_grammar.clean(cnf_head)
+
+    def _propagate_nullable(self, head: Symbol) -> Set[Symbol]:
+        """Mark the head and the heads that become nullable because of it."""
+        changed, queue = set(), deque([head])
+        self._nullable.add(head)
+        while len(queue) > 0:
+            symbol = queue.popleft()
+            changed.add(symbol)
+            for parent in self.grammar.composes.get(symbol, ()):
+                if parent in self._nullable or self.grammar.is_terminal(parent):
+                    continue
+                if any(all(self._is_nullable(child) for child in production)
+                       for production in self.grammar.productions[parent]):
+                    self._nullable.add(parent)
+                    queue.append(parent)
+        return changed
+
+    def _revise_nullable(self, head: Symbol) -> Set[Symbol]:
+        """Calculate the nullables again for the nullable heads that may depend on the head."""
+        region, queue = {head}, deque([head])
+        while len(queue) > 0:
+            symbol = queue.popleft()
+            for parent in self.grammar.composes.get(symbol, ()):
+                if parent in self._nullable and parent not in region and self.grammar.is_non_terminal(parent):
+                    region.add(parent)
+                    queue.append(parent)
+        self._nullable -= region
+        has_update = True
+        while has_update:
+            has_update = False
+            for symbol in region:
+                if symbol in self._nullable:
+                    continue
+                if any(all(self._is_nullable(child) for child in production)
+                       for production in self.grammar.productions[symbol]):
+                    self._nullable.add(symbol)
+                    has_update = True
+        return {symbol for symbol in region if symbol not in self._nullable}
+
+    def _update_productions_of(self, changed: Set[Symbol], skip: Optional[Tuple] = None):
+        """Expand again the productions containing the symbols whose nullability or kind has changed."""
+        keys = set()
+        for symbol in changed:
+            for parent in self.grammar.composes.get(symbol, ()):
+                if self.grammar.is_terminal(parent):
+                    continue
+                for production in self.grammar.productions[parent]:
+                    if symbol in production:
+                        keys.add((parent, production))
+        keys.discard(skip)
+        for head, production in keys:
+            self._unexpand(head, production)
+            self._expand(head, production)
+
+    def _expand(self, head: Symbol, production: Tuple[Symbol, ...]):
+        choices = []
+        for symbol in production:
+            if isinstance(symbol, Epsilon):
+                choices.append(((),))
+            elif self._is_nullable(symbol):
+                choices.append(((symbol,), ()))
+            else:
+                choices.append(((symbol,),))
+        expansions = []
+        for parts in set(cartesian_product(*choices)):
+            expansion = tuple(symbol for part in parts for symbol in part)
+            if len(expansion) == 0:
+                continue
+            if len(expansion) == 1 and self.grammar.is_non_terminal(expansion[0]):
+                self._ensure_head(expansion[0])
+                self._add_unit(head, expansion[0])
+                expansions.append((expansion[0], ()))
+            else:
+                body = self._bind(expansion)
+                self._add_body(head, body)
+                expansions.append((None, body))
+        self._expansions[(head, production)] = expansions
+
+    def _unexpand(self, head: Symbol, production: Tuple[Symbol, ...]):
+        for target, body in self._expansions.pop((head, production), ()):
+            if target is not None:
+                self._remove_unit(head, target)
+            else:
+                self._remove_body(head, body)
+                self._unbind(body)
+
+    def _bind(self, expansion: Tuple[Symbol, ...]) -> Tuple[Symbol, ...]:
+        """Get the body in Chomsky Normal Form, the auxiliary heads used are referenced."""
+        if len(expansion) == 1:
+            return self._cnf_symbol(expansion[0]),
+        symbols = [self._single(symbol) for symbol in expansion]
+        last = symbols[0]
+        for symbol in symbols[1:-1]:
+            last = self._dual(last, symbol)
+        return last, symbols[-1]
+
+    def _unbind(self, body: Tuple[Symbol, ...]):
+        if len(body) == 2:
+            for symbol in body:
+                self._release(symbol)
+
+    def _single(self, symbol: Symbol) -> Symbol:
+        if self.grammar.is_non_terminal(symbol):
+            self._ensure_head(symbol)
+            return self._cnf_symbol(symbol)
+        if symbol in self._singles:
+            head = self._singles[symbol]
+            self._references[head] += 1
+            return head
+        head = self.cnf_grammar.create_aux('T')
+        self.cnf_grammar.add_production(head, [self._cnf_symbol(symbol)])
+        self._singles[symbol] = head
+        self._bodies[head] = (symbol,)
+        self._references[head] = 1
+        return head
+
+    def _dual(self, left: Symbol, right: Symbol) -> Symbol:
+        """Get the head of `left right`, the references of the two symbols are taken over."""
+        if (left, right) in self._duals:
+            head = self._duals[(left, right)]
+            self._references[head] += 1
+            self._release(left)
+            self._release(right)
+            return head
+        head = self.cnf_grammar.create_aux('N')
+        self.cnf_grammar.add_production(head, [left, right])
+        self._duals[(left, right)] = head
+        self._bodies[head] = (left, right)
+        self._references[head] = 1
+        return head
+
+    def _release(self, symbol: Symbol):
+        if symbol not in self._bodies:
+            return
+        self._references[symbol] -= 1
+        if self._references[symbol] > 0:
+            return
+        del self._references[symbol]
+        body = self._bodies.pop(symbol)
+        # The name can be created again, so the old symbol should not be left anywhere
+        self.cnf_grammar.remove(symbol)
+        del self.cnf_grammar.symbols[symbol.symbol]
+        self.cnf_grammar.composes.pop(symbol, None)
+        for child in body:
+            self.cnf_grammar.composes.get(self._cnf_symbol(child) if len(body) == 1 else child, set()).discard(symbol)
+        if len(body) == 1:
+            del self._singles[body[0]]
+        else:
+            del self._duals[body]
+            self._release(body[0])
+            self._release(body[1])
+
+    def _add_body(self, head: Symbol, body: Tuple[Symbol, ...]):
+        self._own[head][body] += 1
+        if self._own[head][body] == 1:
+            for ancestor in self._reverse_closure[head]:
+                self._provide(ancestor, body, 1)
+
+    def _remove_body(self, head: Symbol, body: Tuple[Symbol, ...]):
+        self._own[head][body] -= 1
+        if self._own[head][body] == 0:
+            del self._own[head][body]
+            for ancestor in self._reverse_closure[head]:
+                self._provide(ancestor, body, -1)
+
+    def _provide(self, head: Symbol, body: Tuple[Symbol, ...], delta: int):
+        provided = self._provided[head]
+        provided[body] += delta
+        cnf_head = self._cnf_symbol(head)
+        if provided[body] == 0:
+            del provided[body]
+            self.cnf_grammar.remove_production(cnf_head, body)
+        elif provided[body] == delta == 1:
+            self.cnf_grammar.add_production(cnf_head, body)
+
+    def _add_unit(self, head: Symbol, target: Symbol):
+        self._units[head][target] += 1
+        if self._units[head][target] == 1 and target not in self._closure[head]:
+            self._update_closures(head)
+
+    def _remove_unit(self, head: Symbol, target: Symbol):
+        self._units[head][target] -= 1
+        if self._units[head][target] == 0:
+            del self._units[head][target]
+            self._update_closures(head)
+
+    def _update_closures(self, head: Symbol):
+        """Calculate the unit closures again for the heads that can reach the head by unit productions."""
+        for ancestor in list(self._reverse_closure[head]):
+            closure, queue = {ancestor}, deque([ancestor])
+            while len(queue) > 0:
+                symbol = queue.popleft()
+                for target in self._units[symbol]:
+                    if target not in closure:
+                        closure.add(target)
+                        queue.append(target)
+            old_closure = self._closure[ancestor]
+            for symbol in old_closure - closure:
+                self._reverse_closure[symbol].discard(ancestor)
+                for body in self._own[symbol]:
+                    self._provide(ancestor, body, -1)
+            for symbol in closure - old_closure:
+                self._reverse_closure[symbol].add(ancestor)
+                for body in self._own[symbol]:
+                    self._provide(ancestor, body, 1)
+            self._closure[ancestor] = closure
+
+    def _update_start(self):
+        start = self.grammar.start
+        if start is None or self.grammar.is_terminal(start):
+            return
+        self._ensure_head(start)
+        cnf_start = self._cnf_symbol(start)
+        if self.cnf_grammar.start is not None and self.cnf_grammar.start != cnf_start:
+            self.cnf_grammar.remove_production(self.cnf_grammar.start, (self.cnf_grammar.empty_symbol,))
+        self.cnf_grammar.start = cnf_start
+        epsilon = (self.cnf_grammar.empty_symbol,)
+        if start in self._nullable:
+            if not self.cnf_grammar.productions[cnf_start].exist(epsilon):
+                self.cnf_grammar.add_production(cnf_start, epsilon)
+        else:
+            self.cnf_grammar.remove_production(cnf_start, epsilon)
@@ -0,0 +1,393 @@
+import json
+import asyncio
+import ipaddress
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Union
+
+from parse_toys.grammar import Grammar
+from parse_toys.codegen import compile_cyk, compile_unger
+from parse_toys.budget import ParseBudget, BudgetExceeded
+
+__all__ = ['ParseService', 'ParseClient', 'serve']
+
+# The compiled parsers in a worker process
+_PARSERS: Dict[str, Any] = {}
+
+
+def _check_loopback(host: str):
+    if host == 'localhost':
+        return
+    try:
+        if ipaddress.ip_address(host).is_loopback:
+            return
+    except ValueError:
+        pass
+    raise ValueError(f'Only the loopback interface is allowed, but found: {host}')
+
+
+def _compile(grammars: Dict[str, Grammar], method: str, cache_dir: Optional[str]) -> Dict[str, Any]:
+    compile_parser = {'cyk': compile_cyk, 'unger': compile_unger}[method]
+    # The analyses are cached on copies, so the grammars sent to the workers only hold their rules
+    return {name: compile_parser(grammar.clone(), cache_dir=cache_dir) for name, grammar in grammars.items()}
+
+
+def _load(grammar: Union[str, Grammar]) -> Grammar:
+    """Parse the text of a grammar, or copy a grammar with its heads that have no productions."""
+    if isinstance(grammar, Grammar):
+        return grammar.clone()
+    loaded = Grammar()
+    loaded.parse(grammar)
+    return loaded
+
+
+def _init_worker(grammars: Dict[str, Grammar], method: str, cache_dir: Optional[str]):
+    _PARSERS.clear()
+    _PARSERS.update(_compile(grammars, method, cache_dir))
+
+
+def _parse_batch(name: str, sentences: List[str], deadlines: List[float]) -> list:
+    """Parse the sentences in a worker process, an error only fails its own sentence.
+
+    :param name: The name of the grammar.
+    :param sentences: The sentences.
+    :param deadlines: The `time.monotonic()` after which the parses of the sentences are stopped.
+    :return: The (tree, error) pairs of the sentences.
+    """
+    parser = _PARSERS[name]
+    results = []
+    for sentence, deadline in zip(sentences, deadlines):
+        try:
+            results.append((parser(sentence, budget=ParseBudget(deadline=deadline)), None))
+        except BudgetExceeded:
+            results.append((None, 'timeout'))
+        except Exception as e:
+            results.append((None, str(e)))
+    return results
+
+
+def _to_tuple(tree):
+    if isinstance(tree, list):
+        return tuple(map(_to_tuple, tree))
+    return tree
+
+
+class ParseService(object):
+
+    def __init__(self,
+                 grammars: Union[str, Grammar, Dict[str, Union[str, Grammar]]],
+                 method: str = 'cyk',
+                 host: str = '127.0.0.1',
+                 port: int = 0,
+                 path: Optional[str] = None,
+                 workers: int = 1,
+                 batch_size: int = 32,
+                 batch_delay: float = 0.002,
+                 max_queue: int = 1024,
+                 timeout: float = 10.0,
+                 cache_dir: Optional[str] = None):
+        """Initialize a parsing service that only accepts local connections.
+
+        Every line received is a JSON request like `{"id": 1, "grammar": "name", "sentence": "...", "timeout": 1.0}`,
+        where `grammar` and `timeout` are optional. The response is a JSON line with the same `id`,
+        and either `accepted` and `tree`, or `error`.
+
+        :param grammars: The grammar, or a dict from names to grammars. A grammar could be its text,
+            a `Grammar` is copied with all its rules.
+        :param method: 'cyk' or 'unger', the grammars are compiled with `compile_cyk` or `compile_unger`.
+        :param host: The loopback address to listen on.
+        :param port: The TCP port, a free one is chosen if it is 0.
+        :param path: The path of the Unix socket, the host and port are ignored if it is given.
+        :param workers: The number of worker processes.
+        :param batch_size: The maximum number of requests sent to a worker at once.
+        :param batch_delay: The seconds to wait for more requests before sending a batch that is not full.
+        :param max_queue: The maximum number of waiting requests, reading from the connections is paused if it is full.
+        :param timeout: The default seconds before a request fails, the worker stops parsing it at the deadline.
+        :param cache_dir: The directory of the generated modules.
+        """
+        if isinstance(grammars, (str, Grammar)):
+            grammars = {'default': grammars}
+        if len(grammars) == 0:
+            raise ValueError('At least one grammar is required')
+        if method not in {'cyk', 'unger'}:
+            raise ValueError(f'Unknown method: {method}')
+        if path is None:
+            _check_loopback(host)
+        # The grammars are sent to the workers as they are, the printed text does not keep all of them
+        self.grammars = {name: _load(grammar) for name, grammar in grammars.items()}
+        self.default_grammar = next(iter(self.grammars.keys()))
+        self.method = method
+        self.host = host
+        self.port = port
+        self.path = path
+        self.workers = workers
+        self.batch_size = batch_size
+        self.batch_delay = batch_delay
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.cache_dir = cache_dir
+        self.server = None
+        self.executor = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._batcher = None
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    async def start(self) -> 'ParseService':
+        # The modules are generated here, the workers only load them from the cache
+        _compile(self.grammars, self.method, self.cache_dir)
+        self.executor = ProcessPoolExecutor(self.workers,
+                                            initializer=_init_worker,
+                                            initargs=(self.grammars, self.method, self.cache_dir))
+        self._queue = asyncio.Queue(self.max_queue)
+        self._slots = asyncio.Semaphore(self.workers)
+        self._batcher = asyncio.ensure_future(self._batch_loop())
+        if self.path is None:
+            self.server = await asyncio.start_server(self._handle, self.host, self.port)
+            self.port = self.server.sockets[0].getsockname()[1]
+        else:
+            self.server = await asyncio.start_unix_server(self._handle, self.path)
+        return self
+
+    async def close(self):
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+            self.server = None
+        if self._batcher is not None:
+            self._batcher.cancel()
+            try:
+                await self._batcher
+            except asyncio.CancelledError:
+                pass
+            self._batcher = None
+        if self.executor is not None:
+            self.executor.shutdown(wait=True, cancel_futures=True)
+            self.executor = None
+
+    async def _batch_loop(self):
+        while True:
+            # Wait for an idle worker first, so that the requests pile up in the bounded queue
+            await self._slots.acquire()
+            batch = [await self._queue.get()]
+            if self.batch_delay > 0 and self._queue.qsize() + 1 < self.batch_size:
+                await asyncio.sleep(self.batch_delay)
+            while len(batch) < self.batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            asyncio.ensure_future(self._run_batch(batch))
+
+    async def _run_batch(self, batch: list):
+        loop = asyncio.get_running_loop()
+        try:
+            now = loop.time()
+            groups: Dict[str, list] = {}
+            for name, sentence, future, deadline in batch:
+                if future.done():
+                    continue
+                if deadline <= now:
+                    future.cancel()
+                    continue
+                groups.setdefault(name, []).append((sentence, future, deadline))
+            for name, items in groups.items():
+                try:
+                    # The clock of the loop is `time.monotonic()`, so the workers stop at the same deadlines
+                    trees = await loop.run_in_executor(self.executor, _parse_batch, name,
+                                                       [sentence for sentence, _, _ in items],
+                                                       [deadline for _, _, deadline in items])
+                except Exception as e:
+                    for _, future, _ in items:
+                        if not future.done():
+                            future.set_exception(e)
+                    continue
+                for (_, future, _), (tree, error) in zip(items, trees):
+                    if future.done():
+                        continue
+                    if error is None:
+                        future.set_result(tree)
+                    else:
+                        future.set_exception(RuntimeError(error))
+        finally:
+            self._slots.release()
+
+    @staticmethod
+    async def _send(writer: asyncio.StreamWriter, lock: asyncio.Lock, response: dict):
+        async with lock:
+            try:
+                writer.write((json.dumps(response, ensure_ascii=False) + '\n').encode('utf8'))
+                await writer.drain()
+            except ConnectionError:
+                pass
+
+    async def _respond(self, writer, lock, request_id, future: asyncio.Future, deadline: float):
+        response = {'id': request_id}
+        done, _ = await asyncio.wait([future], timeout=max(0.0, deadline - asyncio.get_running_loop().time()))
+        if len(done) == 0 or future.cancelled():
+            future.cancel()
+            response['error'] = 'timeout'
+        elif future.exception() is not None:
+            response['error'] = str(future.exception())
+        else:
+            tree = future.result()
+            response['accepted'] = tree is not None
+            response['tree'] = tree
+        await self._send(writer, lock, response)
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        loop = asyncio.get_running_loop()
+        lock = asyncio.Lock()
+        tasks = set()
+        try:
+            while True:
+                line = await reader.readline()
+                if len(line) == 0:
+                    break
+                if len(line.strip()) == 0:
+                    continue
+                arrival = loop.time()
+                try:
+                    request = json.loads(line)
+                    request_id = request.get('id')
+                    name = request.get('grammar', self.default_grammar)
+                    sentence = request['sentence']
+                    timeout = float(request.get('timeout', self.timeout))
+                    if not isinstance(sentence, str):
+                        raise TypeError('The sentence should be a string')
+                except (ValueError, KeyError, TypeError, AttributeError):
+                    await self._send(writer, lock, {'id': None, 'error': 'invalid request'})
+                    continue
+                if name not in self.grammars:
+                    await self._send(writer, lock, {'id': request_id, 'error': f'unknown grammar: {name}'})
+                    continue
+                future = loop.create_future()
+                task = asyncio.ensure_future(self._respond(writer, lock, request_id, future, arrival + timeout))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+                try:
+                    # Reading from the connection pauses while the queue is full
+                    await asyncio.wait_for(self._queue.put((name, sentence, future, arrival + timeout)), timeout)
+                except asyncio.TimeoutError:
+                    future.cancel()
+            if len(tasks) > 0:
+                await asyncio.gather(*tasks)
+        finally:
+            writer.close()
+
+
+class ParseClient(object):
+
+    def __init__(self, host: str = '127.0.0.1', port: Optional[int] = None, path: Optional[str] = None):
+        """Initialize a client of `ParseService`.
+
+        :param host: The loopback address of the service.
+        :param port: The TCP port of the service.
+        :param path: The path of the Unix socket, the host and port are ignored if it is given.
+        """
+        if path is None:
+            _check_loopback(host)
+        self.host = host
+        self.port = port
+        self.path = path
+        self.reader: Optional[asyncio.StreamReader] = None
+        self.writer: Optional[asyncio.StreamWriter] = None
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._next_id = 0
+        self._listener = None
+
+    async def __aenter__(self):
+        return await self.connect()
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    async def connect(self) -> 'ParseClient':
+        if self.path is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        else:
+            self.reader, self.writer = await asyncio.open_unix_connection(self.path)
+        self._listener = asyncio.ensure_future(self._listen())
+        return self
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            try:
+                await self.writer.wait_closed()
+            except ConnectionError:
+                pass
+            self.writer = None
+        if self._listener is not None:
+            await self._listener
+            self._listener = None
+
+    async def _listen(self):
+        try:
+            while True:
+                line = await self.reader.readline()
+                if len(line) == 0:
+                    break
+                response = json.loads(line)
+                future = self._pending.pop(response.get('id'), None)
+                if future is not None and not future.done():
+                    future.set_result(response)
+        except ConnectionError:
+            pass
+        for future in self._pending.values():
+            if not future.done():
+                future.set_exception(ConnectionError('The connection is closed'))
+        self._pending.clear()
+
+    async def request(self,
+                      sentence: str,
+                      grammar: Optional[str] = None,
+                      timeout: Optional[float] = None) -> dict:
+        """Send a request and wait for the raw response.
+
+        :param sentence: The sentence to be parsed.
+        :param grammar: The name of the grammar, the first grammar of the service is used by default.
+        :param timeout: The seconds before the request fails, the default of the service is used if it is None.
+        :return: The response.
+        """
+        self._next_id += 1
+        message: Dict[str, Any] = {'id': self._next_id, 'sentence': sentence}
+        if grammar is not None:
+            message['grammar'] = grammar
+        if timeout is not None:
+            message['timeout'] = timeout
+        future = asyncio.get_running_loop().create_future()
+        self._pending[self._next_id] = future
+        self.writer.write((json.dumps(message, ensure_ascii=False) + '\n').encode('utf8'))
+        await self.writer.drain()
+        return await future
+
+    async def parse(self,
+                    sentence: str,
+                    grammar: Optional[str] = None,
+                    timeout: Optional[float] = None):
+        """Parse a sentence with the service.
+
+        :param sentence: The sentence to be parsed.
+        :param grammar: The name of the grammar.
+        :param timeout: The seconds before the request fails.
+        :return: The parsed tree, None if the sentence can not be derived.
+        """
+        response = await self.request(sentence, grammar=grammar, timeout=timeout)
+        if 'error' in response:
+            raise RuntimeError(f'Failed to parse: {response["error"]}')
+        return _to_tuple(response['tree'])
+
+
+def serve(grammars: Union[str, Grammar, Dict[str, Union[str, Grammar]]], **kwargs):
+    """Run the parsing service until it is interrupted.
+
+    :param grammars: The grammars.
+    :param kwargs: The arguments of `ParseService`.
+    """
+    async def _serve():
+        async with ParseService(grammars, **kwargs) as service:
+            await service.server.serve_forever()
+
+    asyncio.run(_serve())
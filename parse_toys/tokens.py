@@ -0,0 +1,60 @@
+from typing import Any, Dict, Iterator, Optional, Sequence, Union
+
+__all__ = ['TokenSequence']
+
+
+class TokenSequence(object):
+
+    __slots__ = ('tokens', 'terminal_ids', 'terminals')
+
+    def __init__(self, tokens: Sequence, terminal_ids: Optional[Dict[str, Any]] = None):
+        """Wrap a sequence of lexed tokens so that the parsers match one terminal with one token.
+
+        The tokens are not copied, they can be a list of token kinds, an `array`, a `memoryview`
+        or a NumPy array. Indexing gives the terminal of a token, so the parsers treat the tokens
+        like the characters of a string: a slice of one token gives its terminal and an empty slice gives ''.
+
+        :param tokens: The token kinds that are the names of terminals, or the ids of the terminals.
+        :param terminal_ids: The mapping from the terminals to their ids, None if the tokens are the terminals.
+            The tokens with unknown ids can not be matched by any terminal.
+        """
+        self.tokens = tokens
+        self.terminal_ids = terminal_ids
+        self.terminals: Optional[Dict[Any, str]] = None
+        if terminal_ids is not None:
+            self.terminals = {token_id: terminal for terminal, token_id in terminal_ids.items()}
+
+    def __len__(self):
+        return len(self.tokens)
+
+    def __iter__(self) -> Iterator[Optional[str]]:
+        if self.terminals is None:
+            yield from self.tokens
+        else:
+            for token in self.tokens:
+                yield self.terminals.get(token)
+
+    def __getitem__(self, index: Union[int, slice]):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self.tokens))
+            length = len(range(start, stop, step))
+            if length == 0:
+                return ''
+            if length == 1:
+                return self[start]
+            view = TokenSequence.__new__(TokenSequence)
+            view.tokens, view.terminal_ids, view.terminals = self.tokens[index], self.terminal_ids, self.terminals
+            return view
+        if self.terminals is None:
+            return self.tokens[index]
+        return self.terminals.get(self.tokens[index])
+
+    def __repr__(self):
+        return f'TokenSequence({list(self)!r})'
+
+
+def _as_sentence(sentence: Union[str, Sequence]) -> Union[str, TokenSequence]:
+    """Keep the strings, and treat the other sequences as tokens named by the terminals."""
+    if isinstance(sentence, (str, TokenSequence)):
+        return sentence
+    return TokenSequence(sentence)
@@ -0,0 +1,93 @@
+from typing import Callable, Iterator, Optional, Tuple
+
+from parse_toys.grammar import Symbol
+
+__all__ = ['ParseNode']
+
+
+class ParseNode(object):
+
+    __slots__ = ('symbol', 'index', 'production', 'start', 'stop', 'children')
+
+    def __init__(self,
+                 symbol: Symbol,
+                 start: int,
+                 stop: int,
+                 index: Optional[int] = None,
+                 production: Optional[Tuple[Symbol, ...]] = None,
+                 children: Tuple['ParseNode', ...] = ()):
+        """Initialize a node of the parsed tree.
+
+        :param symbol: The head, or the terminal if it is a leaf.
+        :param start: The start of the derived span.
+        :param stop: The stop of the derived span (exclusive).
+        :param index: The index of the production in the alternatives of the head, None for a leaf.
+        :param production: The production used by the head, None for a leaf.
+        :param children: The nodes of the symbols in the production.
+        """
+        self.symbol = symbol
+        self.index = index
+        self.production = production
+        self.start = start
+        self.stop = stop
+        self.children = children
+
+    def __repr__(self):
+        return f'ParseNode({self.label!r}, {self.start}, {self.stop})'
+
+    @property
+    def is_leaf(self) -> bool:
+        return self.production is None
+
+    @property
+    def label(self) -> str:
+        if self.production is None:
+            return str(self.symbol)
+        return ' '.join(map(str, self.production))
+
+    def walk(self, postorder: bool = False) -> Iterator['ParseNode']:
+        """Traverse the tree without recursion.
+
+        :param postorder: Whether to yield the children before their parents.
+        :return: The nodes from left to right.
+        """
+        stack = [(self, False)]
+        while len(stack) > 0:
+            node, visited = stack.pop()
+            if visited or not postorder:
+                yield node
+            if not visited:
+                if postorder:
+                    stack.append((node, True))
+                for child in reversed(node.children):
+                    stack.append((child, False))
+
+    def convert(self, leaf: Callable[['ParseNode'], object], inner: Callable[['ParseNode', tuple], object]):
+        """Build a value from the bottom up without recursion.
+
+        :param leaf: The function that converts a leaf.
+        :param inner: The function that combines a head with the converted children.
+        :return: The value of the root.
+        """
+        results = []
+        for node in self.walk(postorder=True):
+            if node.production is None:
+                results.append(leaf(node))
+            else:
+                count = len(node.children)
+                children = tuple(results[len(results) - count:])
+                del results[len(results) - count:]
+                results.append(inner(node, children))
+        return results[0]
+
+    def to_cyk_tuple(self):
+        """Convert to the tuples returned by `parse_with_cyk`."""
+        def _inner(node: 'ParseNode', children: tuple):
+            if len(node.production) == 1 and node.children[0].production is None:
+                return children
+            return node.label, children
+        return self.convert(lambda node: str(node.symbol), _inner)
+
+    def to_unger_tuple(self):
+        """Convert to the tuples returned by `parse_with_unger`."""
+        return self.convert(lambda node: str(node.symbol), lambda node, children: (node.label,) + children)
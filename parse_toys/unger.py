@@ -1,14 +1,101 @@
-from typing import Dict, Optional, Tuple, Union
+from typing import Dict, Optional, Sequence, Union
 
 from parse_toys.grammar import Symbol, Epsilon, Grammar
+from parse_toys.deterministic import get_deterministic_parser
+from parse_toys.tree import ParseNode
+from parse_toys.budget import ParseBudget
+from parse_toys.tokens import _as_sentence
 
-__all__ = ['parse_with_unger']
+__all__ = ['parse_with_unger', 'ARRAY_MEMO_LIMIT']
 
+# The largest number of states memorized in a preallocated table by default
+ARRAY_MEMO_LIMIT = 1 << 24
 
-def parse_with_unger(grammar: Grammar, sentence: str):
+
+def _token_min_lengths(grammar: Grammar) -> Dict[Symbol, int]:
+    """Calculate the minimal numbers of tokens derived by the symbols, a terminal matches exactly one token."""
+    def _create():
+        lengths = {symbol: 0 if isinstance(symbol, Epsilon) else 1
+                   for symbol in grammar.symbols.values() if grammar.is_terminal(symbol)}
+        has_update = True
+        while has_update:
+            has_update = False
+            for head, productions in grammar.productions.items():
+                for production in productions:
+                    if all(symbol in lengths for symbol in production):
+                        length = sum(lengths[symbol] for symbol in production)
+                        if length < lengths.get(head, length + 1):
+                            lengths[head] = length
+                            has_update = True
+        return lengths
+
+    return grammar.cached('token_min_length', _create)
+
+
+def parse_with_unger(grammar: Grammar,
+                     sentence: Union[str, Sequence],
+                     deterministic: bool = True,
+                     return_node: bool = False,
+                     remove_useless: bool = True,
+                     budget: Optional[ParseBudget] = None,
+                     memo: str = 'auto'):
+    """Parse the sentence with Unger's method.
+
+    :param grammar: The grammar.
+    :param sentence: The sentence to be parsed, or the tokens in a sequence or a `TokenSequence`.
+    :param deterministic: Whether to parse in linear time if the grammar is LL(1) or LALR(1). The tree is unique then,
+        so `remove_useless` makes no difference, and the budget counts the steps of the linear-time parser.
+    :param return_node: Whether to return the `ParseNode` instead of tuples.
+    :param remove_useless: Whether to parse with the grammar that has no unproductive or unreachable heads.
+    :param budget: The limits of the parse, `BudgetExceeded` is raised if any of them is exceeded.
+    :param memo: How the states of (symbol, start, stop) are memorized. 'array' uses one byte per state
+        in a preallocated table, 'dict' only stores the visited states, 'auto' uses the table if it has
+        no more than `ARRAY_MEMO_LIMIT` entries.
+    :return: The parsed tree, None if the sentence can not be derived.
+    """
+    if memo not in {'auto', 'array', 'dict'}:
+        raise ValueError(f'Unknown memo: {memo}')
+    if budget is not None:
+        budget.start()
+    sentence = _as_sentence(sentence)
+    # A terminal matches a substring of a string, or exactly one token
+    tokens = not isinstance(sentence, str)
+    if deterministic:
+        parser = get_deterministic_parser(grammar)
+        if parser is not None:
+            return parser.parse(sentence, tree_format='node' if return_node else 'unger', budget=budget)
+    # The nodes are indexed by the alternatives of the original grammar
+    source = grammar
+    if remove_useless:
+        grammar = grammar.reduced()
     grammar.init_nullable()
     grammar.init_min_length()
-    history: Dict[Tuple, Optional[Union[Tuple, str]]] = {}
+    grammar.init_last()
+    grammar.init_follow()
+    boundaries = grammar.boundary_characters(whole_terminals=tokens)
+    min_lengths = _token_min_lengths(grammar) if tokens else {}
+    # The symbols are identified by integers, the heads before the terminals. A state of a head is an index of
+    # (head, start, stop) with start <= stop, the spans are laid out in a triangle like the cells of `CYKChart`
+    symbols = list(grammar.productions.keys())
+    symbols += [symbol for symbol in grammar.symbols.values() if grammar.is_terminal(symbol)]
+    ids = {symbol: symbol_id for symbol_id, symbol in enumerate(symbols)}
+    heads = len(grammar.productions)
+    alternatives = [[(source.productions[symbol].indices[production], production,
+                      tuple(ids[child] for child in production))
+                     for production in grammar.productions[symbol]]
+                    for symbol in symbols[:heads]]
+    nullables = [symbol.nullable is True for symbol in symbols]
+    symbol_min_lengths = [min_lengths.get(symbol, symbol.min_length) for symbol in symbols]
+    symbol_boundaries = [boundaries.get(symbol) for symbol in symbols]
+    width = len(sentence) + 1
+    spans = width * (width + 1) // 2
+    if memo == 'auto':
+        memo = 'array' if heads * spans <= ARRAY_MEMO_LIMIT else 'dict'
+    # 0 for the unvisited states, 1 for the failed ones or the ones in progress, 2 for the derived ones
+    array_states = bytearray(heads * spans) if memo == 'array' else None
+    dict_states: Dict[int, int] = {}
+    results: Dict[int, ParseNode] = {}
+    visited = 0
 
     def _divide(start: int, stop: int, parts: int, index: int = 0):
         if index + 1 == parts:
@@ -18,46 +105,76 @@ def parse_with_unger(grammar: Grammar, sentence: str):
                 for rest in _divide(i, stop, parts, index + 1):
                     yield (i - start,) + rest
 
-    def _parse_symbol(symbol: Symbol, start: int, stop: int):
-        key = (symbol, start, stop)
-        if key in history:
-            return history[key]
-        history[key] = None
-
-        if isinstance(symbol, Epsilon):
-            if start == stop:
-                history[key] = str(symbol)
-        elif grammar.is_terminal(symbol):
-            if str(symbol) == sentence[start:stop]:
-                history[key] = str(symbol)
+    def _parse_symbol(symbol_id: int, start: int, stop: int) -> Optional[ParseNode]:
+        nonlocal visited
+        symbol = symbols[symbol_id]
+        if symbol_id >= heads:
+            # The terminals are matched without memorizing
+            if isinstance(symbol, Epsilon):
+                matched = start == stop
+            elif tokens:
+                matched = stop == start + 1 and sentence[start] == symbol.symbol
+            else:
+                matched = str(symbol) == sentence[start:stop]
+            return ParseNode(symbol, start, stop) if matched else None
+        key = symbol_id * spans + stop * (stop + 1) // 2 + start
+        state = array_states[key] if array_states is not None else dict_states.get(key, 0)
+        if state != 0:
+            return results[key] if state == 2 else None
+        if array_states is not None:
+            array_states[key] = 1
+        else:
+            dict_states[key] = 1
+        visited += 1
+        if budget is not None:
+            budget.memo(visited)
+
+        result = None
+        if start < stop and (sentence[start] not in symbol_boundaries[symbol_id][0]
+                             or sentence[stop - 1] not in symbol_boundaries[symbol_id][1]):
+            pass
+        elif sentence[stop:stop + 1] not in symbol_boundaries[symbol_id][2]:
+            # The symbol can not be followed by the next character in any derivation
+            pass
         else:
-            for production in grammar.productions[symbol]:
+            for index, production, child_ids in alternatives[symbol_id]:
                 for division in _divide(start, stop, len(production)):
+                    if budget is not None:
+                        budget.step()
                     valid = True
                     for i, div in enumerate(division):
-                        if div == 0 and not production[i].nullable:
+                        if div == 0 and not nullables[child_ids[i]]:
                             valid = False
                             break
-                        if div < production[i].min_length:
+                        if div < symbol_min_lengths[child_ids[i]]:
                             valid = False
                             break
                     if not valid:
                         continue
-                    results = []
+                    children = []
                     sub_start, sub_stop = start, start
                     for i, div in enumerate(division):
                         sub_stop += div
-                        result = _parse_symbol(production[i], sub_start, sub_stop)
-                        if result is None:
+                        child = _parse_symbol(child_ids[i], sub_start, sub_stop)
+                        if child is None:
                             valid = False
                             break
-                        results.append(result)
+                        children.append(child)
                         sub_start = sub_stop
                     if valid:
-                        history[key] = (f'{" ".join(map(str, production))}',) + tuple(results)
+                        result = ParseNode(symbol, start, stop, index, production, tuple(children))
                         break
-                if history[key] is not None:
+                if result is not None:
                     break
-        return history[key]
+        if result is not None:
+            results[key] = result
+            if array_states is not None:
+                array_states[key] = 2
+            else:
+                dict_states[key] = 2
+        return result
 
-    return _parse_symbol(grammar.start, 0, len(sentence))
+    root = _parse_symbol(ids[grammar.start], 0, len(sentence))
+    if root is None or return_node:
+        return root
+    return root.to_unger_tuple()
@@ -0,0 +1,166 @@
+import heapq
+import math
+from typing import Dict, List, Optional, Tuple, Sequence
+
+from parse_toys.grammar import Symbol, Epsilon, Grammar
+from parse_toys.chomsky_normal_form import to_chomsky_normal_form
+from parse_toys.tree import ParseNode
+
+__all__ = ['parse_with_viterbi']
+
+
+def _log(weight: float) -> float:
+    if weight <= 0.0:
+        return -math.inf
+    return math.log(weight)
+
+
+def _prune(cell: Dict[Symbol, float],
+           beam_width: Optional[int],
+           threshold: Optional[float]) -> Dict[Symbol, float]:
+    if len(cell) == 0:
+        return cell
+    if threshold is not None:
+        lower = max(cell.values()) + _log(threshold)
+        cell = {head: score for head, score in cell.items() if score >= lower}
+    if beam_width is not None and len(cell) > beam_width:
+        cell = dict(heapq.nlargest(beam_width, cell.items(), key=lambda x: x[1]))
+    return cell
+
+
+def parse_with_viterbi(grammar: Grammar,
+                       sentence: str,
+                       beam_width: Optional[int] = None,
+                       threshold: Optional[float] = None,
+                       top_k: Optional[int] = None,
+                       return_node: bool = False):
+    """Find the analysis with the largest weight with a pruned CYK table.
+
+    The weight of a tree is the product of the weights of its productions.
+    Each cell of the table keeps the best weight of every head in Chomsky Normal Form,
+    the heads that fall out of the beam are discarded before the longer spans are built.
+
+    :param grammar: The weighted grammar.
+    :param sentence: The sentence to be parsed.
+    :param beam_width: The maximum number of heads kept in a cell.
+    :param threshold: Heads whose weights are below `threshold` times the best weight in the cell are discarded.
+    :param top_k: Return the best `top_k` (weight, tree) pairs instead of the best tree.
+    :param return_node: Whether to return the `ParseNode` instead of tuples.
+    :return: The best tree in the format of `parse_with_cyk`, or a list of (weight, tree).
+    """
+    grammar.init_nullable()
+    # The equivalent heads are not merged, so the beam is counted in the heads of the original grammar
+    cnf_grammar, head_mapping = to_chomsky_normal_form(
+        grammar,
+        return_mapping=True,
+        remove_unreachable=False,
+        merge_equivalent=False)
+    n = len(sentence)
+    # Create the pruned recognition table, rec[j][i] contains the best scores of sentence[i:j + 1]
+    terminal_rules: Dict[str, List[Tuple[Symbol, float]]] = {}
+    binary_rules: Dict[Symbol, List[Tuple[Symbol, Symbol, float]]] = {}
+    for head, productions in cnf_grammar.productions.items():
+        for production, weight in productions.weighted():
+            if len(production) == 1:
+                if cnf_grammar.is_terminal(production[0]) and not isinstance(production[0], Epsilon):
+                    terminal_rules.setdefault(production[0].symbol, []).append((head, _log(weight)))
+            elif len(production) == 2:
+                binary_rules.setdefault(production[0], []).append((production[1], head, _log(weight)))
+    rec: List[List[Dict[Symbol, float]]] = []
+    for j in range(n):
+        column: List[Optional[Dict[Symbol, float]]] = [None] * (j + 1)
+        cell = {}
+        for head, score in terminal_rules.get(sentence[j], ()):
+            if score > cell.get(head, -math.inf):
+                cell[head] = score
+        column[j] = _prune(cell, beam_width, threshold)
+        rec.append(column)
+        for i in range(j - 1, -1, -1):
+            cell = {}
+            for k in range(i, j):
+                left, right = rec[k][i], column[k + 1]
+                if len(left) == 0 or len(right) == 0:
+                    continue
+                for left_symbol, left_score in left.items():
+                    for right_symbol, head, score in binary_rules.get(left_symbol, ()):
+                        if right_symbol in right:
+                            score += left_score + right[right_symbol]
+                            if score > cell.get(head, -math.inf):
+                                cell[head] = score
+            column[i] = _prune(cell, beam_width, threshold)
+    # Find the best trees in the original grammar among the remaining heads
+    k_best = 1 if top_k is None else top_k
+    history: Dict[Tuple, List[Tuple[float, ParseNode]]] = {}
+    # The depths of the keys being calculated. A key met again is a cycle and gives no tree,
+    # so the results that depend on an unfinished ancestor are not saved
+    in_progress: Dict[Tuple, int] = {}
+    lowest = math.inf
+
+    def _recognisable(symbol: Symbol, start: int, stop: int):
+        if start == stop:
+            return symbol.nullable is True
+        if grammar.is_terminal(symbol):
+            return symbol.symbol == sentence[start:stop]
+        return head_mapping.get(symbol, symbol) in rec[stop - 1][start]
+
+    def _memorize(key: Tuple, calculate):
+        nonlocal lowest
+        if key in history:
+            return history[key]
+        if key in in_progress:
+            lowest = min(lowest, in_progress[key])
+            return []
+        depth = in_progress[key] = len(in_progress)
+        outer, lowest = lowest, math.inf
+        result = calculate()
+        del in_progress[key]
+        if lowest >= depth:
+            history[key] = result
+        lowest = min(outer, lowest)
+        return result
+
+    def _parse_production(production: Sequence[Symbol], index: int, start: int, stop: int):
+        if index == len(production):
+            if start == stop:
+                return [(0.0, ())]
+            return []
+
+        def _calculate():
+            symbol = production[index]
+            candidates = []
+            for mid in range(start, stop + 1):
+                firsts = _parse_symbol(symbol, start, mid)
+                if len(firsts) == 0:
+                    continue
+                rests = _parse_production(production, index + 1, mid, stop)
+                for first_score, first_result in firsts:
+                    for rest_score, rest_result in rests:
+                        candidates.append((first_score + rest_score, (first_result,) + rest_result))
+            return heapq.nlargest(k_best, candidates, key=lambda x: x[0])
+
+        return _memorize((production, index, start, stop), _calculate)
+
+    def _parse_symbol(symbol: Symbol, start: int, stop: int):
+        if not _recognisable(symbol, start, stop):
+            return []
+        if grammar.is_terminal(symbol):
+            return [(0.0, ParseNode(symbol, start, stop))]
+
+        def _calculate():
+            candidates = []
+            productions = grammar.productions[symbol]
+            for index, (production, weight) in enumerate(productions.weighted()):
+                for score, result in _parse_production(production, 0, start, stop):
+                    candidates.append((score + _log(weight),
+                                       ParseNode(symbol, start, stop, index, production, result)))
+            return heapq.nlargest(k_best, candidates, key=lambda x: x[0])
+
+        return _memorize((symbol, start, stop), _calculate)
+
+    results = [(math.exp(score), root if return_node else root.to_cyk_tuple())
+               for score, root in _parse_symbol(grammar.start, 0, n) if score > -math.inf]
+    if top_k is not None:
+        return results
+    if len(results) == 0:
+        return None
+    return results[0][1]
@@ -36,6 +36,11 @@ setup(
     long_description=read_file('README.md'),
     long_description_content_type='text/markdown',
     install_requires=get_requirements('requirements.txt'),
+    entry_points={
+        'console_scripts': [
+            'parse-toys=parse_toys.cli:main',
+        ],
+    },
     classifiers=(
         "Programming Language :: Python :: 3",
         "License :: OSI Approved :: MIT License",
@@ -0,0 +1,50 @@
+from unittest import TestCase
+
+from parse_toys import Grammar, ParseBudget, BudgetExceeded, parse_with_unger, parse_with_cyk, parse_batch_with_cyk
+
+
+class TestBudget(TestCase):
+
+    def _get_grammar(self):
+        grammar = Grammar()
+        grammar.parse('S -> S S | a')
+        return grammar
+
+    def test_unlimited(self):
+        grammar = self._get_grammar()
+        budget = ParseBudget()
+        self.assertEqual(parse_with_unger(grammar, 'aaa'), parse_with_unger(grammar, 'aaa', budget=budget))
+        self.assertGreater(budget.steps, 0)
+        self.assertGreater(budget.memo_entries, 0)
+        self.assertEqual(parse_with_cyk(grammar, 'aaa'), parse_with_cyk(grammar, 'aaa', budget=budget))
+        self.assertEqual(parse_batch_with_cyk(grammar, ['aa', 'aaa']),
+                         parse_batch_with_cyk(grammar, ['aa', 'aaa'], budget=budget))
+
+    def test_steps(self):
+        grammar = self._get_grammar()
+        sentence = 'a' * 20 + 'b' + 'a' * 20
+        with self.assertRaises(BudgetExceeded) as context:
+            parse_with_unger(grammar, sentence, budget=ParseBudget(max_steps=1000))
+        self.assertEqual('steps', context.exception.reason)
+        self.assertEqual(1001, context.exception.steps)
+        with self.assertRaises(BudgetExceeded):
+            parse_with_cyk(grammar, sentence, budget=ParseBudget(max_steps=1000))
+        with self.assertRaises(BudgetExceeded):
+            parse_batch_with_cyk(grammar, [sentence], budget=ParseBudget(max_steps=1000))
+
+    def test_memo(self):
+        grammar = self._get_grammar()
+        with self.assertRaises(BudgetExceeded) as context:
+            parse_with_cyk(grammar, 'a' * 100, budget=ParseBudget(max_memo=100))
+        self.assertEqual('memo', context.exception.reason)
+        self.assertLessEqual(context.exception.memo_entries, 200)
+        with self.assertRaises(BudgetExceeded):
+            parse_with_unger(grammar, 'a' * 20 + 'b' + 'a' * 20, budget=ParseBudget(max_memo=100))
+
+    def test_deadline(self):
+        grammar = self._get_grammar()
+        budget = ParseBudget(timeout=0.0, check_interval=1)
+        with self.assertRaises(BudgetExceeded) as context:
+            parse_with_cyk(grammar, 'a' * 100, budget=budget)
+        self.assertEqual('deadline', context.exception.reason)
+        self.assertIsInstance(context.exception, RuntimeError)
@@ -0,0 +1,70 @@
+from array import array
+from unittest import TestCase
+
+from parse_toys import Grammar, ParseCache, TokenSequence, parse_with_cyk, parse_with_unger
+
+
+class TestParseCache(TestCase):
+
+    def _get_grammar(self):
+        grammar = Grammar()
+        grammar.parse("""
+            S -> a S b | a b
+        """)
+        return grammar
+
+    def test_hits(self):
+        grammar = self._get_grammar()
+        cache = ParseCache()
+        parse = cache.wrap(parse_with_unger)
+        self.assertEqual(parse_with_unger(grammar, 'aabb'), parse(grammar, 'aabb'))
+        self.assertIs(parse(grammar, 'aabb'), parse(grammar, 'aabb'))
+        self.assertIsNone(cache.parse(parse_with_cyk, grammar, 'aab'))
+        self.assertEqual(parse_with_cyk(grammar, 'ab'), cache.parse(parse_with_cyk, grammar, 'ab'))
+        self.assertEqual(parse_with_unger(grammar, 'ab'), cache.parse(parse_with_unger, grammar, 'ab'))
+        stats = cache.stats()
+        self.assertEqual((2, 4, 4), (stats['hits'], stats['misses'], stats['entries']))
+
+    def test_tokens(self):
+        grammar = self._get_grammar()
+        cache = ParseCache()
+        expected = parse_with_cyk(grammar, ['a', 'b'])
+        self.assertEqual(expected, cache.parse(parse_with_cyk, grammar, ['a', 'b']))
+        parsed = cache.parse(parse_with_cyk, grammar, ['a', 'b'])
+        self.assertIs(parsed, cache.parse(parse_with_cyk, grammar, ('a', 'b')))
+        tokens = TokenSequence(array('i', [1, 2]), {'a': 1, 'b': 2})
+        self.assertEqual(expected, cache.parse(parse_with_cyk, grammar, tokens))
+        self.assertIsNone(cache.parse(parse_with_cyk, grammar, ['a', 'a']))
+        self.assertEqual((3, 2, 2), (cache.hits, cache.misses, len(cache)))
+
+    def test_invalidate(self):
+        grammar = self._get_grammar()
+        cache = ParseCache()
+        self.assertIsNone(cache.parse(parse_with_unger, grammar, 'c'))
+        fingerprint = grammar.fingerprint()
+        grammar.add_production(grammar.start, [grammar.get_or_create_symbol('c')])
+        self.assertNotEqual(fingerprint, grammar.fingerprint())
+        self.assertEqual(('c', 'c'), cache.parse(parse_with_unger, grammar, 'c'))
+        grammar.clean(grammar.start)
+        grammar.add_production(grammar.start, [grammar.symbols['a'], grammar.symbols['b']])
+        self.assertIsNone(cache.parse(parse_with_unger, grammar, 'c'))
+        self.assertEqual(0, cache.hits)
+        other = self._get_grammar()
+        other.add_production(other.start, [other.get_or_create_symbol('c')])
+        other_fingerprint = other.fingerprint()
+        other.remove(other.start)
+        self.assertNotEqual(other_fingerprint, other.fingerprint())
+
+    def test_eviction(self):
+        grammar = self._get_grammar()
+        cache = ParseCache(max_entries=2)
+        for sentence in ['ab', 'aabb', 'ab', 'aaabbb', 'aabb']:
+            cache.parse(parse_with_unger, grammar, sentence)
+        self.assertEqual((1, 4, 2), (cache.hits, cache.misses, cache.evictions))
+        cache = ParseCache(max_entries=None, max_bytes=1000)
+        for i in range(1, 20):
+            cache.parse(parse_with_unger, grammar, 'a' * i + 'b' * i)
+        self.assertLessEqual(cache.bytes, 1000)
+        self.assertGreater(cache.evictions, 0)
+        cache.clear()
+        self.assertEqual(0, cache.stats()['bytes'])
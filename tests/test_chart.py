@@ -0,0 +1,86 @@
+from unittest import TestCase
+
+from parse_toys import Symbol, Grammar, CYKChart, recognize_with_cyk, parse_with_unger
+
+
+class TestCYKChart(TestCase):
+
+    def test_triangular_layout(self):
+        chart = CYKChart([Symbol('A'), Symbol('B')], length=4)
+        self.assertEqual(4, len(chart))
+        self.assertEqual(10, len(chart.cells))
+        self.assertEqual([0, 1, 2, 3, 4, 5, 6, 7, 8, 9],
+                         [CYKChart.index(i, j) for j in range(4) for i in range(j + 1)])
+
+    def test_add_and_query(self):
+        a, b = Symbol('A'), Symbol('B')
+        chart = CYKChart([a, b], length=3)
+        chart.add(0, 2, a)
+        chart.add(0, 2, b)
+        chart.add(1, 1, b)
+        self.assertTrue(chart.contains(0, 2, a))
+        self.assertFalse(chart.contains(1, 1, a))
+        self.assertFalse(chart.contains(1, 1, Symbol('C')))
+        self.assertEqual({a, b}, chart.get(0, 2))
+        self.assertEqual({b}, chart.get(1, 1))
+        self.assertEqual(set(), chart.get(0, 0))
+
+    def test_columns(self):
+        a = Symbol('A')
+        chart = CYKChart([a])
+        self.assertEqual(0, chart.append_column())
+        self.assertEqual(1, chart.append_column())
+        chart.add(0, 1, a)
+        chart.pop_column()
+        self.assertEqual(1, len(chart.cells))
+        self.assertEqual(1, chart.append_column())
+        self.assertFalse(chart.contains(0, 1, a))
+        chart.truncate(0)
+        self.assertEqual(0, len(chart))
+        self.assertEqual(0, len(chart.cells))
+
+    def test_many_symbols(self):
+        symbols = [Symbol(f'S{i}') for i in range(100)]
+        chart = CYKChart(symbols, length=2)
+        chart.add(0, 1, symbols[99])
+        self.assertTrue(chart.contains(0, 1, symbols[99]))
+        self.assertEqual({symbols[99]}, chart.get(0, 1))
+
+
+class TestParseChart(TestCase):
+
+    @staticmethod
+    def _get_grammar():
+        grammar = Grammar()
+        grammar.parse("""
+            Expr -> Expr + Term | Term
+            Term -> Term × Factor | Factor
+            Factor -> ( Expr ) | i
+            Unused -> x
+        """)
+        return grammar
+
+    def test_queries(self):
+        grammar = self._get_grammar()
+        sentence = 'i+(i×i)'
+        chart = recognize_with_cyk(grammar, sentence)
+        self.assertEqual(7, len(chart))
+        expected = [(start, stop) for start in range(len(sentence)) for stop in range(start + 1, len(sentence) + 1)
+                    if parse_with_unger(grammar.clone(), sentence[start:stop]) is not None]
+        self.assertEqual(expected, chart.spans('Expr'))
+        self.assertEqual([(0, 1), (2, 7), (3, 4), (3, 6), (5, 6)], chart.spans(grammar.symbols['Term']))
+        self.assertEqual([(0, 1), (2, 7)], chart.maximal_spans('Term'))
+        self.assertEqual([(0, 7)], chart.maximal_spans('Expr'))
+        self.assertEqual({'Expr', 'Term', 'Factor'}, {head.symbol for head in chart.symbols(2, 7)})
+        self.assertEqual(set(), chart.symbols(1, 3))
+        self.assertTrue(chart.contains('Factor', 3, 4))
+        self.assertFalse(chart.contains('Factor', 3, 6))
+        self.assertFalse(chart.contains('Missing', 3, 4))
+        self.assertFalse(chart.contains('Factor', 4, 4))
+        self.assertEqual([], chart.spans('Unused'))
+
+    def test_unreachable(self):
+        grammar = self._get_grammar()
+        chart = recognize_with_cyk(grammar, 'ixi', remove_useless=False)
+        self.assertEqual([(1, 2)], chart.spans('Unused'))
+        self.assertEqual([(0, 1), (2, 3)], chart.maximal_spans('Expr'))
@@ -1,6 +1,7 @@
 from unittest import TestCase
 
-from parse_toys import Grammar, eliminate_epsilon_rules, eliminate_unit_rules, to_chomsky_normal_form
+from parse_toys import (Grammar, eliminate_epsilon_rules, eliminate_unit_rules, merge_equivalent_heads,
+                        to_chomsky_normal_form)
 
 
 class TestChomskyNormalForm(TestCase):
@@ -255,7 +256,26 @@ G -> G
 H -> B C D
 I -> i
             """)
-        grammar = to_chomsky_normal_form(grammar)
+        self.assertEqual(str(to_chomsky_normal_form(grammar)), """
+  S -> N_2 D
+  A -> N_3 D
+     | N_5 D
+  B -> C D
+     | N_6 D
+  C -> C D
+     | T_3 D
+  D -> d
+N_1 -> A B
+N_2 -> N_1 C
+N_3 -> B C
+T_1 -> a
+T_2 -> b
+N_4 -> T_1 T_2
+T_3 -> c
+N_5 -> N_4 T_3
+N_6 -> T_2 T_3
+"""[1:])
+        grammar = to_chomsky_normal_form(grammar, remove_unproductive=False, merge_equivalent=False)
         self.assertEqual(str(grammar), """
   S -> N_2 D
   A -> N_3 D
@@ -283,3 +303,69 @@ T_4 -> d
 N_6 -> T_2 T_3
 N_7 -> E H
 """[1:])
+
+    def test_chomsky_normal_form_weights(self):
+        grammar = Grammar()
+        grammar.parse("""
+            S -> A b c [0.5] | A [0.5]
+            A -> a [0.4] | ε [0.6]
+        """)
+        grammar = to_chomsky_normal_form(grammar)
+        self.assertEqual(str(grammar), """
+S_1 -> T_1 T_2 [0.3]
+     | N_1 T_2 [0.5]
+     | a [0.2]
+     | ε [0.3]
+A_1 -> a [0.4]
+T_1 -> b
+T_2 -> c
+N_1 -> A_1 T_1
+"""[1:])
+
+    def test_chomsky_normal_form_empty_language(self):
+        grammar = Grammar()
+        grammar.parse("""
+            S -> A b | S c
+            A -> A a
+        """)
+        grammar, head_mapping = to_chomsky_normal_form(grammar, return_mapping=True)
+        self.assertEqual('S ->\n', str(grammar))
+        self.assertEqual({}, head_mapping)
+
+    def test_merge_equivalent_heads(self):
+        grammar = Grammar()
+        grammar.parse("""
+            S -> A b | B b | C
+            A -> A a | a
+            B -> B a | a
+            C -> c
+            D -> c
+        """)
+        grammar, head_mapping = merge_equivalent_heads(grammar, return_mapping=True)
+        self.assertEqual(str(grammar), """
+S -> A b
+   | C
+A -> A a
+   | a
+C -> c
+"""[1:])
+        self.assertEqual({'B': 'A', 'D': 'C'}, {str(head): str(new_head) for head, new_head in head_mapping.items()})
+
+    def test_chomsky_normal_form_merge(self):
+        grammar = Grammar()
+        grammar.parse("""
+            S -> A b c | B b c
+            A -> a [0.5] | ε
+            B -> a [0.5] | ε
+        """)
+        grammar, head_mapping = to_chomsky_normal_form(grammar, return_mapping=True, remove_unreachable=False)
+        self.assertEqual(str(grammar), """
+S_1 -> T_1 T_2
+     | N_1 T_2
+A_1 -> a [0.5]
+T_1 -> b
+T_2 -> c
+N_1 -> A_1 T_1
+"""[1:])
+        self.assertEqual({'S': 'S_1', 'A': 'A_1', 'B': 'A_1'},
+                         {str(head): str(new_head) for head, new_head in head_mapping.items()})
@@ -0,0 +1,45 @@
+import os
+import json
+import tempfile
+from unittest import TestCase
+
+from parse_toys import Grammar, parse_with_cyk
+from parse_toys.cli import main
+
+
+class TestCLI(TestCase):
+
+    def setUp(self):
+        self.temp = tempfile.TemporaryDirectory()
+        self.grammar_path = os.path.join(self.temp.name, 'grammar.txt')
+        self.input_path = os.path.join(self.temp.name, 'input.txt')
+        self.output_path = os.path.join(self.temp.name, 'output.txt')
+        with open(self.grammar_path, 'w', encoding='utf8') as writer:
+            writer.write('S -> a S b | a b\n')
+        self.sentences = ['ab', 'aabb', 'aab', '', 'aaabbb'] * 7
+        with open(self.input_path, 'w', encoding='utf8') as writer:
+            writer.write('\n'.join(self.sentences) + '\n')
+
+    def tearDown(self):
+        self.temp.cleanup()
+
+    def _read_output(self):
+        with open(self.output_path, 'r', encoding='utf8') as reader:
+            return reader.read().splitlines()
+
+    def test_json(self):
+        grammar = Grammar()
+        grammar.parse('S -> a S b | a b')
+        self.assertEqual(0, main(['parse', self.grammar_path, self.input_path, '-o', self.output_path, '-q',
+                                  '--chunk-size', '3']))
+        results = list(map(json.loads, self._read_output()))
+        self.assertEqual(list(range(1, len(self.sentences) + 1)), [result['line'] for result in results])
+        self.assertEqual([json.loads(json.dumps(parse_with_cyk(grammar, sentence))) for sentence in self.sentences],
+                         [result['tree'] for result in results])
+
+    def test_flags(self):
+        expected = ['accept', 'accept', 'reject', 'reject', 'accept'] * 7
+        for engine in ['unger', 'compiled-cyk']:
+            main(['parse', self.grammar_path, self.input_path, '-o', self.output_path, '-q', '-f', 'flags',
+                  '-e', engine, '-w', '2', '--chunk-size', '4', '--mmap', '--cache-dir', self.temp.name])
+            self.assertEqual(expected, self._read_output())
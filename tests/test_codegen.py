@@ -0,0 +1,92 @@
+import os
+import tempfile
+from unittest import TestCase
+
+from parse_toys import (Grammar, ParseBudget, BudgetExceeded, parse_with_cyk, parse_with_unger, compile_cyk,
+                        compile_unger)
+
+
+class TestCodegen(TestCase):
+
+    def setUp(self):
+        self.cache = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.cache.cleanup()
+
+    @staticmethod
+    def _get_grammars():
+        texts = [
+            """
+            Number -> Integer | Real
+            Integer -> Digit | Integer Digit
+            Real -> Integer Fraction Scale
+            Fraction -> . Integer
+            Scale -> e Sign Integer | Empty
+            Digit -> 0 | 1 | 2 | 3 | 4 | 5 | 6 | 7 | 8 | 9
+            Sign -> + | -
+            Empty -> ε
+            """,
+            """
+            Expr -> Expr + Term | Term
+            Term -> Term × Factor | Factor
+            Factor -> ( Expr ) | i
+            """,
+            """
+            S -> L S D | ε
+            L -> ε
+            D -> d
+            """,
+            """
+            S -> A B | ab c
+            A -> a b
+            B -> c
+            """,
+            """
+            S -> B
+            B -> S
+            """,
+        ]
+        sentences = ['', '32', '32.5e+1', '32.5', '3.e', '(i+i)×i', 'i+', 'd', 'dd', 'abc', 'ab']
+        for text in texts:
+            grammar = Grammar()
+            grammar.parse(text)
+            yield grammar, sentences
+
+    def test_cyk(self):
+        for grammar, sentences in self._get_grammars():
+            parser = compile_cyk(grammar, cache_dir=self.cache.name)
+            for sentence in sentences:
+                self.assertEqual(parse_with_cyk(grammar, sentence), parser(sentence))
+
+    def test_unger(self):
+        for grammar, sentences in self._get_grammars():
+            parser = compile_unger(grammar, cache_dir=self.cache.name)
+            for sentence in sentences:
+                self.assertEqual(parse_with_unger(grammar, sentence), parser(sentence))
+
+    def test_cache(self):
+        grammar = next(self._get_grammars())[0]
+        compile_cyk(grammar, cache_dir=self.cache.name)
+        compile_unger(grammar, cache_dir=self.cache.name)
+        self.assertEqual(2, len(os.listdir(self.cache.name)))
+        parser = compile_cyk(grammar.clone(), cache_dir=self.cache.name)
+        self.assertEqual(2, len(os.listdir(self.cache.name)))
+        self.assertIsNotNone(parser('32'))
+        grammar.add_production(grammar.symbols['Sign'], [grammar.get_or_create_symbol('±')])
+        compile_cyk(grammar, cache_dir=self.cache.name)
+        self.assertEqual(3, len(os.listdir(self.cache.name)))
+
+    def test_budget(self):
+        grammar = Grammar()
+        grammar.parse('E -> E + E | i')
+        sentence = '+'.join(['i'] * 30)
+        rejected = sentence + 'i+' + sentence
+        for compile_parser in [compile_cyk, compile_unger]:
+            parser = compile_parser(grammar, cache_dir=self.cache.name)
+            self.assertIsNotNone(parser(sentence, budget=ParseBudget(max_steps=10 ** 7)))
+            with self.assertRaises(BudgetExceeded):
+                parser(rejected, budget=ParseBudget(max_steps=100))
+            with self.assertRaises(BudgetExceeded) as context:
+                parser(sentence, budget=ParseBudget(timeout=0.0, check_interval=1))
+            self.assertEqual('deadline', context.exception.reason)
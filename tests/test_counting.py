@@ -0,0 +1,61 @@
+import math
+from unittest import TestCase
+
+from parse_toys import Grammar, count_parses
+
+
+class TestCountParses(TestCase):
+
+    @staticmethod
+    def _get_grammar(text):
+        grammar = Grammar()
+        grammar.parse(text)
+        return grammar
+
+    def test_catalan(self):
+        grammar = self._get_grammar('S -> S S | a')
+        self.assertEqual([1, 1, 2, 5, 14, 42], [count_parses(grammar, 'a' * n) for n in range(1, 7)])
+        self.assertEqual(4861946401452, count_parses(grammar, 'a' * 26))
+        self.assertEqual(0, count_parses(grammar, 'ab'))
+        self.assertEqual(0, count_parses(grammar, ''))
+        self.assertEqual(100, count_parses(grammar, 'a' * 26, cap=100))
+
+    def test_unambiguous(self):
+        grammar = self._get_grammar("""
+            Number -> Integer | Real
+            Integer -> Digit | Integer Digit
+            Real -> Integer Fraction Scale
+            Fraction -> . Integer
+            Scale -> e Sign Integer | Empty
+            Digit -> 0 | 1 | 2 | 3 | 4 | 5 | 6 | 7 | 8 | 9
+            Sign -> + | -
+            Empty -> ε
+        """)
+        for sentence in ['32', '32.5', '32.5e+1']:
+            self.assertEqual(1, count_parses(grammar, sentence))
+
+    def test_original_heads(self):
+        grammar = self._get_grammar("""
+            S -> A B | C
+            A -> ε | a
+            B -> ε | a
+            C -> a
+        """)
+        self.assertEqual(3, count_parses(grammar, 'a'))
+        self.assertEqual(1, count_parses(grammar, ''))
+        self.assertEqual(1, count_parses(grammar, 'aa'))
+
+    def test_cycles(self):
+        self.assertEqual(math.inf, count_parses(self._get_grammar('S -> S | a'), 'a'))
+        self.assertEqual(math.inf, count_parses(self._get_grammar('S -> a | S'), 'a', cap=1))
+        self.assertEqual(math.inf, count_parses(self._get_grammar('S -> S S | ε'), ''))
+        grammar = self._get_grammar("""
+            S -> A S | a
+            A -> ε | b
+        """)
+        self.assertEqual(math.inf, count_parses(grammar, 'ba', cap=10))
+        grammar = self._get_grammar("""
+            S -> A S | a
+            A -> b
+        """)
+        self.assertEqual(1, count_parses(grammar, 'bba'))
@@ -1,6 +1,7 @@
 from unittest import TestCase
 
-from parse_toys import Grammar, parse_with_cyk
+from parse_toys import Grammar, to_chomsky_normal_form, parse_with_cyk, parse_batch_with_cyk
+from parse_toys.cyk import _recognize, _recognize_parallel, _recognize_trie, _executors
 
 
 class TestCYK(TestCase):
@@ -46,6 +47,11 @@ Fraction -> . Integer
                                       ('. Integer', ('.', ('Digit', (('5',),)))),
                                       ('e Sign Integer', ('e', ('+',), ('Digit', (('1',),)))))),)))
 
+    def test_case_1_general(self):
+        grammar = self._get_grammar_1()
+        for sentence in ['32', '32.5e+1', '32.5', '3.e', '']:
+            self.assertEqual(parse_with_cyk(grammar, sentence), parse_with_cyk(grammar, sentence, deterministic=False))
+
     def test_case_1_3(self):
         grammar = self._get_grammar_1()
         results = parse_with_cyk(grammar, '32.5')
@@ -54,3 +60,66 @@ Fraction -> . Integer
                                      (('Integer Digit', (('Digit', (('3',),)), ('2',))),
                                       ('. Integer', ('.', ('Digit', (('5',),)))),
                                       ('Empty', (('ε',),)))),)))
+
+    def test_parallel(self):
+        grammar = self._get_grammar_1()
+        for sentence in ['32', '32.5e+1', '32.5', '3.e']:
+            self.assertEqual(parse_with_cyk(grammar, sentence, deterministic=False),
+                             parse_with_cyk(grammar, sentence, workers=2, parallel_threshold=0, deterministic=False))
+
+    def test_parallel_blocks(self):
+        grammar = self._get_grammar_1()
+        grammar.init_nullable()
+        cnf_grammar = to_chomsky_normal_form(grammar)
+        sentence = '3141592.65e-358979'
+        expected = _recognize(cnf_grammar, sentence)
+        for block_size in [1, 2, 5, 64]:
+            actual = _recognize_parallel(cnf_grammar, sentence, workers=2, block_size=block_size)
+            self.assertEqual(list(expected.cells), list(actual.cells), block_size)
+        executor = _executors[2][1]
+        actual = _recognize_parallel(cnf_grammar, sentence[::-1], workers=2, block_size=3)
+        self.assertEqual(list(_recognize(cnf_grammar, sentence[::-1]).cells), list(actual.cells))
+        self.assertIs(executor, _executors[2][1])
+        grammar = Grammar()
+        grammar.parse('E -> E + E | E × E | ( E ) | i')
+        cnf_grammar = to_chomsky_normal_form(grammar)
+        sentence = '(i+i)×i+i×(i+(i×i))+i'
+        actual = _recognize_parallel(cnf_grammar, sentence, workers=2, block_size=4)
+        self.assertEqual(list(_recognize(cnf_grammar, sentence).cells), list(actual.cells))
+        self.assertIsNot(executor, _executors[2][1])
+
+    def test_useless_heads(self):
+        grammar = Grammar()
+        grammar.parse("""
+            S -> A S | B S | b
+            A -> A a
+            B -> a
+            C -> c
+        """)
+        result = parse_with_cyk(grammar, 'aab', deterministic=False)
+        self.assertEqual(result, ('B S', (('a',), ('B S', (('a',), ('b',))))))
+        self.assertEqual(result, parse_with_cyk(grammar, 'aab', deterministic=False, remove_useless=False))
+        self.assertIsNone(parse_with_cyk(grammar, 'c', deterministic=False))
+
+    def test_batch(self):
+        grammar = self._get_grammar_1()
+        sentences = ['32', '32.5e+1', '32.5', '3.e', '', '32.5e+1', '32.5e-', '3', '325', '.5']
+        expected = [parse_with_cyk(grammar, sentence, deterministic=False) for sentence in sentences]
+        self.assertEqual(expected, parse_batch_with_cyk(grammar, sentences, deterministic=False))
+        self.assertEqual([tree is not None for tree in expected],
+                         parse_batch_with_cyk(grammar, sentences, recognize_only=True, deterministic=False))
+        self.assertEqual(expected, parse_batch_with_cyk(grammar, sentences))
+
+    def test_batch_trie(self):
+        grammar = self._get_grammar_1()
+        cnf_grammar = to_chomsky_normal_form(grammar)
+        sentences = ['32.5e+1', '32.5', '32.', '7']
+        visited = []
+
+        def _visit(sentence, indices, chart):
+            self.assertEqual(len(sentence), len(chart))
+            self.assertEqual(_recognize(cnf_grammar, sentence).cells, chart.cells)
+            visited.append((sentence, indices))
+
+        _recognize_trie(cnf_grammar, sentences, _visit)
+        self.assertEqual([('32.', [2]), ('32.5', [1]), ('32.5e+1', [0]), ('7', [3])], visited)
@@ -0,0 +1,104 @@
+from unittest import TestCase
+
+from parse_toys import Grammar, ParseBudget, BudgetExceeded, parse, parse_with_cyk, parse_with_unger, \
+    classify_grammar, get_deterministic_parser
+
+
+class TestDeterministic(TestCase):
+
+    def _check_same(self, grammar, sentences):
+        self.assertIsNotNone(get_deterministic_parser(grammar))
+        for sentence in sentences:
+            self.assertEqual(parse_with_cyk(grammar, sentence, deterministic=False),
+                             get_deterministic_parser(grammar).parse(sentence, tree_format='cyk'))
+            self.assertEqual(parse_with_unger(grammar, sentence, deterministic=False),
+                             get_deterministic_parser(grammar).parse(sentence, tree_format='unger'))
+
+    def test_ll1(self):
+        grammar = Grammar()
+        grammar.parse("""
+            Expr -> Term Rest
+            Rest -> + Term Rest | ε
+            Term -> ( Expr ) | i
+        """)
+        self.assertEqual('LL(1)', classify_grammar(grammar))
+        self._check_same(grammar, ['i', 'i+i', '(i+i)+i', '((i))', 'i+', ')', '', 'i+i+i+i'])
+
+    def test_lalr1(self):
+        grammar = Grammar()
+        grammar.parse("""
+            Expr -> Expr + Term | Term
+            Term -> Term × Factor | Factor
+            Factor -> ( Expr ) | i
+        """)
+        self.assertEqual('LALR(1)', classify_grammar(grammar))
+        self._check_same(grammar, ['i', '(i+i)×i', 'i+i×i', '(i', 'i++i', ''])
+
+    def test_lalr1_epsilon(self):
+        grammar = Grammar()
+        grammar.parse("""
+Number -> Integer | Real
+Integer -> Digit | Integer Digit
+Real -> Integer Fraction Scale
+Fraction -> . Integer
+Scale -> e Sign Integer | Empty
+Digit -> 0 | 1 | 2 | 3 | 4 | 5 | 6 | 7 | 8 | 9
+Sign -> + | -
+Empty -> ε
+        """)
+        self.assertEqual('LALR(1)', classify_grammar(grammar))
+        self._check_same(grammar, ['32', '32.5e+1', '32.5', '3.e', '.5', ''])
+
+    def test_not_deterministic(self):
+        grammar = Grammar()
+        grammar.parse("""
+            S -> L S D | ε
+            L -> ε
+            D -> d
+        """)
+        self.assertIsNone(classify_grammar(grammar))
+        grammar = Grammar()
+        grammar.parse('S -> S S | a')
+        self.assertIsNone(classify_grammar(grammar))
+        grammar = Grammar()
+        grammar.parse('S -> ab')
+        self.assertIsNone(classify_grammar(grammar))
+
+    def test_cached(self):
+        grammar = Grammar()
+        grammar.parse('S -> a S | b')
+        parser = get_deterministic_parser(grammar)
+        self.assertIs(parser, get_deterministic_parser(grammar))
+        grammar.add_production(grammar.start, [grammar.get_or_create_symbol('a')])
+        self.assertIsNot(parser, get_deterministic_parser(grammar))
+        self.assertEqual('LALR(1)', classify_grammar(grammar))
+        grammar.add_production(grammar.start, [grammar.start, grammar.start])
+        self.assertIsNone(classify_grammar(grammar))
+
+    def test_long(self):
+        grammar = Grammar()
+        grammar.parse('S -> S a | b')
+        result = parse_with_unger(grammar, 'b' + 'a' * 500)
+        self.assertEqual('S a', result[0])
+        self.assertIsNone(parse_with_unger(grammar, 'b' + 'a' * 500 + 'b'))
+
+    def test_side_effects(self):
+        grammar = Grammar()
+        grammar.parse('S -> S a | b')
+        self.assertEqual('LALR(1)', classify_grammar(grammar))
+        self.assertFalse(any(hasattr(symbol, 'follow') or hasattr(symbol, 'first')
+                             for symbol in grammar.symbols.values()))
+
+    def test_budget(self):
+        grammar = Grammar()
+        grammar.parse('S -> S a | b')
+        sentence = 'b' + 'a' * 500
+        budget = ParseBudget()
+        self.assertEqual(parse_with_unger(grammar, sentence), parse_with_unger(grammar, sentence, budget=budget))
+        self.assertGreater(budget.steps, 500)
+        self.assertGreater(budget.memo_entries, 0)
+        for parse_function in [parse_with_unger, parse_with_cyk, parse]:
+            with self.assertRaises(BudgetExceeded):
+                parse_function(grammar, sentence, budget=ParseBudget(max_steps=100))
+        with self.assertRaises(BudgetExceeded):
+            parse(grammar, sentence, method='deterministic', budget=ParseBudget(max_steps=100))
@@ -0,0 +1,86 @@
+from itertools import product
+from unittest import TestCase
+
+from parse_toys import Grammar, diagnose, parse_with_unger, count_parses
+
+
+class TestDiagnosis(TestCase):
+
+    @staticmethod
+    def _get_grammar(text):
+        grammar = Grammar()
+        grammar.parse(text)
+        return grammar
+
+    def _assert_consistent(self, grammar, alphabet, max_length):
+        for length in range(max_length + 1):
+            for chars in product(alphabet, repeat=length):
+                sentence = ''.join(chars)
+                diagnosis = diagnose(grammar, sentence)
+                self.assertEqual(count_parses(grammar, sentence) != 0, diagnosis.accepted, sentence)
+                if diagnosis.accepted:
+                    continue
+                prefix = sentence[:diagnosis.prefix_length]
+                self.assertNotIn(sentence[diagnosis.prefix_length:diagnosis.prefix_length + 1], diagnosis.expected)
+                self.assertEqual('' in diagnosis.expected, count_parses(grammar, prefix) != 0, sentence)
+                for terminal in alphabet:
+                    extended = diagnose(grammar, prefix + terminal)
+                    self.assertEqual(terminal in diagnosis.expected,
+                                     extended.accepted or extended.prefix_length > len(prefix), (sentence, terminal))
+
+    def test_deterministic(self):
+        grammar = self._get_grammar("""
+            Expr -> Expr + Term | Term
+            Term -> Term × Factor | Factor
+            Factor -> ( Expr ) | i
+        """)
+        diagnosis = diagnose(grammar, '(i+i)×i')
+        self.assertTrue(diagnosis.accepted)
+        self.assertIsNone(diagnosis.error_offset)
+        self.assertEqual(parse_with_unger(grammar, '(i+i)×i'), diagnosis.tree)
+        self.assertEqual(grammar.start, diagnose(grammar, 'i', return_node=True).tree.symbol)
+        diagnosis = diagnose(grammar, '(i+)×i')
+        self.assertFalse(diagnosis.accepted)
+        self.assertEqual(3, diagnosis.prefix_length)
+        self.assertEqual(3, diagnosis.error_offset)
+        self.assertEqual(')', diagnosis.found)
+        self.assertEqual({'(', 'i'}, diagnosis.expected)
+        self.assertEqual("Unexpected ')' at 3, expected: '(', 'i'", str(diagnosis))
+        diagnosis = diagnose(grammar, '(i+i×i')
+        self.assertEqual(6, diagnosis.error_offset)
+        self.assertEqual('', diagnosis.found)
+        self.assertEqual({')', '+', '×'}, diagnosis.expected)
+        self.assertEqual({'', '+', '×'}, diagnose(grammar, 'ii').expected)
+        self._assert_consistent(grammar, 'i+×()', 4)
+
+    def test_ambiguous(self):
+        grammar = self._get_grammar("""
+            S -> A S b | ε
+            A -> a | a A | ε
+        """)
+        self._assert_consistent(grammar, 'ab', 6)
+        grammar = self._get_grammar("""
+            E -> E + E | E × E | T
+            T -> i | ( E ) | ε
+        """)
+        self._assert_consistent(grammar, 'i+()', 4)
+
+    def test_tokens(self):
+        grammar = self._get_grammar("""
+            Expr -> Expr plus Term | Term
+            Term -> num | lparen Expr rparen
+        """)
+        diagnosis = diagnose(grammar, ['lparen', 'num', 'plus', 'rparen'])
+        self.assertEqual(3, diagnosis.error_offset)
+        self.assertEqual('rparen', diagnosis.found)
+        self.assertEqual({'num', 'lparen'}, diagnosis.expected)
+        self.assertEqual({'', 'plus'}, diagnose(grammar, ['num', 'num']).expected)
+        with self.assertRaises(ValueError):
+            diagnose(grammar, 'num')
+
+    def test_empty_language(self):
+        grammar = self._get_grammar('S -> S a')
+        diagnosis = diagnose(grammar, 'a')
+        self.assertFalse(diagnosis.accepted)
+        self.assertEqual(0, diagnosis.error_offset)
+        self.assertEqual(frozenset(), diagnosis.expected)
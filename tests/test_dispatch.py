@@ -0,0 +1,121 @@
+from itertools import product
+from unittest import TestCase
+
+from parse_toys import Grammar, CostModel, analyze_grammar, parse, parse_with_unger, count_parses
+
+
+class TestDispatch(TestCase):
+
+    @staticmethod
+    def _get_grammar(text):
+        grammar = Grammar()
+        grammar.parse(text)
+        return grammar
+
+    def test_statistics(self):
+        grammar = self._get_grammar("""
+            Expr -> Expr + Term | Term
+            Term -> Term × Factor | Factor
+            Factor -> ( Expr ) | i
+        """)
+        statistics = analyze_grammar(grammar)
+        self.assertIs(statistics, analyze_grammar(grammar))
+        self.assertEqual(3, statistics.heads)
+        self.assertEqual(6, statistics.productions)
+        self.assertEqual(3, statistics.max_length)
+        self.assertEqual('LALR(1)', statistics.deterministic)
+        self.assertEqual(0, statistics.conflicts)
+        self.assertEqual(0.0, statistics.nullable_ratio)
+        grammar.extend([('Factor', ['ε'])])
+        statistics = analyze_grammar(grammar)
+        self.assertEqual(7, statistics.productions)
+        self.assertEqual(1.0, statistics.nullable_ratio)
+        grammar = self._get_grammar('E -> E + E | E × E | i')
+        statistics = analyze_grammar(grammar)
+        self.assertIsNone(statistics.deterministic)
+        self.assertGreater(statistics.conflicts, 0)
+
+    def test_choose(self):
+        model = CostModel()
+        grammar = self._get_grammar("""
+            Expr -> Expr + Term | Term
+            Term -> Term × Factor | Factor
+            Factor -> ( Expr ) | i
+        """)
+        self.assertEqual('deterministic', model.choose(grammar, 100))
+        grammar = self._get_grammar('E -> E + E | E × E | i')
+        self.assertNotIn('deterministic', model.estimate(grammar, 10))
+        self.assertEqual('unger', model.choose(grammar, 1))
+        self.assertEqual('cyk', model.choose(grammar, 50))
+        model = CostModel({'cyk': 1.0})
+        self.assertNotEqual('cyk', model.choose(grammar, 50))
+
+    def test_setup(self):
+        grammar = self._get_grammar('E -> E + E | E × E | i')
+        model = CostModel({'cyk_setup': 1.0})
+        before = model.estimate(grammar, 5)['cyk']
+        parse(grammar, 'i+i', method='cyk')
+        self.assertTrue(grammar.is_cached('cyk'))
+        after = model.estimate(grammar, 5)['cyk']
+        self.assertLess(after, before)
+        grammar.extend([('E', ['(', 'E', ')'])])
+        self.assertFalse(grammar.is_cached('cyk'))
+        self.assertGreater(model.estimate(grammar, 5)['cyk'], before)
+        frozen = grammar.freeze()
+        parse(frozen, 'i+i', method='cyk')
+        self.assertLess(model.estimate(frozen, 5)['cyk'], before)
+
+    def test_parse(self):
+        grammar = self._get_grammar("""
+            Expr -> Expr + Term | Term
+            Term -> Term × Factor | Factor
+            Factor -> ( Expr ) | i
+        """)
+        expected = parse_with_unger(grammar, '(i+i)×i')
+        for method in ['auto', 'deterministic', 'unger', 'cyk', 'glr']:
+            self.assertEqual(expected, parse(grammar, '(i+i)×i', method=method))
+            self.assertIsNone(parse(grammar, '(i+i×i', method=method))
+        node = parse(grammar, '(i+i)×i', tree_format='node')
+        self.assertEqual(expected, node.to_unger_tuple())
+        self.assertEqual(node.to_cyk_tuple(), parse(grammar, '(i+i)×i', method='glr', tree_format='cyk'))
+        with self.assertRaises(ValueError):
+            parse(grammar, 'i', method='earley')
+        with self.assertRaises(ValueError):
+            parse(grammar, 'i', tree_format='xml')
+        with self.assertRaises(ValueError):
+            parse(self._get_grammar('E -> E + E | i'), 'i', method='deterministic')
+
+    def test_same_language(self):
+        grammar = self._get_grammar("""
+            S -> A S b | ε
+            A -> a | a A | ε
+        """)
+        for length in range(6):
+            for chars in product('ab', repeat=length):
+                sentence = ''.join(chars)
+                for method in ['auto', 'unger', 'cyk', 'glr']:
+                    node = parse(grammar, sentence, method=method, tree_format='node')
+                    self.assertEqual(count_parses(grammar, sentence) != 0, node is not None, (method, sentence))
+        grammar = self._get_grammar("""
+            S -> S + T | T
+            T -> id | ( S )
+        """)
+        self.assertEqual(['unger'], list(CostModel().estimate(grammar, 10)))
+        self.assertIn('cyk', CostModel().estimate(grammar, 10, tokens=True))
+        for length in range(6):
+            for tokens in product(['id', '+', '(', ')'], repeat=length):
+                sentence = ''.join(tokens)
+                expected = parse_with_unger(grammar, sentence, deterministic=False) is not None
+                self.assertEqual(expected, parse(grammar, sentence) is not None, sentence)
+                self.assertEqual(expected, parse(grammar, list(tokens)) is not None, tokens)
+        self.assertIsNotNone(parse(grammar, '(id+id)+id'))
+
+    def test_calibrate(self):
+        grammar = self._get_grammar('E -> E + E | E × E | i')
+        model = CostModel({'unger': -1.0, 'cyk': -1.0, 'glr': -1.0, 'cyk_setup': -1.0})
+        self.assertIs(model, model.calibrate(grammar, ['i', 'i+i', 'i+i×i+i'], repeat=2))
+        for method in ['unger', 'cyk', 'glr', 'cyk_setup']:
+            self.assertGreater(model.weights[method], 0.0)
+        self.assertNotIn('deterministic', CostModel().calibrate(grammar, ['i'], methods=['unger']).estimate(grammar, 1))
+        self.assertIn(model.choose(grammar, 7), {'unger', 'cyk', 'glr'})
+        self.assertEqual(('i', 'i'), parse(grammar, ['i'], cost_model=model))
@@ -0,0 +1,84 @@
+from itertools import product
+from unittest import TestCase
+
+from parse_toys import Grammar, ParseBudget, BudgetExceeded, parse_with_glr, parse_with_unger, count_parses
+
+
+class TestGLR(TestCase):
+
+    @staticmethod
+    def _get_grammar(text):
+        grammar = Grammar()
+        grammar.parse(text)
+        return grammar
+
+    def _assert_same_language(self, grammar, alphabet, max_length):
+        for length in range(max_length + 1):
+            for chars in product(alphabet, repeat=length):
+                sentence = ''.join(chars)
+                node = parse_with_glr(grammar, sentence, return_node=True)
+                self.assertEqual(count_parses(grammar, sentence) != 0, node is not None, sentence)
+                if node is not None:
+                    self.assertEqual(grammar.start, node.symbol)
+                    self.assertEqual(sentence, ''.join(leaf.symbol.symbol for leaf in node.walk() if leaf.is_leaf))
+                    for child in node.walk():
+                        if not child.is_leaf:
+                            self.assertEqual(child.production, grammar.productions[child.symbol][child.index])
+                            self.assertEqual(len(child.production), len(child.children))
+
+    def test_deterministic(self):
+        grammar = self._get_grammar("""
+            Expr -> Expr + Term | Term
+            Term -> Term × Factor | Factor
+            Factor -> ( Expr ) | i
+        """)
+        self.assertEqual(parse_with_unger(grammar, '(i+i)×i'), parse_with_glr(grammar, '(i+i)×i'))
+        self.assertIsNone(parse_with_glr(grammar, '(i+i×i'))
+        self.assertIsNone(parse_with_glr(grammar, ''))
+        self._assert_same_language(grammar, 'i+×', 4)
+
+    def test_ambiguous(self):
+        grammar = self._get_grammar('E -> E + E | E × E | i')
+        self.assertEqual(('E × E', ('E + E', ('i', 'i'), '+', ('i', 'i')), '×', ('i', 'i')),
+                         parse_with_glr(grammar, 'i+i×i'))
+        self._assert_same_language(grammar, 'i+', 5)
+
+    def test_epsilon(self):
+        grammar = self._get_grammar("""
+            S -> A S b | a | ε
+            A -> ε | a A
+        """)
+        self._assert_same_language(grammar, 'ab', 6)
+        grammar = self._get_grammar("""
+            S -> S S | a | B
+            B -> ε | B
+        """)
+        self._assert_same_language(grammar, 'a', 5)
+        grammar = self._get_grammar("""
+            S -> A S a | b
+            A -> ε
+        """)
+        self._assert_same_language(grammar, 'ab', 6)
+        grammar = self._get_grammar("""
+            S -> A b B | a S A
+            A -> A B S | ε
+            B -> ε | A S | b B
+        """)
+        self._assert_same_language(grammar, 'ab', 5)
+
+    def test_tokens(self):
+        grammar = self._get_grammar('E -> E plus E | num')
+        self.assertEqual(('E plus E', ('num', 'num'), 'plus', ('num', 'num')),
+                         parse_with_glr(grammar, ['num', 'plus', 'num']))
+        self.assertIsNone(parse_with_glr(grammar, ['num', 'plus']))
+
+    def test_unproductive_start(self):
+        grammar = self._get_grammar('S -> S a')
+        self.assertIsNone(parse_with_glr(grammar, 'a'))
+        self.assertIsNone(parse_with_glr(grammar, 'S'))
+
+    def test_budget(self):
+        grammar = self._get_grammar('E -> E + E | i')
+        with self.assertRaises(BudgetExceeded) as e:
+            parse_with_glr(grammar, '+'.join(['i'] * 20), budget=ParseBudget(max_steps=100))
+        self.assertEqual('steps', e.exception.reason)
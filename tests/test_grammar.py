@@ -1,6 +1,10 @@
+import os
+import tempfile
+from io import StringIO
+from concurrent.futures import ThreadPoolExecutor
 from unittest import TestCase
 
-from parse_toys import Symbol, Productions, Grammar
+from parse_toys import Symbol, Productions, Grammar, FrozenGrammar, parse_with_unger, parse_with_cyk
 
 
 class TestGrammar(TestCase):
@@ -128,3 +132,179 @@ Empty -> ε
         self.assertEqual(1, grammar.symbols['Number'].min_length)
         self.assertEqual(2, grammar.symbols['Fraction'].min_length)
         self.assertEqual(3, grammar.symbols['Real'].min_length)
+
+    def test_parse_weights(self):
+        grammar = Grammar()
+        grammar.parse('S -> A B [0.25] | c [0.75] | d')
+        self.assertEqual([0.25, 0.75, 1.0], grammar.productions[grammar.start].weights)
+        self.assertEqual(str(grammar), """
+S -> A B [0.25]
+   | c [0.75]
+   | d
+"""[1:])
+        self.assertEqual([0.25, 0.75, 1.0], grammar.clone().productions[grammar.start].weights)
+        grammar.add_production(grammar.start, [grammar.symbols['c']], 0.5)
+        self.assertEqual([0.25, 0.75, 1.0], grammar.productions[grammar.start].weights)
+        # Only the last token of an alternative with a decimal point or an exponent is a weight
+        grammar.parse('S -> a [1] | a [0.5] b | [0.5] | b [2.] | c [1e-3]')
+        productions = grammar.productions[grammar.start]
+        self.assertEqual([['a', '[1]'], ['a', '[0.5]', 'b'], ['[0.5]'], ['b'], ['c']],
+                         [[str(symbol) for symbol in production] for production in productions])
+        self.assertEqual([1.0, 1.0, 1.0, 2.0, 0.001], productions.weights)
+        text = str(grammar)
+        self.assertIn('b [2.0]', text)
+        grammar.parse(text)
+        self.assertEqual(text, str(grammar))
+        self.assertEqual([1.0, 1.0, 1.0, 2.0, 0.001], grammar.productions[grammar.start].weights)
+
+    def test_grammar_boundaries(self):
+        grammar = Grammar()
+        grammar.parse("""
+S -> A B c | ε
+A -> a | ε
+B -> b d | A
+        """)
+        grammar.init_last()
+        grammar.init_follow()
+        symbols = grammar.symbols
+        self.assertEqual({'a', 'b', 'c'}, symbols['S'].first)
+        self.assertEqual({'c'}, symbols['S'].last)
+        self.assertEqual({'b', 'a'}, symbols['B'].first)
+        self.assertEqual({'d', 'a'}, symbols['B'].last)
+        self.assertEqual({''}, symbols['S'].follow)
+        self.assertEqual({'a', 'b', 'c'}, symbols['A'].follow)
+        self.assertEqual({'c'}, symbols['B'].follow)
+        self.assertEqual(({'a', 'b', 'c'}, {'c'}, {''}), grammar.boundary_characters()[symbols['S']])
+
+    def test_productions_index(self):
+        a, b, c = Symbol('a'), Symbol('b'), Symbol('c')
+        prod = Productions([[a], [b], [c]], [0.1, 0.2, 0.3])
+        self.assertTrue(prod.remove([b]))
+        self.assertFalse(prod.remove([b]))
+        self.assertFalse(prod.exist([b]))
+        self.assertTrue(prod.exist([c]))
+        self.assertFalse(prod.add([c], 0.5))
+        self.assertEqual([0.1, 0.5], prod.weights)
+        self.assertTrue(prod.add([b]))
+        self.assertEqual([(a,), (c,), (b,)], list(prod))
+
+    def test_from_rules(self):
+        grammar = Grammar.from_rules([
+            ('S', ['A', 'b']),
+            ('A', ['a'], 0.5),
+            ('A', ['ε']),
+            ('A', ['a'], 0.8),
+            (Symbol('S'), [Symbol('c')]),
+        ])
+        self.assertEqual(str(grammar), """
+S -> A b
+   | c
+A -> a [0.8]
+   | ε
+"""[1:])
+        self.assertEqual({grammar.symbols['S']}, grammar.composes[grammar.symbols['A']])
+        self.assertEqual(1, grammar.extend([('A', ['a', 'a']), ('A', ['a'])]))
+        self.assertIsNotNone(parse_with_unger(grammar, 'aab'))
+        self.assertEqual('B', str(Grammar.from_rules([('A', ['a'])], start='B').start))
+        with self.assertRaises(RuntimeError):
+            Grammar.from_rules([('A', [])])
+
+    def test_load(self):
+        text = """
+S -> A b
+   | c [0.5]
+A -> a
+   | ε
+"""
+        expected = Grammar()
+        expected.parse(text)
+        self.assertEqual(str(expected), str(Grammar.load(StringIO(text))))
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'grammar.txt')
+            with open(path, 'w', encoding='utf8') as writer:
+                writer.write(text)
+            grammar = Grammar.load(path)
+        self.assertEqual(expected.fingerprint(), grammar.fingerprint())
+        with self.assertRaises(RuntimeError):
+            Grammar.load(StringIO('S -> a |\nA -> b'))
+        with self.assertRaises(RuntimeError):
+            Grammar.load(StringIO('S T -> a'))
+
+    def test_remove_useless(self):
+        grammar = Grammar()
+        grammar.parse("""
+S -> A b | B c | a
+A -> A a | C
+B -> b
+C -> C c
+D -> d
+        """)
+        version = grammar.version
+        reduced = grammar.reduced()
+        self.assertIs(reduced, grammar.reduced())
+        self.assertEqual(version, grammar.version)
+        self.assertEqual(str(reduced), """
+S -> B c
+   | a
+B -> b
+"""[1:])
+        self.assertNotIn(reduced.symbols['A'], reduced.composes.get(reduced.symbols['a'], set()))
+        grammar.parse("""
+S -> A b
+A -> A a
+        """)
+        grammar.remove_useless()
+        self.assertEqual('S ->\n', str(grammar))
+        self.assertEqual('', str(Grammar()))
+        grammar.remove(grammar.start)
+        self.assertEqual('', str(grammar))
+
+    def test_freeze(self):
+        grammar = Grammar()
+        grammar.parse("""
+S -> A B c | ε
+A -> a | ε
+B -> b d | A
+D -> d
+        """)
+        frozen = grammar.freeze()
+        self.assertIs(frozen, frozen.freeze())
+        self.assertEqual(str(grammar), str(frozen))
+        self.assertEqual(grammar.fingerprint(), frozen.fingerprint())
+        self.assertEqual({'a', 'b', 'c'}, frozen.symbols['S'].first)
+        self.assertEqual({'c'}, frozen.symbols['B'].follow)
+        self.assertEqual(1, frozen.symbols['D'].min_length)
+        self.assertNotIn(frozen.symbols['D'], frozen.reduced().productions)
+        self.assertIsInstance(frozen.reduced(), FrozenGrammar)
+        with self.assertRaises(RuntimeError):
+            frozen.add_production(frozen.start, [frozen.symbols['d']])
+        with self.assertRaises(RuntimeError):
+            frozen.remove_useless()
+        with self.assertRaises(RuntimeError):
+            frozen.start = frozen.symbols['A']
+        with self.assertRaises(TypeError):
+            frozen.productions[frozen.symbols['a']] = frozen.productions[frozen.start]
+        grammar.add_production(grammar.start, [grammar.symbols['d']])
+        self.assertEqual(2, len(frozen.productions[frozen.start]))
+        clone = frozen.clone()
+        clone.add_production(clone.start, [clone.symbols['d']])
+        self.assertEqual(3, len(clone.productions[clone.start]))
+
+    def test_frozen_parsing(self):
+        grammar = Grammar()
+        grammar.parse("""
+Expr -> Expr + Term | Term | Expr Expr
+Term -> Term × Factor | Factor
+Factor -> ( Expr ) | i
+        """)
+        sentences = ['i', 'i+i', '(i+i)×i', 'i+', 'ii', '(i)(i+i)×i'] * 10
+        expected = [(parse_with_unger(grammar, sentence), parse_with_cyk(grammar, sentence)) for sentence in sentences]
+        frozen = grammar.freeze()
+        snapshot = {name: dict(symbol.__dict__) for name, symbol in frozen.symbols.items()}
+
+        def _parse(sentence):
+            return parse_with_unger(frozen, sentence), parse_with_cyk(frozen, sentence)
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            self.assertEqual(expected, list(executor.map(_parse, sentences)))
+        self.assertEqual(snapshot, {name: dict(symbol.__dict__) for name, symbol in frozen.symbols.items()})
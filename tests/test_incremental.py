@@ -0,0 +1,86 @@
+import random
+from itertools import product
+from unittest import TestCase
+
+from parse_toys import Grammar, IncrementalCNF, parse_with_cyk
+
+
+class TestIncrementalCNF(TestCase):
+
+    @staticmethod
+    def _get_grammar(text):
+        grammar = Grammar()
+        grammar.parse(text)
+        return grammar
+
+    def _assert_same_language(self, incremental, alphabet='ab', max_length=5):
+        expected = incremental.grammar.clone()
+        for length in range(max_length + 1):
+            for chars in product(alphabet, repeat=length):
+                sentence = ''.join(chars)
+                tree = incremental.parse(sentence)
+                self.assertEqual(parse_with_cyk(expected, sentence, deterministic=False) is not None, tree is not None,
+                                 f'{sentence}\n{incremental.grammar}\n{incremental.cnf_grammar}')
+
+    def test_add_and_remove(self):
+        grammar = self._get_grammar('S -> a S b | ε')
+        incremental = IncrementalCNF(grammar)
+        self.assertEqual(parse_with_cyk(grammar, 'aabb', deterministic=False), incremental.parse('aabb'))
+        self._assert_same_language(incremental)
+        self.assertTrue(incremental.add_production(grammar.symbols['S'], [grammar.symbols['S'], grammar.symbols['S']]))
+        self.assertFalse(incremental.add_production(grammar.symbols['S'], [grammar.symbols['S'], grammar.symbols['S']]))
+        self.assertIsNotNone(incremental.parse('abab'))
+        self._assert_same_language(incremental)
+        self.assertTrue(incremental.remove_production(grammar.symbols['S'], [grammar.empty_symbol]))
+        self.assertFalse(incremental.remove_production(grammar.symbols['S'], [grammar.empty_symbol]))
+        self.assertIsNone(incremental.parse('ab'))
+        self.assertIsNone(incremental.parse(''))
+        self._assert_same_language(incremental)
+
+    def test_new_head(self):
+        grammar = self._get_grammar('S -> A b')
+        incremental = IncrementalCNF(grammar)
+        self.assertIsNone(incremental.parse('ab'))
+        self.assertIsNotNone(incremental.parse('Ab'))
+        head = grammar.symbols['A']
+        incremental.add_production(head, [grammar.get_or_create_symbol('a')])
+        self.assertIsNotNone(incremental.parse('ab'))
+        self.assertIsNone(incremental.parse('Ab'))
+        incremental.add_production(head, [grammar.empty_symbol])
+        self.assertIsNotNone(incremental.parse('b'))
+        self._assert_same_language(incremental, alphabet='abA', max_length=3)
+
+    def test_release_auxiliary_heads(self):
+        grammar = self._get_grammar('S -> a')
+        incremental = IncrementalCNF(grammar)
+        size = len(incremental.cnf_grammar.productions)
+        head, a, b = grammar.symbols['S'], grammar.symbols['a'], grammar.get_or_create_symbol('b')
+        incremental.add_production(head, [a, b, a, b])
+        incremental.add_production(head, [a, b, a])
+        self.assertGreater(len(incremental.cnf_grammar.productions), size)
+        incremental.remove_production(head, [a, b, a, b])
+        incremental.remove_production(head, [a, b, a])
+        self.assertEqual(size, len(incremental.cnf_grammar.productions))
+
+    def test_random(self):
+        random.seed(0xcafe)
+        for _ in range(10):
+            grammar = self._get_grammar('S -> A B')
+            incremental = IncrementalCNF(grammar)
+            heads = [grammar.get_or_create_symbol(name) for name in 'SABC']
+            symbols = heads + [grammar.get_or_create_symbol(name) for name in 'ab']
+            added = [(grammar.symbols['S'], (grammar.symbols['A'], grammar.symbols['B']))]
+            for _ in range(15):
+                if len(added) > 0 and random.random() < 0.3:
+                    head, production = added.pop(random.randrange(len(added)))
+                    self.assertTrue(incremental.remove_production(head, production))
+                else:
+                    head = random.choice(heads)
+                    production = tuple(random.choice(symbols) for _ in range(random.randint(0, 3)))
+                    if len(production) == 0:
+                        production = (grammar.empty_symbol,)
+                    if incremental.add_production(head, production):
+                        added.append((head, production))
+                self._assert_same_language(incremental, max_length=4)
+            incremental.rebuild()
+            self._assert_same_language(incremental, max_length=4)
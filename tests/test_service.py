@@ -0,0 +1,143 @@
+import os
+import json
+import math
+import time
+import asyncio
+import tempfile
+from unittest import TestCase
+
+from parse_toys import Grammar, compile_cyk, ParseService, ParseClient
+from parse_toys.service import _PARSERS, _parse_batch
+
+
+class TestService(TestCase):
+
+    def setUp(self):
+        self.cache = tempfile.TemporaryDirectory()
+        self.grammar = Grammar()
+        self.grammar.parse("""
+            Expr -> Expr + Term | Term
+            Term -> Term × Factor | Factor
+            Factor -> ( Expr ) | i
+        """)
+
+    def tearDown(self):
+        self.cache.cleanup()
+
+    def test_batch(self):
+        sentences = ['i', 'i+i', '(i+i)×i', 'i+', '((i))'] * 8
+        expected = [compile_cyk(self.grammar, cache_dir=self.cache.name)(sentence) for sentence in sentences]
+
+        async def _run():
+            async with ParseService(self.grammar, cache_dir=self.cache.name, batch_delay=0.01) as service:
+                async with ParseClient(port=service.port) as client:
+                    return await asyncio.gather(*[client.parse(sentence) for sentence in sentences])
+
+        self.assertEqual(expected, asyncio.run(_run()))
+
+    def test_unix_socket(self):
+        path = os.path.join(self.cache.name, 'parse.sock')
+
+        async def _run():
+            grammars = {'expr': self.grammar, 'ab': 'S -> a S b | a b'}
+            async with ParseService(grammars, method='unger', path=path, cache_dir=self.cache.name):
+                async with ParseClient(path=path) as client:
+                    results = [
+                        await client.parse('i+i'),
+                        await client.parse('aabb', grammar='ab'),
+                        await client.request('ab', grammar='xy'),
+                    ]
+                    reader, writer = await asyncio.open_unix_connection(path)
+                    writer.write(b'not json\n')
+                    await writer.drain()
+                    results.append(json.loads(await reader.readline()))
+                    writer.close()
+                    return results
+
+        results = asyncio.run(_run())
+        self.assertEqual(('Expr + Term', ('Term', ('Factor', ('i', 'i'))), '+', ('Factor', ('i', 'i'))), results[0])
+        self.assertEqual(('a S b', 'a', ('a b', 'a', 'b'), 'b'), results[1])
+        self.assertEqual({'id': 3, 'error': 'unknown grammar: xy'}, results[2])
+        self.assertEqual({'id': None, 'error': 'invalid request'}, results[3])
+
+    def test_grammar_objects(self):
+        grammar = Grammar()
+        grammar.parse("""
+            S -> A b | X
+            A -> a | ε
+            X -> x
+        """)
+        grammar.clean(grammar.symbols['X'])
+
+        async def _run():
+            async with ParseService({'g': grammar, 'text': 'S -> a S | ε'}, cache_dir=self.cache.name) as service:
+                async with ParseClient(port=service.port) as client:
+                    results = [await client.parse(sentence, grammar='g') for sentence in ['b', 'ab', 'x', 'X']]
+                    return results + [await client.parse(sentence, grammar='text') for sentence in ['', 'aa', 'b']]
+
+        expected = [compile_cyk(grammar, cache_dir=self.cache.name)(sentence) for sentence in ['b', 'ab']]
+        results = asyncio.run(_run())
+        self.assertEqual(expected, results[:2])
+        self.assertIsNotNone(results[0])
+        self.assertEqual([None, None], results[2:4])
+        self.assertIsNotNone(results[4])
+        self.assertIsNotNone(results[5])
+        self.assertIsNone(results[6])
+
+    def test_timeout(self):
+        async def _run():
+            async with ParseService(self.grammar, cache_dir=self.cache.name) as service:
+                async with ParseClient(port=service.port) as client:
+                    response = await client.request('i+i', timeout=0.0)
+                    with self.assertRaises(RuntimeError):
+                        await client.parse('i', timeout=0.0)
+                    return response, await client.request('i+')
+
+        timeout, rejected = asyncio.run(_run())
+        self.assertEqual({'id': 1, 'error': 'timeout'}, timeout)
+        self.assertEqual({'id': 3, 'accepted': False, 'tree': None}, rejected)
+
+    def test_invalid_sentence(self):
+        async def _run():
+            async with ParseService(self.grammar, cache_dir=self.cache.name, batch_delay=0.05) as service:
+                async with ParseClient(port=service.port) as client:
+                    reader, writer = await asyncio.open_connection('127.0.0.1', service.port)
+                    writer.write(b'{"id": 7, "sentence": 5}\n')
+                    await writer.drain()
+                    results = await asyncio.gather(client.parse('i+i'), reader.readline())
+                    writer.close()
+                    return results
+
+        tree, response = asyncio.run(_run())
+        self.assertEqual(compile_cyk(self.grammar, cache_dir=self.cache.name)('i+i'), tree)
+        self.assertEqual({'id': None, 'error': 'invalid request'}, json.loads(response))
+        parser = _PARSERS['expr'] = compile_cyk(self.grammar, cache_dir=self.cache.name)
+        try:
+            results = _parse_batch('expr', ['i', 5, 'i+i'], [math.inf, math.inf, 0.0])
+        finally:
+            _PARSERS.clear()
+        self.assertEqual((parser('i'), None), results[0])
+        self.assertEqual((None, "object of type 'int' has no len()"), results[1])
+        self.assertEqual((None, 'timeout'), results[2])
+
+    def test_timeout_stops_worker(self):
+        async def _run():
+            grammar = 'E -> E + E | i'
+            async with ParseService(grammar, cache_dir=self.cache.name) as service:
+                async with ParseClient(port=service.port) as client:
+                    start_time = time.monotonic()
+                    response = await client.request('+'.join(['i'] * 1000), timeout=0.2)
+                    # The only worker is free again soon after the deadline
+                    tree = await client.parse('i+i', timeout=5.0)
+                    return response, tree, time.monotonic() - start_time
+
+        response, tree, elapsed = asyncio.run(_run())
+        self.assertEqual('timeout', response['error'])
+        self.assertIsNotNone(tree)
+        self.assertLess(elapsed, 5.0)
+
+    def test_loopback_only(self):
+        with self.assertRaises(ValueError):
+            ParseService(self.grammar, host='0.0.0.0')
+        with self.assertRaises(ValueError):
+            ParseClient(host='example.com', port=80)
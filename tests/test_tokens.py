@@ -0,0 +1,59 @@
+from array import array
+from unittest import TestCase
+
+from parse_toys import Grammar, TokenSequence, parse_with_cyk, parse_with_unger, parse_batch_with_cyk, count_parses
+
+
+class TestTokenSequence(TestCase):
+
+    @staticmethod
+    def _get_grammar():
+        grammar = Grammar()
+        grammar.parse("""
+            Expr -> Expr plus Term | Term
+            Term -> num | lparen Expr rparen
+        """)
+        return grammar
+
+    def test_indexing(self):
+        tokens = TokenSequence(array('b', [0, 1, 0, 7]), {'num': 0, 'plus': 1})
+        self.assertEqual(4, len(tokens))
+        self.assertEqual(['num', 'plus', 'num', None], list(tokens))
+        self.assertEqual('plus', tokens[1])
+        self.assertEqual('plus', tokens[1:2])
+        self.assertEqual('', tokens[4:5])
+        self.assertEqual(['plus', 'num'], list(tokens[1:3]))
+
+    def test_token_kinds(self):
+        grammar = self._get_grammar()
+        tokens = ['num', 'plus', 'lparen', 'num', 'plus', 'num', 'rparen']
+        expected = ('Expr plus Term', (('Term', (('num',),)), 'plus', ('lparen Expr rparen', (
+            'lparen', ('Expr plus Term', (('Term', (('num',),)), 'plus', ('num',))), 'rparen'))))
+        self.assertEqual(expected, parse_with_cyk(grammar, tokens))
+        self.assertEqual(expected, parse_with_cyk(grammar, TokenSequence(tuple(tokens))))
+        self.assertEqual(('Expr plus Term', ('Term', ('num', 'num')), 'plus', ('num', 'num')),
+                         parse_with_unger(grammar, ['num', 'plus', 'num']))
+        self.assertIsNone(parse_with_cyk(grammar, ['num', 'plus']))
+        self.assertIsNone(parse_with_unger(grammar, ['num', 'plus']))
+        self.assertEqual(parse_with_unger(grammar, 'numplusnum'), parse_with_unger(grammar, ['num', 'plus', 'num']))
+        self.assertEqual(1, count_parses(grammar, tokens))
+
+    def test_token_ids(self):
+        grammar = self._get_grammar()
+        terminal_ids = {'num': 1, 'plus': 2, 'lparen': 3, 'rparen': 4}
+        buffer = array('i', [1, 2, 3, 1, 2, 1, 4])
+        tokens = TokenSequence(memoryview(buffer), terminal_ids)
+        names = ['num', 'plus', 'lparen', 'num', 'plus', 'num', 'rparen']
+        self.assertEqual(parse_with_cyk(grammar, names), parse_with_cyk(grammar, tokens))
+        self.assertEqual(parse_with_unger(grammar, names), parse_with_unger(grammar, tokens))
+        self.assertIsNone(parse_with_cyk(grammar, TokenSequence(array('i', [1, 5, 1]), terminal_ids)))
+        self.assertEqual([True, False, True],
+                         parse_batch_with_cyk(grammar, [tokens, TokenSequence([1, 2], terminal_ids), names[:1]],
+                                              recognize_only=True))
+
+    def test_deterministic(self):
+        grammar = Grammar()
+        grammar.parse('S -> a S b | ε')
+        self.assertEqual(parse_with_cyk(grammar, 'aabb'), parse_with_cyk(grammar, list('aabb')))
+        self.assertEqual(parse_with_unger(grammar, 'aabb'), parse_with_unger(grammar, list('aabb')))
+        self.assertIsNone(parse_with_unger(grammar, list('aab')))
@@ -0,0 +1,75 @@
+from unittest import TestCase
+
+from parse_toys import Grammar, ParseNode, parse_with_cyk, parse_batch_with_cyk, parse_with_glr, parse_with_unger
+
+
+class TestParseNode(TestCase):
+
+    def _get_grammar(self):
+        grammar = Grammar()
+        grammar.parse("""
+            Expr -> Expr + Term | Term
+            Term -> Term × Factor | Factor
+            Factor -> ( Expr ) | i
+        """)
+        return grammar
+
+    def test_unger_node(self):
+        grammar = self._get_grammar()
+        for deterministic in [False, True]:
+            root = parse_with_unger(grammar, '(i+i)×i', deterministic=deterministic, return_node=True)
+            self.assertIsInstance(root, ParseNode)
+            self.assertEqual((grammar.symbols['Expr'], 1, 0, 7), (root.symbol, root.index, root.start, root.stop))
+            self.assertEqual('Term', root.label)
+            self.assertEqual(parse_with_unger(grammar, '(i+i)×i', deterministic=deterministic),
+                             root.to_unger_tuple())
+            leaves = [node for node in root.walk() if node.is_leaf]
+            self.assertEqual('(i+i)×i', ''.join(node.label for node in leaves))
+            self.assertEqual([(i, i + 1) for i in range(7)], [(node.start, node.stop) for node in leaves])
+
+    def test_cyk_node(self):
+        grammar = Grammar()
+        grammar.parse("""
+            S -> L S D | ε
+            L -> ε
+            D -> d
+        """)
+        root = parse_with_cyk(grammar, 'dd', return_node=True)
+        self.assertEqual(parse_with_cyk(grammar, 'dd'), root.to_cyk_tuple())
+        self.assertEqual((0, 2), (root.start, root.stop))
+        self.assertEqual(['ε', 'ε', 'ε', 'd', 'd'], [node.label for node in root.walk() if node.is_leaf])
+        self.assertIsNone(parse_with_cyk(grammar, 'de', return_node=True))
+
+    def test_useless_productions(self):
+        grammar = Grammar()
+        grammar.parse("""
+            S -> a S | A B b | C a
+            A -> a A | A b
+            B -> b
+            C -> b
+        """)
+        roots = [parse_with_unger(grammar, 'aba', deterministic=False, return_node=True),
+                 parse_with_cyk(grammar, 'aba', deterministic=False, return_node=True),
+                 parse_batch_with_cyk(grammar, ['aba'], deterministic=False, return_node=True)[0],
+                 parse_with_glr(grammar, 'aba', return_node=True)]
+        for root in roots:
+            self.assertEqual([0, 2], [node.index for node in root.walk() if node.symbol.symbol == 'S'])
+            for node in root.walk():
+                if not node.is_leaf:
+                    self.assertEqual(grammar.productions[node.symbol][node.index], node.production)
+
+    def test_walk_order(self):
+        grammar = self._get_grammar()
+        root = parse_with_unger(grammar, 'i+i', return_node=True)
+        self.assertEqual(['Expr', 'Expr', 'Term', 'Factor', 'i', '+', 'Term', 'Factor', 'i'],
+                         [str(node.symbol) for node in root.walk()])
+        self.assertEqual(['i', 'Factor', 'Term', 'Expr', '+', 'i', 'Factor', 'Term', 'Expr'],
+                         [str(node.symbol) for node in root.walk(postorder=True)])
+
+    def test_deep(self):
+        grammar = Grammar()
+        grammar.parse('S -> S a | b')
+        root = parse_with_cyk(grammar, 'b' + 'a' * 3000, return_node=True)
+        self.assertEqual(6002, sum(1 for _ in root.walk()))
+        self.assertEqual('S a', root.to_cyk_tuple()[0])
+        self.assertEqual('S a', root.to_unger_tuple()[0])
@@ -1,6 +1,6 @@
 from unittest import TestCase
 
-from parse_toys import Grammar, parse_with_unger
+from parse_toys import Grammar, ParseBudget, parse_with_unger
 
 
 class TestUnger(TestCase):
@@ -66,3 +66,39 @@ class TestUnger(TestCase):
         """)
         result = parse_with_unger(grammar, 'abc')
         self.assertEqual(result, ('A B', ('a b', 'a', 'b'), ('c', 'c')))
+
+    def test_useless_heads(self):
+        grammar = Grammar()
+        grammar.parse("""
+            S -> A S | B S | b
+            A -> A a
+            B -> a
+            C -> c
+        """)
+        result = parse_with_unger(grammar, 'aab', deterministic=False)
+        self.assertEqual(result, ('B S', ('a', 'a'), ('B S', ('a', 'a'), ('b', 'b'))))
+        self.assertEqual(result, parse_with_unger(grammar, 'aab', deterministic=False, remove_useless=False))
+        self.assertIsNone(parse_with_unger(grammar, 'c', deterministic=False))
+
+    def test_memo(self):
+        grammar = Grammar()
+        grammar.parse("""
+            Expr -> Expr + Term | Term
+            Term -> Term × Factor | Factor
+            Factor -> ( Expr ) | i
+        """)
+        for sentence in ['(i+i)×i', 'i+i×(i+i', '', 'i']:
+            expected = parse_with_unger(grammar, sentence, deterministic=False, memo='dict')
+            self.assertEqual(expected, parse_with_unger(grammar, sentence, deterministic=False, memo='array'))
+            self.assertEqual(expected, parse_with_unger(grammar, sentence, deterministic=False))
+            budgets = [ParseBudget(), ParseBudget()]
+            for memo, budget in zip(['dict', 'array'], budgets):
+                parse_with_unger(grammar, sentence, deterministic=False, memo=memo, budget=budget)
+            self.assertEqual(budgets[0].memo_entries, budgets[1].memo_entries)
+        grammar.extend([('Factor', ['ε'])])
+        for sentence in ['(i+)×', '(+)', '']:
+            expected = parse_with_unger(grammar, sentence, deterministic=False, memo='dict')
+            self.assertIsNotNone(expected)
+            self.assertEqual(expected, parse_with_unger(grammar, sentence, deterministic=False, memo='array'))
+        with self.assertRaises(ValueError):
+            parse_with_unger(grammar, 'i', memo='list')
@@ -0,0 +1,88 @@
+from unittest import TestCase
+
+from parse_toys import Grammar, parse_with_cyk, parse_with_viterbi, count_parses
+
+
+class TestViterbi(TestCase):
+
+    def _get_grammar(self):
+        grammar = Grammar()
+        grammar.parse("""
+            E -> E + E [0.1] | E × E [0.4] | i [0.5]
+        """)
+        return grammar
+
+    def test_best(self):
+        grammar = Grammar()
+        grammar.parse("""
+            E -> E + T [0.3] | T [0.7]
+            T -> T × i [0.2] | i [0.8]
+            E -> i × i [0.9]
+        """)
+        result = parse_with_viterbi(grammar, 'i×i')
+        self.assertEqual(result, ('i × i', ('i', '×', 'i')))
+        result = parse_with_viterbi(grammar, 'i+i×i')
+        self.assertEqual(result, ('E + T', (('T', (('i',),)), '+', ('T × i', (('i',), '×', 'i')))))
+
+    def test_top_k(self):
+        grammar = self._get_grammar()
+        results = parse_with_viterbi(grammar, 'i+i×i', top_k=3)
+        self.assertEqual(2, len(results))
+        self.assertAlmostEqual(0.1 * 0.4 * 0.5 ** 3, results[0][0])
+        self.assertAlmostEqual(0.1 * 0.4 * 0.5 ** 3, results[1][0])
+        self.assertEqual([], parse_with_viterbi(grammar, 'i+', top_k=3))
+        self.assertIsNone(parse_with_viterbi(grammar, 'i+'))
+
+    def test_beam(self):
+        grammar = Grammar()
+        grammar.parse("""
+            S -> A | B
+            A -> a a [0.9]
+            B -> a a [0.1]
+        """)
+        results = parse_with_viterbi(grammar, 'aa', top_k=2)
+        self.assertEqual([0.9, 0.1], [round(score, 6) for score, _ in results])
+        results = parse_with_viterbi(grammar, 'aa', top_k=2, beam_width=2)
+        self.assertEqual([('A', (('a a', ('a', 'a')),))], [tree for _, tree in results])
+        results = parse_with_viterbi(grammar, 'aa', top_k=2, threshold=0.5)
+        self.assertEqual([0.9], [round(score, 6) for score, _ in results])
+
+    def test_epsilon(self):
+        grammar = Grammar()
+        grammar.parse("""
+            S -> A b [0.5] | b [0.5]
+            A -> a [0.4] | ε [0.6]
+        """)
+        results = parse_with_viterbi(grammar, 'b', top_k=2)
+        self.assertEqual([0.5, 0.3], [round(score, 6) for score, _ in results])
+        self.assertEqual(('A b', (('ε',), 'b')), results[1][1])
+        self.assertEqual(('A b', (('a',), 'b')), parse_with_viterbi(grammar, 'ab'))
+
+    def test_same_as_cyk(self):
+        grammar = Grammar()
+        grammar.parse("""
+Number -> Integer | Real
+Integer -> Digit | Integer Digit
+Real -> Integer Fraction Scale
+Fraction -> . Integer
+Scale -> e Sign Integer | Empty
+Digit -> 0 | 1 | 2 | 3 | 4 | 5 | 6 | 7 | 8 | 9
+Sign -> + | -
+Empty -> ε
+        """)
+        for sentence in ['32', '32.5e+1', '32.5', '']:
+            self.assertEqual(parse_with_cyk(grammar, sentence), parse_with_viterbi(grammar, sentence))
+
+    def test_cycle(self):
+        grammar = Grammar()
+        grammar.parse("""
+            S -> B
+            B -> ε | b b b | S B b
+        """)
+        self.assertIsNotNone(parse_with_cyk(grammar, 'b', deterministic=False))
+        expected = ('B', (('S B b', (('B', (('ε',),)), ('ε',), 'b')),))
+        self.assertEqual(expected, parse_with_viterbi(grammar, 'b'))
+        self.assertEqual([expected], [tree for _, tree in parse_with_viterbi(grammar, 'b', top_k=3)])
+        for sentence in ['', 'bb', 'bbb', 'bbbb']:
+            self.assertEqual(count_parses(grammar, sentence) == 0,
+                             parse_with_viterbi(grammar, sentence) is None, sentence)